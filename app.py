@@ -1,26 +1,110 @@
 from flask import Flask, render_template, redirect, url_for, flash, request, session, current_app, jsonify, send_file, abort
 import urllib
-from werkzeug.security import generate_password_hash
 from loguru import logger
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, with_expression
 from functools import wraps
-from openpyxl import load_workbook
 from flask_login import LoginManager, UserMixin, login_required, current_user, login_user, logout_user
 from extensions import db
 from models import Employee
 from flask_wtf import FlaskForm
 from flask_wtf.csrf import CSRFProtect
 from flask_migrate import Migrate
+from config import get_config
+from query_stats import init_query_stats
+from background_jobs import init_background_jobs
+from commands import init_database, register_commands
+from employee_import import import_roster, summary_messages
+from exports import XLSX_MIMETYPE, evaluation_summary_workbook
+from lookup_cache import (get_admin_employee, get_dimensions, get_employees, get_task, get_tasks, init_lookup_cache,
+                          invalidate_dimensions, invalidate_employees, invalidate_tasks, lookup_cache_stats)
+from session_identity import forget_identity, load_identity, remember_identity
+
+
+# 扩展在 create_app 中绑定到应用
+migrate = Migrate()
+csrf = CSRFProtect()
+login_manager = LoginManager()
+login_manager.login_view = 'login'
 
 
-# 数据库错误处理装饰器
-app = Flask(__name__)
+class DeferredViews:
+    """
+    记录本模块中定义的视图函数、错误处理器、模板过滤器和蓝图，由 create_app 注册到每个新建的应用上。
+
+    用法与 Flask 应用对象相同（@views.route(...)），端点名称不变（如 'login'、'admin_employee_list'），
+    模板和 url_for 无需修改。
+    """
+
+    def __init__(self):
+        self._callbacks = []
+
+    def route(self, rule, **options):
+        def decorator(f):
+            endpoint = options.pop('endpoint', None)
+            self._callbacks.append(lambda app: app.add_url_rule(rule, endpoint, f, **options))
+            return f
+        return decorator
+
+    def errorhandler(self, code_or_exception):
+        def decorator(f):
+            self._callbacks.append(lambda app: app.register_error_handler(code_or_exception, f))
+            return f
+        return decorator
+
+    def template_filter(self, name=None):
+        def decorator(f):
+            self._callbacks.append(lambda app: app.add_template_filter(f, name))
+            return f
+        return decorator
+
+    def before_first_request(self, f):
+        self._callbacks.append(lambda app: app.before_first_request(f))
+        return f
+
+    def register_blueprint(self, blueprint):
+        self._callbacks.append(lambda app: app.register_blueprint(blueprint))
+
+    def register(self, app):
+        """把记录的视图和蓝图注册到应用"""
+        for callback in self._callbacks:
+            callback(app)
+
+
+views = DeferredViews()
 
-# 初始化Flask-Migrate
-migrate = Migrate(app, db)
 
+def create_app(config_name=None):
+    """
+    创建并配置应用
+
+    导入和创建应用都不访问数据库；建表、补齐表结构和初始数据由 flask init-db 完成（见 commands.py）。
+
+    Args:
+        config_name: 配置名称，默认取环境变量 APP_CONFIG（见 config.py）
+    Returns:
+        Flask 应用
+    """
+    app = Flask(__name__)
+    app.config.from_object(get_config(config_name))
+    db.init_app(app)
+    migrate.init_app(app, db)
+    csrf.init_app(app)
+    login_manager.init_app(app)
+    # 请求级SQL统计：语句数、数据库耗时、慢查询和疑似 N+1 查询警告
+    init_query_stats(app)
+    # 评估维度、任务和员工名册的缓存
+    init_lookup_cache(app)
+    # 导出、导入等耗时操作的后台任务执行器
+    init_background_jobs(app)
+    register_commands(app)
+    # 本模块中定义的视图和蓝图，在模块末尾创建默认应用前已全部记录
+    views.register(app)
+    return app
+
+
+# 数据库错误处理装饰器
 def handle_db_error(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -30,14 +114,12 @@ def handle_db_error(func):
             db.session.rollback()
             logger.error(f'Database error: {str(e)}')
             flash(f'操作失败: 数据库错误', 'danger')
-            with app.app_context():
-                return redirect(url_for('admin_employee_list'))
+            return redirect(url_for('admin_employee_list'))
         except Exception as e:
             db.session.rollback()
             logger.error(f'Unexpected error: {str(e)}')
             flash(f'操作失败: 系统错误', 'danger')
-            with app.app_context():
-                return redirect(url_for('admin_employee_list'))
+            return redirect(url_for('admin_employee_list'))
     return wrapper
 def admin_required(f):
     @wraps(f)
@@ -67,7 +149,6 @@ def readonly_admin_required(f):
 from models import EvaluationDimension as Dimension
 from wtforms import StringField, SelectField, DecimalField, SubmitField, IntegerField, FloatField, FieldList, FormField
 from wtforms.validators import DataRequired, Length, NumberRange, ValidationError
-import pandas as pd
 from datetime import datetime
 import pytz
 import os
@@ -75,34 +156,26 @@ import json
 from io import BytesIO
 from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationScore, EvaluationTask
 from forms import EvaluationForm, ScoreForm, LoginForm, ChangePasswordForm
-
-# 配置应用
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2w3x4y5z6')
-basedir = os.path.dirname(os.path.abspath(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'performance_evaluation.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# 初始化CSRF保护
-csrf = CSRFProtect(app)
+from score_matrix import build_score_matrix
+from results_engine import set_records_status, remove_records_from_results, rebuild_results
 
 # 添加CSRF错误处理器
-@app.errorhandler(400)
+@views.errorhandler(400)
 def handle_bad_request(e):
     if 'CSRF token is missing' in str(e):
-        app.logger.error('CSRF令牌缺失错误: %s', e)
+        current_app.logger.error('CSRF令牌缺失错误: %s', e)
     elif 'CSRF token not set' in str(e):
-        app.logger.error('CSRF令牌未设置错误: %s', e)
+        current_app.logger.error('CSRF令牌未设置错误: %s', e)
     elif 'CSRF token mismatch' in str(e):
-        app.logger.error('CSRF令牌不匹配错误: %s', e)
+        current_app.logger.error('CSRF令牌不匹配错误: %s', e)
     else:
-        app.logger.error('其他400错误: %s', e)
+        current_app.logger.error('其他400错误: %s', e)
     return e, 400
 
-db.init_app(app)
 import pytz
 from datetime import datetime
 
-@app.template_filter('shanghai_time')
+@views.template_filter('shanghai_time')
 def shanghai_time_filter(dt, format='%Y-%m-%d %H:%M:%S'):
     if dt is None:
         return ""
@@ -112,15 +185,12 @@ def shanghai_time_filter(dt, format='%Y-%m-%d %H:%M:%S'):
     return utc_dt.astimezone(shanghai_tz).strftime(format)
 
 
-# 初始化Flask-Login
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
-
 @login_manager.user_loader
 def load_user(user_id):
-    return Employee.query.get(int(user_id))
+    # 优先使用会话中的身份快照，版本号变化时才查询数据库（见 session_identity.py）
+    return load_identity(user_id)
 
-@app.route('/login', methods=['GET', 'POST'])
+@views.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('index'))
@@ -133,129 +203,19 @@ def login():
         if employee.is_frozen:
             flash('该账户已被冻结，无法登录', 'danger')
             return redirect(url_for('login'))
+        if db.session.is_modified(employee):
+            # check_password 已按当前配置的哈希方法重新哈希了密码；版本号不变，无需清除员工缓存
+            db.session.commit()
         login_user(employee)
+        remember_identity(employee)
         next_page = request.args.get('next')
         return redirect(next_page or url_for('index'))
     return render_template('auth/login.html', form=form)
 
-# 创建数据库表
-from sqlalchemy import inspect
 from sqlalchemy.orm import joinedload
-with app.app_context():
-    db.create_all()
-    # 检查并添加缺失的表和列，使用try-except处理已存在的情况
-    inspector = inspect(db.engine)
-    
-    # 处理evaluation_record表
-    try:
-        columns = inspector.get_columns('evaluation_record')
-    except Exception as e:
-        app.logger.error(f'处理evaluation_record表错误: {str(e)}')
-        column_names = [col['name'] for col in columns]
-        if 'task_id' not in column_names:
-            try:
-                db.engine.execute('ALTER TABLE evaluation_record ADD COLUMN task_id INTEGER')
-                db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-      
-        
-        
-    
-    # 处理evaluation_task表
-    try:
-        task_columns = inspector.get_columns('evaluation_task')
-        task_column_names = [col['name'] for col in task_columns]
-        if 'status' not in task_column_names:
-            db.session.execute(text('ALTER TABLE evaluation_task ADD COLUMN status VARCHAR(20) DEFAULT \'published\' NOT NULL'))
-            db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        app.logger.warning(f'处理evaluation_task表时出错: {str(e)}')
-    
-
-    
-    # 处理evaluation_task表
-    try:
-        task_columns = inspector.get_columns('evaluation_task')
-        task_column_names = [col['name'] for col in task_columns]
-        if 'status' not in task_column_names:
-                db.session.execute(text('ALTER TABLE evaluation_task ADD COLUMN status VARCHAR(20) DEFAULT \'published\' NOT NULL'))
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        app.logger.warning(f'处理evaluation_task表时出错: {str(e)}')
-    
-    # 处理evaluation_dimension表
-    try:
-        columns = inspector.get_columns('evaluation_dimension')
-        column_names = [col['name'] for col in columns]
-        if 'status' not in column_names:
-            db.engine.execute('ALTER TABLE evaluation_dimension ADD COLUMN status VARCHAR(20) DEFAULT "published" NOT NULL')
-            db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.warning(f'处理evaluation_dimension表时出错: {str(e)}')
-    
-    # 已移除处理user表的代码，系统实际使用employee表
-    
-    # 处理employee表
-    try:
-        columns = inspector.get_columns('employee')
-        column_names = [col['name'] for col in columns]
-        
-        # 检查并添加employee_id字段
-        if 'employee_id' not in column_names:
-            db.engine.execute('ALTER TABLE employee ADD COLUMN employee_id VARCHAR(20)')
-            db.engine.execute('UPDATE employee SET employee_id = CAST(id AS VARCHAR)')
-            db.engine.execute('ALTER TABLE employee ALTER COLUMN employee_id SET NOT NULL')
-            db.engine.execute('ALTER TABLE employee ADD CONSTRAINT employee_id_unique UNIQUE (employee_id)')
-            db.session.commit()
-        
-        # 检查并添加password_hash字段
-        if 'password_hash' not in column_names:
-            db.engine.execute('ALTER TABLE employee ADD COLUMN password_hash VARCHAR(128)')
-            db.session.commit()
-        
-        # 检查并添加is_admin字段
-        if 'is_admin' not in column_names:
-            db.engine.execute('ALTER TABLE employee ADD COLUMN is_admin BOOLEAN DEFAULT FALSE')
-            db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.warning(f'处理employee表时出错: {str(e)}')
-    
-    # 设置默认密码'password'给所有没有密码的员工
-    from models import Employee
-    employees_without_password = Employee.query.filter(
-        (Employee.password_hash.is_(None)) | 
-        (Employee.password_hash == '') | 
-        (Employee.password_hash == 'pbkdf2:sha256:150000$abc123$def456')
-    ).all()
-    for employee in employees_without_password:
-        employee.set_password('password')
-        db.session.add(employee)
-    
-    # 确保默认管理员账户存在
-    default_admin = Employee.query.filter_by(employee_id='10000').first()
-    if not default_admin:
-        default_admin = Employee(
-                employee_id='10000',  # 默认管理员ID（字符串类型）
-                name='系统管理员',
-                position='管理员',
-                is_admin=True
-            )
-        db.session.add(default_admin)
-    
-    # 确保默认管理员密码和权限正确
-    default_admin.set_password('password')
-    default_admin.is_admin = True
-    db.session.add(default_admin)
-    
-    db.session.commit()
 
 # 评估者查询自己提交结果的路由
-@app.route('/my_evaluations')
+@views.route('/my_evaluations')
 @login_required
 def my_evaluations():
     # 获取当前用户关联的员工信息
@@ -298,15 +258,15 @@ def my_evaluations():
             task_withdrawal_status[evaluation.task_id]['has_withdrawal_requested'] = True
 
     # 获取所有任务供筛选
-    tasks = EvaluationTask.query.all()
+    tasks = get_tasks()
 
     # 获取所有评估维度
-    dimensions = EvaluationDimension.query.filter_by(status='published').order_by(EvaluationDimension.id).all()
+    dimensions = get_dimensions(status='published')
 
     return render_template('evaluation/my_evaluations.html', evaluations=evaluations, tasks=tasks, selected_task_id=task_id, task_withdrawal_status=task_withdrawal_status, dimensions=dimensions)
 
 
-@app.route('/request_withdrawal/<int:task_id>', methods=['POST'])
+@views.route('/request_withdrawal/<int:task_id>', methods=['POST'])
 @login_required
 def request_withdrawal(task_id):
     # 获取当前用户
@@ -342,8 +302,8 @@ def request_withdrawal(task_id):
     
     # 将所有评估记录状态改为'withdrawal_requested'并记录撤回原因
     for evaluation in evaluations:
-        evaluation.status = 'withdrawal_requested'
         evaluation.withdrawal_reason = reason
+    set_records_status(evaluations, 'withdrawal_requested')
     db.session.commit()
     
     # 通知管理员（实际应用中可能需要发送消息或邮件）
@@ -352,40 +312,52 @@ def request_withdrawal(task_id):
     return redirect(url_for('my_evaluations'))
 
 # 主页路由
-@app.route('/logout')
+@views.route('/logout')
 @login_required
 def logout():
     logout_user()
+    forget_identity()
     return redirect(url_for('login'))
 
-@app.route('/change-password', methods=['GET', 'POST'])
+@views.route('/change-password', methods=['GET', 'POST'])
 @login_required
 def change_password():
     form = ChangePasswordForm()
     if form.validate_on_submit():
-        if not current_user.check_password(form.old_password.data):
+        employee = db.session.get(Employee, current_user.id)
+        if not employee.check_password(form.old_password.data):
             flash('旧密码不正确', 'danger')
             return redirect(url_for('change_password'))
-        current_user.set_password(form.new_password.data)
+        employee.set_password(form.new_password.data)
         db.session.commit()
+        invalidate_employees()
+        # 更新本会话的身份快照，其他已登录的会话需重新登录
+        remember_identity(employee)
         flash('密码已成功更新', 'success')
         return redirect(url_for('index'))
     return render_template('auth/change_password.html', form=form)
 
-@app.route('/')
+@views.route('/')
 @login_required
 def index():
     return render_template('index.html')
 
 # 管理页面路由
-@app.route('/admin')
+@views.route('/admin')
 @login_required
 @readonly_admin_required
 def admin_dashboard():
     return render_template('admin/dashboard.html')
 
+# 参考数据缓存的命中统计（当前工作进程）
+@views.route('/admin/lookup-cache/stats')
+@login_required
+@admin_required
+def admin_lookup_cache_stats():
+    return jsonify(lookup_cache_stats())
+
 # 评估打分页面路由
-@app.route('/evaluate', methods=['GET', 'POST'])
+@views.route('/evaluate', methods=['GET', 'POST'])
 @login_required
 def evaluate_page():
     # 管理员不能参与评估打分
@@ -405,21 +377,16 @@ def evaluate_page():
     evaluator_id = current_user.id  # 使用当前登录用户ID
 
     # 默认加载所有已发布的评估任务
-    tasks = EvaluationTask.query.filter_by(status='published').all()
+    tasks = get_tasks(status='published')
     selected_task = None
     if request.method == 'POST':
         if 'load_evaluatees' in request.form:
             # 获取除自己之外、管理员、被冻结的员工以及ID小于10001的员工
-            evaluatees = Employee.query.filter(
-    Employee.id != evaluator_id,
-    Employee.employee_id != '10000',
-    Employee.role == '员工',
-    Employee.is_frozen == False
-).all()
+            evaluatees = [e for e in get_employees(roles=('员工',), include_frozen=False) if e.id != evaluator_id]
         # 处理任务选择
         task_id = request.form.get('task_id')
         if task_id:
-            selected_task = EvaluationTask.query.get(task_id)
+            selected_task = get_task(task_id)
 
     # 查询当前用户的评估记录状态
     evaluations = EvaluationRecord.query.filter(
@@ -446,7 +413,7 @@ def evaluate_page():
     return render_template('evaluation/evaluate.html', form=form, current_evaluator=current_evaluator, evaluatees=evaluatees, tasks=tasks, selected_task=selected_task, task_evaluation_status=task_evaluation_status)
 
 # 获取评估表单
-@app.route('/get_evaluation_form/<int:evaluatee_id>')
+@views.route('/get_evaluation_form/<int:evaluatee_id>')
 def get_evaluation_form(evaluatee_id):
     # 不能对管理员进行评估
     evaluatee = Employee.query.get_or_404(evaluatee_id)
@@ -489,11 +456,11 @@ def get_evaluation_form(evaluatee_id):
         if dimension.id is not None:
             score_form.scores.append_entry(data={'dimension_id': dimension.id})
         else:
-              app.logger.warning(f'跳过ID为None的无效维度: {dimension.name}')
+              current_app.logger.warning(f'跳过ID为None的无效维度: {dimension.name}')
     return render_template('evaluation/evaluation_form.html', form=score_form, dimensions=dimensions, evaluatee=evaluatee)
 
 # 提交评估
-@app.route('/submit_evaluation', methods=['POST'])
+@views.route('/submit_evaluation', methods=['POST'])
 @login_required
 def submit_evaluation():
     # 管理员不能参与评估打分
@@ -578,60 +545,26 @@ def submit_evaluation():
         flash('你已提交该任务的评估，若需修改请通知管理员退回。', 'warning')
         return redirect(url_for('evaluate_page', evaluator_id=evaluator_id))
     
-    # 查找或创建评估记录
-    record = EvaluationRecord.query.filter_by(
-        evaluator_id=evaluator_id,
-        evaluatee_id=evaluatee_id,
-        task_id=task_id
-    ).options(joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)).first()
-    
-    # Find existing score for this record and dimension
-    existing_score = EvaluationScore.query.filter_by(
-    evaluation_record_id=record.id if record else None,
-    dimension_id=dimension_id
-    ).first()
-
-    if not record:
-        record = EvaluationRecord(
-                    evaluator_id=evaluator_id,
-                    evaluatee_id=evaluatee_id,
-                    task_id=task_id,
-                    status='submitted',
-                    submitted_at=datetime.now(pytz.timezone('Asia/Shanghai'))
-                )
-        db.session.add(record)
+    # 查找或创建评估记录（每个评估者-被评估者-任务组合唯一）
+    record = EvaluationRecord.get_or_create(evaluator_id, evaluatee_id, task_id)
 
     # 更新分数
     for dimension_id, score in scores.items():
-        score_record = EvaluationScore.query.filter_by(
-                evaluation_record_id=record.id,
-                dimension_id=dimension_id
-            ).first()
-
-        if score_record:
-            score_record.score = score
-        else:
-            score_record = EvaluationScore(
-                record_id=record.id,
-                dimension_id=dimension_id,
-                score=score
-            )
-            db.session.add(score_record)
+        EvaluationScore.set_score(record.id, dimension_id, score)
 
     # 更新状态
     if action == 'submit':
-        record.status = 'submitted'
         record.submitted_at = datetime.utcnow()
-        flash('评估已提交成功', 'success')
     else:
-        record.status = 'submitted'
         record.task_id = task_id
-        flash('评估已提交成功', 'success')
+    set_records_status([record], 'submitted')
+    EvaluationRecord.refresh_cached_totals(EvaluationRecord.id == record.id)
+    flash('评估已提交成功', 'success')
 
     db.session.commit()
     return redirect(url_for('evaluate_page', evaluator_id=evaluator_id))
 
-@app.route('/submit_batch_evaluation', methods=['POST'])
+@views.route('/submit_batch_evaluation', methods=['POST'])
 def submit_batch_evaluation():
     # 初始化评分数据字典，确保在所有代码路径中都已定义
     scores_data = {}
@@ -701,12 +634,11 @@ def submit_batch_evaluation():
         return redirect(url_for('batch_evaluate', evaluator_id=evaluator_id, task_id=task_id))
 
     # 检查是否已提交该任务的评估
-    existing_submissions = EvaluationRecord.query.filter_by(
+    submitted_evaluatee_ids = {row.evaluatee_id for row in db.session.query(EvaluationRecord.evaluatee_id).filter_by(
         evaluator_id=evaluator_id,
         task_id=task_id,
         status='submitted'
-    ).options(joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)).all()
-    submitted_evaluatee_ids = [es.evaluatee_id for es in existing_submissions]
+    )}
 
     # 检查是否有重复提交的被评估者
     duplicate_evaluatees = [eid for eid in scores_data.keys() if eid in submitted_evaluatee_ids]
@@ -730,46 +662,29 @@ def submit_batch_evaluation():
             flash('没有要提交的评分数据', 'warning')
             return redirect(url_for('batch_evaluate', evaluator_id=evaluator_id, task_id=task_id))
         
-        for evaluatee_id, dimensions in scores_data.items():
-            # 获取或创建评估记录
-            record = EvaluationRecord.query.filter_by(
-                evaluator_id=evaluator_id,
-                evaluatee_id=evaluatee_id,
-                task_id=task_id
-            ).first()
-            if not record:
-                record = EvaluationRecord(
-                    evaluator_id=evaluator_id,
-                    evaluatee_id=evaluatee_id,
-                    task_id=task_id,
-                    status='draft'
-                )
-                db.session.add(record)
-            
-            # 更新评分
-            for dimension_id, score_value in dimensions.items():
-                dimension = EvaluationDimension.query.get(dimension_id)
-                if dimension:
-                    score_record = EvaluationScore.query.filter_by(
-                        evaluation_record_id=record.id,
-                        dimension_id=dimension_id
-                    ).first()
-                    if not score_record:
-                        score_record = EvaluationScore(
-                            evaluation_record_id=record.id,
-                            dimension_id=dimension_id,
-                            score=score_value
-                        )
-                        db.session.add(score_record)
-                    else:
-                        score_record.score = score_value
-
-            # 更新当前评估记录状态
-            record.status = 'submitted'
+        # 一次取出该评估者在本任务中的全部记录，缺失的批量创建
+        records = EvaluationRecord.get_or_create_many(evaluator_id, task_id, list(scores_data))
+
+        # 只保留有效维度的评分，批量写入
+        valid_dimension_ids = {row.id for row in db.session.query(EvaluationDimension.id)}
+        EvaluationScore.set_scores({
+            (records[evaluatee_id].id, dimension_id): score_value
+            for evaluatee_id, dimensions in scores_data.items()
+            for dimension_id, score_value in dimensions.items()
+            if dimension_id in valid_dimension_ids
+        })
+
+        # 更新评估记录的提交时间
+        now = datetime.utcnow()
+        submitted_records = list(records.values())
+        for record in submitted_records:
             if action == 'submit':
-                record.submitted_at = datetime.utcnow()
-            record.updated_at = datetime.utcnow()
+                record.submitted_at = now
+            record.updated_at = now
 
+        # 状态统一改为已提交，并把评分计入物化结果表
+        set_records_status(submitted_records, 'submitted')
+        EvaluationRecord.refresh_cached_totals(EvaluationRecord.id.in_([r.id for r in submitted_records]))
         db.session.commit()
         flash('批量评估提交成功！', 'success')
         return redirect(url_for('batch_evaluate', evaluator_id=evaluator_id))
@@ -782,7 +697,7 @@ def submit_batch_evaluation():
     return redirect(url_for('batch_evaluate', evaluator_id=evaluator_id, task_id=task_id))
 
 # 评估任务管理路由
-@app.route('/admin/tasks')
+@views.route('/admin/tasks')
 @login_required
 @readonly_admin_required
 def admin_task_list():
@@ -790,7 +705,7 @@ def admin_task_list():
     tasks = EvaluationTask.query.all()
     return render_template('admin/task_list.html', tasks=tasks)
 
-@app.route('/admin/tasks/add', methods=['GET', 'POST'])
+@views.route('/admin/tasks/add', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_add_task():
@@ -818,16 +733,18 @@ def admin_add_task():
         )
         db.session.add(task)
         db.session.commit()
+        invalidate_tasks()
         flash('任务发布成功', 'success')
         return redirect(url_for('admin_task_list'))
     return render_template('admin/task_form.html', form=form, employees=employees)
 
-@app.route('/admin/tasks/clear/<int:task_id>')
+@views.route('/admin/tasks/clear/<int:task_id>')
 @admin_required
 def admin_clear_task_data(task_id):
-    from models import db, EvaluationRecord
-    from sqlalchemy import func, EvaluationScore
+    from models import db, EvaluationRecord, EvaluationScore, EvaluationResult
     try:
+        # 清除该任务的物化结果
+        EvaluationResult.query.filter_by(task_id=task_id).delete(synchronize_session=False)
         # 先删除关联的评分记录
         EvaluationScore.query.filter(EvaluationScore.evaluation_record_id.in_(
             db.session.query(EvaluationRecord.id).filter_by(task_id=task_id)
@@ -841,7 +758,7 @@ def admin_clear_task_data(task_id):
         flash(f'清除失败: {str(e)}', 'danger')
     return redirect(url_for('admin_task_list'))
 
-@app.route('/admin/tasks/delete/<int:id>')
+@views.route('/admin/tasks/delete/<int:id>')
 @login_required
 @admin_required
 def admin_delete_task(id):
@@ -850,6 +767,7 @@ def admin_delete_task(id):
     try:
         db.session.delete(task)
         db.session.commit()
+        invalidate_tasks()
         flash('评估任务及其所有相关记录已成功删除', 'success')
     except Exception as e:
         db.session.rollback()
@@ -857,7 +775,7 @@ def admin_delete_task(id):
     return redirect(url_for('admin_task_list'))
 
 # 维度默认值路由
-@app.route('/get_dimension_defaults')
+@views.route('/get_dimension_defaults')
 @login_required
 def get_dimension_defaults():
     from models import DimensionDefaultScore
@@ -874,7 +792,7 @@ def get_dimension_defaults():
         return jsonify({}), 500
 
 
-@app.route('/save_dimension_defaults', methods=['POST'])
+@views.route('/save_dimension_defaults', methods=['POST'])
 @login_required
 def save_dimension_defaults():
     from models import db, DimensionDefaultScore, EvaluationDimension
@@ -924,7 +842,7 @@ def save_dimension_defaults():
         return jsonify({'success': False, 'message': f'保存失败: {str(e)}'}), 500
 
 # 员工管理路由
-@app.route('/admin/employees/reset-password/<string:employee_id>', methods=['GET', 'POST'])
+@views.route('/admin/employees/reset-password/<string:employee_id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_employee_reset_password(employee_id):
@@ -955,8 +873,9 @@ def admin_employee_reset_password(employee_id):
                 if form.password.data:
                     logger.debug(f'密码长度: {len(form.password.data)}')
                     # 直接设置密码
-                    employee.password_hash = generate_password_hash(form.password.data)
+                    employee.set_password(form.password.data)
                     db.session.commit()
+                    invalidate_employees()
                     logger.debug('密码重置成功，已提交数据库')
                     flash('员工密码重置成功', 'success')
                     return redirect(url_for('admin_employee_list'))
@@ -974,7 +893,7 @@ def admin_employee_reset_password(employee_id):
                     flash(f'{getattr(form, field).label.text}：{error}', 'danger')
     return render_template('admin/employee_form.html', form=form, employee=employee, reset_password=True)
 
-@app.route('/admin/employees')
+@views.route('/admin/employees')
 @login_required
 @readonly_admin_required
 def admin_employee_list():
@@ -985,7 +904,7 @@ def admin_employee_list():
     from forms import EmployeeForm
     return render_template('admin/employee_list.html', employees=employees, form=EmployeeForm())
 
-@app.route('/admin/employees/add', methods=['GET', 'POST'])
+@views.route('/admin/employees/add', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_employee_add():
@@ -1004,6 +923,7 @@ def admin_employee_add():
         db.session.add(employee)
         try:
             db.session.commit()
+            invalidate_employees()
             flash('员工信息添加成功', 'success')
             return redirect(url_for('admin_employee_list'))
         except Exception as e:
@@ -1011,7 +931,7 @@ def admin_employee_add():
             flash(f'添加失败: {str(e)}', 'danger')
     return render_template('admin/employee_form.html', form=form)
 
-@app.route('/admin/employees/edit/<string:employee_id>', methods=['GET', 'POST'])
+@views.route('/admin/employees/edit/<string:employee_id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_employee_edit(employee_id):
@@ -1022,13 +942,19 @@ def admin_employee_edit(employee_id):
     if form.validate_on_submit():
             try:
                 # 更新字段
+                role_changed = employee.role != form.role.data
                 employee.position = form.position.data
                 employee.role = form.role.data
                 employee.position_coefficient = form.position_coefficient.data
                 # 如果密码不为空，则更新密码
                 if form.password.data:
                     employee.set_password(form.password.data)
+                # 评估者角色变化会改变其评分所属的角色分组，需重建物化结果
+                if role_changed:
+                    db.session.flush()
+                    rebuild_results()
                 db.session.commit()
+                invalidate_employees()
                 flash('员工信息更新成功', 'success')
                 # 始终返回员工列表页面
                 return redirect(url_for('admin_employee_list'))
@@ -1043,7 +969,7 @@ def admin_employee_edit(employee_id):
                     flash(f'{getattr(form, field).label.text}：{error}', 'danger')
     return render_template('admin/employee_form.html', form=form, employee=employee)
 
-@app.route('/admin/employees/toggle-frozen/<string:employee_id>')
+@views.route('/admin/employees/toggle-frozen/<string:employee_id>')
 @login_required
 @admin_required
 def admin_employee_toggle_frozen(employee_id):
@@ -1052,6 +978,7 @@ def admin_employee_toggle_frozen(employee_id):
     try:
         employee.is_frozen = not employee.is_frozen
         db.session.commit()
+        invalidate_employees()
         if employee.is_frozen:
             flash(f'员工 {employee.name} 已成功冻结', 'success')
         else:
@@ -1061,7 +988,7 @@ def admin_employee_toggle_frozen(employee_id):
         flash(f'操作失败: {str(e)}', 'danger')
     return redirect(url_for('admin_employee_list'))
 
-@app.route('/admin/employees/delete/<int:id>')
+@views.route('/admin/employees/delete/<int:id>')
 @login_required
 @admin_required
 def admin_employee_delete(id):
@@ -1073,7 +1000,10 @@ def admin_employee_delete(id):
             (EvaluationRecord.evaluator_id == id) | (EvaluationRecord.evaluatee_id == id)
         ).delete()
         db.session.delete(employee)
+        db.session.flush()
+        rebuild_results()
         db.session.commit()
+        invalidate_employees()
         flash('员工信息已删除', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1081,7 +1011,7 @@ def admin_employee_delete(id):
     return redirect(url_for('admin_employee_list'))
 
 # 评估维度管理路由
-@app.route('/admin/dimensions')
+@views.route('/admin/dimensions')
 @login_required
 @readonly_admin_required
 def admin_dimension_list():
@@ -1091,7 +1021,7 @@ def admin_dimension_list():
     total_weight = sum(d.weight for d in dimensions)
     return render_template('admin/dimension_list.html', dimensions=dimensions, total_weight=total_weight)
 
-@app.route('/admin/dimensions/add', methods=['GET', 'POST'])
+@views.route('/admin/dimensions/add', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_dimension_add():
@@ -1115,12 +1045,13 @@ def admin_dimension_add():
         )
         db.session.add(dimension)
         db.session.commit()
+        invalidate_dimensions()
         flash('评估维度添加成功', 'success')
         return redirect(url_for('admin_dimension_list'))
 
     return render_template('admin/dimension_form.html', form=form, total_weight=total_weight)
 
-@app.route('/admin/dimensions/edit/<int:id>', methods=['GET', 'POST'])
+@views.route('/admin/dimensions/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_dimension_edit(id):
@@ -1138,103 +1069,66 @@ def admin_dimension_edit(id):
             flash('修改后总权重超过100%，请调整权重值', 'danger')
             return render_template('admin/dimension_form.html', form=form, dimension=dimension, total_weight=total_weight)
 
+        weight_changed = dimension.weight != float(form.weight.data)
         dimension.name = form.name.data
         dimension.weight = form.weight.data
+        if weight_changed:
+            # 权重变化后批量重算使用该维度的评估记录的持久化总分
+            db.session.flush()
+            EvaluationRecord.refresh_cached_totals(EvaluationRecord.id.in_(
+                db.session.query(EvaluationScore.evaluation_record_id).filter_by(dimension_id=id)
+            ))
         db.session.commit()
+        invalidate_dimensions()
         flash('评估维度更新成功', 'success')
         return redirect(url_for('admin_dimension_list'))
 
     return render_template('admin/dimension_form.html', form=form, dimension=dimension, total_weight=total_weight)
 
-@app.route('/admin/dimensions/delete/<int:id>')
+@views.route('/admin/dimensions/delete/<int:id>')
 @login_required
 @admin_required
 def admin_dimension_delete(id):
     from models import db, EvaluationDimension, EvaluationScore
     dimension = EvaluationDimension.query.get_or_404(id)
     try:
+        affected_record_ids = [row.evaluation_record_id for row in
+                               db.session.query(EvaluationScore.evaluation_record_id).filter_by(dimension_id=id).distinct()]
         # 删除相关的评分记录
         EvaluationScore.query.filter_by(dimension_id=id).delete()
         db.session.delete(dimension)
+        db.session.flush()
+        rebuild_results()
+        if affected_record_ids:
+            EvaluationRecord.refresh_cached_totals(EvaluationRecord.id.in_(affected_record_ids))
         db.session.commit()
+        invalidate_dimensions()
         flash('评估维度已删除', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'删除失败: {str(e)}', 'danger')
     return redirect(url_for('admin_dimension_list'))
 
-def generate_evaluation_summary(evaluations, evaluators, evaluatees):
-    """生成评估汇总统计数据的公共函数
-    Args:
-        evaluations: 评估记录列表
-        evaluators: 评估者列表
-        evaluatees: 被评估者列表
-    Returns:
-        summary_data: 评估矩阵数据
-        averages: 被评估者平均分
-    """
-    summary_data = {}
-    averages = {}
-    evaluatee_scores = {}
-
-    # 初始化数据结构
-    for evaluatee in evaluatees:
-        summary_data[evaluatee.id] = {}
-        averages[evaluatee.id] = 0
-        for evaluator in evaluators:
-            summary_data[evaluatee.id][evaluator.id] = '-'  # 默认值
-
-    # 填充数据
-    for eval_rec in evaluations:
-        # 检查被评估者ID是否有效
-        if eval_rec.evaluatee_id not in summary_data:
-            current_app.logger.warning(f"无效的被评估者ID: {eval_rec.evaluatee_id}，评估记录ID: {eval_rec.id}")
-            continue
-        
-        if eval_rec.evaluatee_id not in evaluatee_scores:
-            evaluatee_scores[eval_rec.evaluatee_id] = []
-        evaluatee_scores[eval_rec.evaluatee_id].append(eval_rec.total_score)
-        
-        # 检查评估者ID是否有效
-        if eval_rec.evaluator_id in summary_data[eval_rec.evaluatee_id]:
-            summary_data[eval_rec.evaluatee_id][eval_rec.evaluator_id] = eval_rec.total_score
-        else:
-            current_app.logger.warning(f"无效的评估者ID: {eval_rec.evaluator_id}，评估记录ID: {eval_rec.id}")
-
-    # 如果没有有效的评分数据，返回空字典
-    if not evaluatee_scores:
-        return {}, {}
-
-    # 计算平均分
-    for evaluatee_id, scores in evaluatee_scores.items():
-        if scores:
-            averages[evaluatee_id] = sum(scores) / len(scores)
-
-    return summary_data, averages
-
 # 评估查询路由
-@app.route('/admin/evaluations')
+@views.route('/admin/evaluations')
 @login_required
 @readonly_admin_required
 def admin_evaluation_query():
     from models import Employee, EvaluationRecord, EvaluationTask
-    from openpyxl.styles import Font
-    from openpyxl.styles import Font
     from forms import EvaluationSearchForm
     evaluatee_id = request.args.get('evaluatee_id')
     task_id = request.args.get('task_id')
     evaluator_id = request.args.get('evaluator_id')
 
     # 获取所有员工和任务用于筛选
-    employees = Employee.query.filter(Employee.employee_id != '10000').all()
-    tasks = EvaluationTask.query.filter_by(status='published').all()
+    employees = get_employees()
+    tasks = get_tasks(status='published')
 
     # 构建查询，预加载关联数据
     # 查询所有已提交的评估记录
     from sqlalchemy.orm import joinedload
-    from sqlalchemy import func, and_
     # 排除管理员相关的评估记录
-    admin_employee = Employee.query.filter_by(employee_id='10000').first()
+    admin_employee = get_admin_employee()
     query = EvaluationRecord.query.filter_by(status='submitted').options(joinedload(EvaluationRecord.task), joinedload(EvaluationRecord.evaluator))
     if admin_employee:
         query = query.filter(
@@ -1243,12 +1137,12 @@ def admin_evaluation_query():
         )
     # 包含所有评估对象（排除管理员）
     # 排除角色非'员工'的评估者
-    non_valid_evaluators = Employee.query.filter(Employee.role != '员工').all()
+    non_valid_evaluators = get_employees(exclude_roles=('员工',), include_admin=True)
     non_valid_evaluator_ids = [emp.id for emp in non_valid_evaluators]
     if non_valid_evaluator_ids:
         query = query.filter(~EvaluationRecord.evaluator_id.in_(non_valid_evaluator_ids))
     # 排除角色非'员工'的被评估者
-    non_valid_evaluatees = Employee.query.filter(Employee.role != '员工').all()
+    non_valid_evaluatees = get_employees(exclude_roles=('员工',), include_admin=True)
     non_valid_evaluatee_ids = [emp.id for emp in non_valid_evaluatees]
     if non_valid_evaluatee_ids:
         query = query.filter(~EvaluationRecord.evaluatee_id.in_(non_valid_evaluatee_ids))
@@ -1256,33 +1150,14 @@ def admin_evaluation_query():
     if task_id:
         query = query.filter_by(task_id=task_id)
     
-    # 添加去重逻辑：每个评估者-被评估者-任务组合只保留最新记录
-    subquery = query.with_entities(
-        EvaluationRecord.evaluator_id,
-        EvaluationRecord.evaluatee_id,
-        EvaluationRecord.task_id,
-        func.max(EvaluationRecord.id).label('max_id')
-    ).group_by(
-        EvaluationRecord.evaluator_id,
-        EvaluationRecord.evaluatee_id,
-        EvaluationRecord.task_id
-    ).subquery()
-    
-    query = query.join(
-        subquery,
-        and_(
-            EvaluationRecord.evaluator_id == subquery.c.evaluator_id,
-            EvaluationRecord.evaluatee_id == subquery.c.evaluatee_id,
-            EvaluationRecord.task_id == subquery.c.task_id,
-            EvaluationRecord.id == subquery.c.max_id
-        )
-    )
-    
+    # 每个评估者-被评估者-任务组合由唯一约束保证只有一条记录，无需再按最新记录去重
+
+    # 总分由数据库计算后随记录一并加载，无需加载评分和维度对象
     query = query.options(
         joinedload(EvaluationRecord.task),
         joinedload(EvaluationRecord.evaluator),
         joinedload(EvaluationRecord.evaluatee),
-        joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)
+        with_expression(EvaluationRecord.queried_total_score, EvaluationRecord.total_score_source())
     )
     if evaluatee_id:
         query = query.filter_by(evaluatee_id=evaluatee_id)
@@ -1297,39 +1172,14 @@ def admin_evaluation_query():
     flash(f'找到 {len(evaluations)} 条已提交的评估记录', 'info')
 
     # 获取评估者和被评估者列表（排除管理员和employee_id >= '2'的人员）
-    evaluators = Employee.query.filter(Employee.employee_id != '10000', Employee.role == '员工').all()
-    evaluatees = Employee.query.filter(Employee.employee_id != '10000', Employee.role == '员工').all()
+    evaluators = get_employees(roles=('员工',))
+    evaluatees = get_employees(roles=('员工',))
     
-    # 生成汇总统计数据
+    # 按任务生成 被评估者 × 评估者 的评分矩阵
     from itertools import groupby
     task_summaries = {}
-    # 按任务分组评估记录
     for task_id, task_evaluations in groupby(evaluations, key=lambda x: x.task_id):
-        task_evaluations = list(task_evaluations)
-        # 初始化该任务的汇总数据
-        summary_data = {e.id: {} for e in evaluatees}
-        averages = {e.id: 0 for e in evaluatees}
-        
-        # 填充评分数据
-        for evaluation in task_evaluations:
-            # 排除管理员和employee_id >= '2'的人员已在查询中处理
-            if evaluation.evaluator_id in [e.id for e in evaluators] and evaluation.evaluatee_id in [e.id for e in evaluatees]:
-
-                summary_data[evaluation.evaluatee_id][evaluation.evaluator_id] = round(evaluation.total_score, 2)
-        
-        # 计算平均分
-        for evaluatee_id in summary_data:
-            scores = list(summary_data[evaluatee_id].values())
-            if scores:
-                averages[evaluatee_id] = round(sum(scores) / len(scores), 2)
-            else:
-                averages[evaluatee_id] = 0
-        
-        # 保存该任务的汇总数据
-        task_summaries[task_id] = {
-            'summary_data': summary_data,
-            'averages': averages
-        }
+        task_summaries[task_id] = build_score_matrix(list(task_evaluations), evaluators, evaluatees)
 
     return render_template(
         'admin/evaluation_query.html', 
@@ -1344,27 +1194,25 @@ def admin_evaluation_query():
 
 
 # 领导评估统计功能
-@app.route('/admin/leader_evaluation_stats')
+@views.route('/admin/leader_evaluation_stats')
 @login_required
 @admin_required
 def admin_leader_evaluation_stats():
     from models import Employee, EvaluationRecord, EvaluationTask
-    from openpyxl.styles import Font
     from forms import EvaluationSearchForm
     evaluatee_id = request.args.get('evaluatee_id')
     task_id = request.args.get('task_id')
     evaluator_id = request.args.get('evaluator_id')
 
     # 获取所有员工和任务用于筛选
-    employees = Employee.query.filter(Employee.employee_id != '10000').all()
-    tasks = EvaluationTask.query.filter_by(status='published').all()
+    employees = get_employees()
+    tasks = get_tasks(status='published')
 
     # 构建查询，预加载关联数据
     # 查询所有已提交的评估记录
     from sqlalchemy.orm import joinedload
-    from sqlalchemy import func, and_
     # 排除管理员相关的评估记录
-    admin_employee = Employee.query.filter_by(employee_id='10000').first()
+    admin_employee = get_admin_employee()
     query = EvaluationRecord.query.filter_by(status='submitted').options(joinedload(EvaluationRecord.task), joinedload(EvaluationRecord.evaluator))
     if admin_employee:
         query = query.filter(
@@ -1372,40 +1220,21 @@ def admin_leader_evaluation_stats():
             ~EvaluationRecord.evaluatee_id.in_([admin_employee.id])
         )
     # 只包含角色非'员工'的评估者提交的记录
-    valid_evaluators = Employee.query.filter(Employee.role != '员工').all()
+    valid_evaluators = get_employees(exclude_roles=('员工',), include_admin=True)
     valid_evaluator_ids = [emp.id for emp in valid_evaluators]
     if valid_evaluator_ids:
         query = query.filter(EvaluationRecord.evaluator_id.in_(valid_evaluator_ids))
     if task_id:
         query = query.filter_by(task_id=task_id)
     
-    # 添加去重逻辑：每个评估者-被评估者-任务组合只保留最新记录
-    subquery = query.with_entities(
-        EvaluationRecord.evaluator_id,
-        EvaluationRecord.evaluatee_id,
-        EvaluationRecord.task_id,
-        func.max(EvaluationRecord.id).label('max_id')
-    ).group_by(
-        EvaluationRecord.evaluator_id,
-        EvaluationRecord.evaluatee_id,
-        EvaluationRecord.task_id
-    ).subquery()
-    
-    query = query.join(
-        subquery,
-        and_(
-            EvaluationRecord.evaluator_id == subquery.c.evaluator_id,
-            EvaluationRecord.evaluatee_id == subquery.c.evaluatee_id,
-            EvaluationRecord.task_id == subquery.c.task_id,
-            EvaluationRecord.id == subquery.c.max_id
-        )
-    )
-    
+    # 每个评估者-被评估者-任务组合由唯一约束保证只有一条记录，无需再按最新记录去重
+
+    # 总分由数据库计算后随记录一并加载，无需加载评分和维度对象
     query = query.options(
         joinedload(EvaluationRecord.task),
         joinedload(EvaluationRecord.evaluator),
         joinedload(EvaluationRecord.evaluatee),
-        joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)
+        with_expression(EvaluationRecord.queried_total_score, EvaluationRecord.total_score_source())
     )
     if evaluatee_id:
         query = query.filter_by(evaluatee_id=evaluatee_id)
@@ -1421,27 +1250,15 @@ def admin_leader_evaluation_stats():
 
     # 获取评估者和被评估者列表
     # 只包含角色非'员工'的评估者
-    evaluators = Employee.query.filter(Employee.employee_id != '10000', Employee.role != '员工').all()
-    evaluatees = Employee.query.filter(Employee.employee_id != '10000', Employee.role == '员工').all()
+    evaluators = get_employees(exclude_roles=('员工',))
+    evaluatees = get_employees(roles=('员工',))
 
-    # 生成任务汇总数据
-    from collections import defaultdict
+    # 按任务生成 被评估者 × 评估者 的评分矩阵
     from itertools import groupby
-    # 假设generate_evaluation_summary函数在当前作用域可用
-    task_summaries = defaultdict(dict)
-    # 按任务分组评估记录
+    task_summaries = {}
     for task_id, task_evaluations in groupby(evaluations, key=lambda x: x.task_id):
-        task_evaluations_list = list(task_evaluations)
-        # 调用公共汇总函数生成统计数据
-        summary_data, averages = generate_evaluation_summary(task_evaluations_list, evaluators, evaluatees)
-        # 保存汇总数据
-        task_summaries[task_id] = {
-            'summary_data': summary_data,
-            'averages': averages
-        }
-
-    # 评估者和被评估者列表已在上方定义
-    
+        task_summaries[task_id] = build_score_matrix(list(task_evaluations), evaluators, evaluatees)
+
     return render_template(
         'admin/leader_evaluation_stats.html', 
         evaluations=evaluations, 
@@ -1454,12 +1271,14 @@ def admin_leader_evaluation_stats():
 
 
 # 导出领导评估汇总表
-@app.route('/admin/leader_evaluations/export')
+@views.route('/admin/leader_evaluations/export')
 @login_required
 @admin_required
 def export_leader_evaluation_summary():
     from flask import send_file
     from models import Employee, EvaluationRecord, EvaluationTask
+    # Excel相关库只在导出时加载，避免拖慢应用启动
+    import pandas as pd
     from openpyxl.styles import Font
     from openpyxl.utils import get_column_letter
     from datetime import datetime
@@ -1469,18 +1288,24 @@ def export_leader_evaluation_summary():
     if task_id:
         query = query.filter_by(task_id=task_id)
     # 排除管理员相关的评估记录
-    admin_employee = Employee.query.filter_by(employee_id='10000').first()
+    admin_employee = get_admin_employee()
     if admin_employee:
         query = query.filter(
             ~EvaluationRecord.evaluator_id.in_([admin_employee.id]) &
             ~EvaluationRecord.evaluatee_id.in_([admin_employee.id])
         )
     # 只包含employee_id >= '2'的评估者
-    valid_evaluators = Employee.query.filter(Employee.role != '员工').all()
+    valid_evaluators = get_employees(exclude_roles=('员工',), include_admin=True)
     valid_evaluator_ids = [emp.id for emp in valid_evaluators]
     if valid_evaluator_ids:
         query = query.filter(EvaluationRecord.evaluator_id.in_(valid_evaluator_ids))
-    all_evaluations = query.options(joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)).all()
+    # 只取汇总所需的字段，总分由数据库直接计算
+    all_evaluations = query.with_entities(
+        EvaluationRecord.id,
+        EvaluationRecord.evaluator_id,
+        EvaluationRecord.evaluatee_id,
+        EvaluationRecord.total_score_source().label('total_score')
+    ).all()
     
     # 获取任务名称用于文件名
     task = None
@@ -1489,22 +1314,19 @@ def export_leader_evaluation_summary():
         task = EvaluationTask.query.get(task_id)
         if task:
             task_name = task.name.replace(" ", "_")
-    evaluators = Employee.query.filter(Employee.employee_id != '10000', Employee.role != '员工').all()
-    evaluatees = Employee.query.filter(Employee.employee_id != '10000', Employee.role == '员工').all()
+    evaluators = get_employees(exclude_roles=('员工',))
+    evaluatees = get_employees(roles=('员工',))
 
-    # 调用公共汇总函数生成统计数据
-    summary_data, averages = generate_evaluation_summary(all_evaluations, evaluators, evaluatees)
-
-    # 计算平均分（保留两位小数用于导出）
-    averages = {eid: round(score, 2) for eid, score in averages.items()}
+    # 生成评分矩阵，与页面预览使用相同的结构
+    matrix = build_score_matrix(all_evaluations, evaluators, evaluatees)
 
     # 创建Excel文件
     df_data = []
-    for evaluatee in evaluatees:
+    for evaluatee, scores, average in matrix.rows():
         row = {'评估对象': evaluatee.name}
-        for evaluator in evaluators:
-            row[evaluator.name] = summary_data[evaluatee.id][evaluator.id]
-        row['平均分'] = averages.get(evaluatee.id, '-')
+        for evaluator, score in zip(evaluators, scores):
+            row[evaluator.name] = score
+        row['平均分'] = average
         df_data.append(row)
 
     df = pd.DataFrame(df_data)
@@ -1547,85 +1369,18 @@ def export_leader_evaluation_summary():
 
 
 # 导出评估汇总表
-@app.route('/admin/evaluations/export')
+@views.route('/admin/evaluations/export')
 @login_required
 @admin_required
 def export_evaluation_summary():
-    from models import Employee, EvaluationRecord, EvaluationTask
-    from openpyxl.styles import Font
-    # 获取所有已提交的评估
-    task_id = request.args.get('task_id', type=int)
-    query = EvaluationRecord.query.filter_by(status='submitted')
-    if task_id:
-        query = query.filter_by(task_id=task_id)
-    # 排除管理员相关的评估记录
-    admin_employee = Employee.query.filter_by(employee_id='10000').first()
-    if admin_employee:
-        query = query.filter(
-            ~EvaluationRecord.evaluator_id.in_([admin_employee.id]) &
-            ~EvaluationRecord.evaluatee_id.in_([admin_employee.id])
-        )
-    # 排除employee_id >= '2'的评估者
-    non_valid_evaluators = Employee.query.filter(Employee.role != '员工').all()
-    non_valid_evaluator_ids = [emp.id for emp in non_valid_evaluators]
-    if non_valid_evaluator_ids:
-        query = query.filter(~EvaluationRecord.evaluator_id.in_(non_valid_evaluator_ids))
-    all_evaluations = query.options(joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)).all()
-    
-    # 获取任务名称用于文件名
-    task = None
-    task_name = "all_tasks"
-    if task_id:
-        task = EvaluationTask.query.get(task_id)
-        if task:
-            task_name = task.name.replace(" ", "_")
-    evaluators = Employee.query.filter(Employee.employee_id != '10000', Employee.role == '员工').all()
-    evaluatees = Employee.query.filter(Employee.employee_id != '10000', Employee.role == '员工').all()
-
-    # 调用公共汇总函数生成统计数据
-    summary_data, averages = generate_evaluation_summary(all_evaluations, evaluators, evaluatees)
-
-    # 计算平均分（保留两位小数用于导出）
-    averages = {eid: round(score, 2) for eid, score in averages.items()}
-
-    # 创建Excel文件
-    df_data = []
-    for evaluatee in evaluatees:
-        row = {'评估对象': evaluatee.name}
-        for evaluator in evaluators:
-            row[evaluator.name] = summary_data[evaluatee.id][evaluator.id]
-        row['平均分'] = averages.get(evaluatee.id, '-')
-        df_data.append(row)
-
-    df = pd.DataFrame(df_data)
-
-    # 保存到内存
+    # 生成Excel（与后台导出任务共用，见 exports.py）
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # 添加表头
-        df.to_excel(writer, index=False, sheet_name='评估汇总', startrow=1)  # 预留第一行给表头
-        worksheet = writer.sheets['评估汇总']
-        
-        # 设置表头文本
-        if task:
-            title = f"信息技术部{task.year}年{task.quarter}季度绩效互评汇总"
-        else:
-            title = "信息技术部绩效互评汇总"
-        
-        # 合并单元格并设置表头
-        worksheet.merge_cells('A1:Z1')  # 合并A1到Z1的单元格
-        worksheet['A1'] = title
-        
-        # 设置表头样式
-        header_font = Font(bold=True, size=14)
-        worksheet['A1'].font = header_font
+    filename = evaluation_summary_workbook(request.args.get('task_id', type=int), output)
     output.seek(0)
-
-    # 发送文件
-    return send_file(output, as_attachment=True, download_name=f'绩效评估汇总表_{task_name}_{datetime.now().strftime("%Y%m%d%H%M%S")}.xlsx', mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return send_file(output, as_attachment=True, download_name=filename, mimetype=XLSX_MIMETYPE)
 
 # 查看评估详情
-@app.route('/admin/evaluations/view/<int:id>')
+@views.route('/admin/evaluations/view/<int:id>')
 @login_required
 @admin_required
 def view_evaluation(id):
@@ -1634,7 +1389,7 @@ def view_evaluation(id):
     return render_template('admin/evaluation_view.html', evaluation=evaluation)
 
 # 退回单个评估
-@app.route('/admin/evaluations/withdrawal_requests')
+@views.route('/admin/evaluations/withdrawal_requests')
 @login_required
 @admin_required
 def withdrawal_requests():
@@ -1648,7 +1403,7 @@ def withdrawal_requests():
     return render_template('admin/withdrawal_requests.html', requests=requests)
 
 
-@app.route('/admin/evaluations/approve_withdrawal/<int:id>')
+@views.route('/admin/evaluations/approve_withdrawal/<int:id>')
 @login_required
 @admin_required
 def approve_withdrawal(id):
@@ -1656,7 +1411,7 @@ def approve_withdrawal(id):
     evaluation = EvaluationRecord.query.get_or_404(id)
     if evaluation.status == 'withdrawal_requested':
         # 将评估状态改为可编辑状态
-        evaluation.status = 'returned'
+        set_records_status([evaluation], 'returned')
         db.session.commit()
         flash('撤回申请已批准，评估记录已变为可编辑状态', 'success')
     else:
@@ -1664,7 +1419,7 @@ def approve_withdrawal(id):
     return redirect(url_for('withdrawal_requests'))
 
 
-@app.route('/admin/evaluations/batch_approve_withdrawal/<int:task_id>')
+@views.route('/admin/evaluations/batch_approve_withdrawal/<int:task_id>')
 @login_required
 @admin_required
 def batch_approve_withdrawal(task_id):
@@ -1680,15 +1435,14 @@ def batch_approve_withdrawal(task_id):
         return redirect(url_for('withdrawal_requests'))
 
     # 批量更新评估状态
-    for evaluation in evaluations:
-        evaluation.status = 'returned'
+    set_records_status(evaluations, 'returned')
     db.session.commit()
 
     flash(f'成功批准 {len(evaluations)} 条撤回申请，相关评估记录已变为可编辑状态', 'success')
     return redirect(url_for('withdrawal_requests'))
 
 
-@app.route('/admin/evaluations/batch_approve_withdrawal_by_evaluator/<int:task_id>/<int:evaluator_id>')
+@views.route('/admin/evaluations/batch_approve_withdrawal_by_evaluator/<int:task_id>/<int:evaluator_id>')
 @login_required
 @admin_required
 def batch_approve_withdrawal_by_evaluator(task_id, evaluator_id):
@@ -1714,8 +1468,7 @@ def batch_approve_withdrawal_by_evaluator(task_id, evaluator_id):
 
     # 批量更新评估状态
     evaluation_ids = [eval.id for eval in evaluations]
-    for evaluation in evaluations:
-        evaluation.status = 'returned'
+    set_records_status(evaluations, 'returned')
     db.session.commit()
 
     flash(f'成功批准 {len(evaluations)} 条撤回申请，相关评估记录已变为可编辑状态', 'success')
@@ -1723,7 +1476,7 @@ def batch_approve_withdrawal_by_evaluator(task_id, evaluator_id):
     return redirect(url_for('withdrawal_requests'))
 
 
-@app.route('/admin/evaluations/batch_approve_all_withdrawals')
+@views.route('/admin/evaluations/batch_approve_all_withdrawals')
 @login_required
 @admin_required
 def batch_approve_all_withdrawals():
@@ -1738,8 +1491,7 @@ def batch_approve_all_withdrawals():
         return redirect(url_for('withdrawal_requests'))
 
     # 批量更新评估状态
-    for evaluation in evaluations:
-        evaluation.status = 'returned'
+    set_records_status(evaluations, 'returned')
     db.session.commit()
 
     flash(f'成功批准所有 {len(evaluations)} 条撤回申请，相关评估记录已变为可编辑状态', 'success')
@@ -1747,7 +1499,7 @@ def batch_approve_all_withdrawals():
 
 
 # 用户侧一键重新评估所有已退回评估
-@app.route('/evaluations/batch_reassess_evaluations', methods=['POST'])
+@views.route('/evaluations/batch_reassess_evaluations', methods=['POST'])
 @login_required
 def batch_reassess_evaluations():
     from models import db, EvaluationRecord
@@ -1763,46 +1515,29 @@ def batch_reassess_evaluations():
 
     # 批量更新评估状态为可编辑
     for evaluation in evaluations:
-        evaluation.status = 'draft'
         evaluation.submitted_at = None
+    set_records_status(evaluations, 'draft')
     db.session.commit()
 
     flash(f'成功将 {len(evaluations)} 条已退回评估记录变为可编辑状态', 'success')
     return redirect(url_for('my_evaluations'))
 
 
-@app.route('/admin/evaluations/return/<int:id>')
+@views.route('/admin/evaluations/return/<int:id>')
 @login_required
 @admin_required
 def return_evaluation(id):
     from models import db, EvaluationRecord
     evaluation = EvaluationRecord.query.options(joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)).get_or_404(id)
     if evaluation.status == 'submitted':
-        evaluation.status = 'returned'
+        set_records_status([evaluation], 'returned')
         db.session.commit()
         flash('评估已成功退回', 'success')
     else:
         flash('只能退回已提交的评估', 'warning')
     return redirect(url_for('admin_evaluation_query'))
 
-# 员工数据导出功能
-@logger.catch()
-@handle_db_error
-def validate_and_get_columns(headers):
-    """验证表头并返回姓名、职位、密码列的索引"""
-    required_headers = ['姓名', '职位', '默认密码']
-    if not all(header in headers for header in required_headers):
-        flash('Excel表头必须包含：姓名、职位、默认密码', 'danger')
-        return None, None, None
-    
-    return (
-        headers.index('姓名') + 1,
-        headers.index('职位') + 1,
-        headers.index('默认密码') + 1
-    )
-
-
-@app.route('/admin/employees/import', methods=['GET', 'POST'])
+@views.route('/admin/employees/import', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def admin_employee_import():
@@ -1820,86 +1555,20 @@ def admin_employee_import():
         flash('请上传.xlsx格式的Excel文件', 'danger')
         return redirect(url_for('admin_employee_list'))
     
-    from openpyxl import load_workbook
-    from io import BytesIO
-    file_content = file.read()
-    wb = load_workbook(BytesIO(file_content))
-    ws = wb.active
-    
-    # 验证表头并获取列索引
+    # 只读模式逐行读取名册；密码哈希在多个进程中并行计算，大名册时在日志中报告进度
     try:
-        headers = [cell.value for cell in ws[1]]
-    except IndexError:
-        flash('Excel文件格式错误，未找到表头行', 'danger')
-        return redirect(url_for('admin_employee_list'))
-    # 确保headers有效后再调用验证函数
-    if headers:
-        name_col, position_col, password_col = validate_and_get_columns(headers)
-    else:
-        flash('Excel文件格式错误，未找到表头', 'danger')
+        summary = import_roster(
+            file.stream, progress=lambda done, total: logger.info(f'导入员工: 已完成 {done}/{total} 个密码哈希'))
+    except ValueError as e:
+        flash(str(e), 'danger')
         return redirect(url_for('admin_employee_list'))
-    if name_col is None:
-        return redirect(url_for('admin_employee_list'))
-        
-    success_count = 0
-    duplicate_names = []
-    
-    # 获取现有员工姓名列表
-    existing_names = [emp.name for emp in Employee.query.all()]
-        
-    # 获取最大employee_id用于生成新编号
-    max_emp = Employee.query.order_by(Employee.employee_id.desc()).first()
-    start_id = 1
-    if max_emp and max_emp.employee_id.isdigit():
-        start_id = int(max_emp.employee_id) + 1
-        
-        # 从第二行开始读取数据
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            name = row[name_col - 1]
-            position = row[position_col - 1]
-            password = row[password_col - 1]
-            
-            if not all([name, position, password]):
-                continue  # 跳过空行
-            
-            if name in existing_names or name in duplicate_names:
-                if name not in duplicate_names:
-                    duplicate_names.append(name)
-                continue
-            
-            # 确保生成的employee_id唯一
-            while Employee.query.filter_by(employee_id=str(start_id)).first():
-                start_id += 1
-            
-            # 创建新员工
-            new_employee = Employee(
-                employee_id=str(start_id),
-                name=name,
-                position=position,
-                is_admin=False
-            )
-            new_employee.set_password(password)
-            
-            db.session.add(new_employee)
-            success_count += 1
-            start_id += 1
-            existing_names.append(name)  # 防止当前批次内重复
+    db.session.commit()
+    invalidate_employees()
 
-        db.session.commit()
-        
-        messages = []
-        if success_count > 0:
-            messages.append(f'成功导入 {success_count} 名员工')
-        if duplicate_names:
-            messages.append(f"跳过 {len(duplicate_names)} 个重复姓名: {', '.join(duplicate_names)}")
-        
-        if messages:
-            for msg in messages:
-                flash(msg, 'success' if '成功' in msg else 'warning')
-        else:
-            flash('未导入任何员工数据', 'info')
-        
-        return redirect(url_for('admin_employee_list'))
+    for category, message in summary_messages(summary):
+        flash(message, category)
+
+    return redirect(url_for('admin_employee_list'))
 
 
 
@@ -1944,74 +1613,55 @@ def admin_employee_import():
 
 # 批量退回评估者在特定任务的所有评估
 
-@app.route('/admin/evaluations/batch_return/<int:evaluation_id>')
+@views.route('/admin/evaluations/batch_return/<int:evaluation_id>')
 @login_required
 @admin_required
 @logger.catch()
 def batch_return(evaluation_id):
     try:
-        app.logger.info(f'批量退回请求: evaluation_id={evaluation_id}')
+        current_app.logger.info(f'批量退回请求: evaluation_id={evaluation_id}')
         from models import db, EvaluationRecord
         from sqlalchemy import func
         # 通过单个评估记录获取任务和评估者信息
         ref_eval = EvaluationRecord.query.get_or_404(evaluation_id)
-        app.logger.info(f'批量退回: 获取参考评估记录 - task_id={ref_eval.task_id}, evaluator_id={ref_eval.evaluator_id}')
+        current_app.logger.info(f'批量退回: 获取参考评估记录 - task_id={ref_eval.task_id}, evaluator_id={ref_eval.evaluator_id}')
         evaluations = EvaluationRecord.query.filter(
             EvaluationRecord.task_id == ref_eval.task_id,
             EvaluationRecord.evaluator_id == ref_eval.evaluator_id,
             func.lower(EvaluationRecord.status) == 'submitted'
         ).all()
-        app.logger.info(f'批量退回: 查询到{len(evaluations)}条符合条件的评估记录')
+        current_app.logger.info(f'批量退回: 查询到{len(evaluations)}条符合条件的评估记录')
         
         if evaluations:
-            for eval in evaluations:
-                eval.status = 'returned'
             try:
+                set_records_status(evaluations, 'returned')
                 db.session.commit()
-                app.logger.info(f'批量退回: 成功提交{len(evaluations)}条记录的状态更新')
+                current_app.logger.info(f'批量退回: 成功提交{len(evaluations)}条记录的状态更新')
                 flash(f'成功退回 {len(evaluations)} 条评估记录', 'success')
             except Exception as e:
                 db.session.rollback()
-                app.logger.error(f'批量退回: 数据库提交失败 - {str(e)}', exc_info=True)
+                current_app.logger.error(f'批量退回: 数据库提交失败 - {str(e)}', exc_info=True)
                 flash(f'退回失败: {str(e)}', 'danger')
         else:
             flash('没有找到可退回的评估记录', 'warning')
     except Exception as e:
-        app.logger.error(f'批量退回操作发生异常: {str(e)}', exc_info=True)
+        current_app.logger.error(f'批量退回操作发生异常: {str(e)}', exc_info=True)
         flash(f'操作失败: {str(e)}', 'danger')
         return redirect(url_for('admin_evaluation_query'))
     return redirect(url_for('admin_evaluation_query'))
 
-@app.route('/admin/evaluations/delete/<int:id>', methods=['GET', 'POST'])
+@views.route('/admin/evaluations/delete/<int:id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def delete_evaluation(id):
     evaluation = EvaluationRecord.query.options(joinedload(EvaluationRecord.scores).joinedload(EvaluationScore.dimension)).get_or_404(id)
+    remove_records_from_results([evaluation])
     db.session.delete(evaluation)
     db.session.commit()
     flash('评估记录已成功删除', 'success')
     return redirect(url_for('admin_evaluation_query'))
 
-# 初始化数据库
-@app.before_first_request
-def create_tables():
-    from models import EvaluationDimension
-    db.create_all()
-    # 检查是否已有默认维度，没有则添加
-    if not EvaluationDimension.query.first():
-        default_dimensions = [
-            ('本职工作', 0.5),
-            ('附加业绩', 0.2),
-            ('合规守纪', 0.15),
-            ('互助', 0.1),
-            ('勤勉', 0.05)
-        ]
-        for name, weight in default_dimensions:
-            dimension = EvaluationDimension(name=name, weight=weight)
-            db.session.add(dimension)
-        db.session.commit()
-
-@app.route('/batch_evaluate')
+@views.route('/batch_evaluate')
 def batch_evaluate():
     # 检查是否为管理员
     if current_user.employee_id == '10000':
@@ -2053,17 +1703,12 @@ def batch_evaluate():
     ).first() is not None
     
     # 获取所有被评估者（排除自己、管理员、被冻结的员工以及ID小于2的员工）
-    evaluatees = Employee.query.filter(
-        Employee.id != evaluator_id,
-        Employee.employee_id != '10000',
-        Employee.role == '员工',
-        Employee.is_frozen == False
-    ).all()
+    evaluatees = [e for e in get_employees(roles=('员工',), include_frozen=False) if e.id != evaluator_id]
     # 获取所有评估维度
-    dimensions = EvaluationDimension.query.all()
+    dimensions = get_dimensions()
     
     # 获取当前任务
-    task = EvaluationTask.query.get(task_id)
+    task = get_task(task_id)
     return render_template('evaluation/batch_evaluation.html', 
                           evaluator_id=evaluator_id, 
                           task_id=task_id, 
@@ -2073,55 +1718,23 @@ def batch_evaluate():
                           has_pending_withdrawal=has_pending_withdrawal)
 
 # 延迟导入评估结果相关路由，避免循环导入
-@app.before_first_request
+@views.before_first_request
 def import_evaluation_results():
     import routes.evaluation_results
 
-if __name__ == '__main__':
-    with app.app_context():
-        try:
-              import os
-              print(f"当前工作目录: {os.getcwd()}", flush=True)
-              print(f"数据库URI: {app.config['SQLALCHEMY_DATABASE_URI']}", flush=True)
-              print("导入模型前元数据 tables: {db.metadata.tables.keys()}", flush=True)
-              print("开始创建数据库表...")
-              from models import Employee, EvaluationDimension, EvaluationScore, EvaluationRecord
-              print("导入模型后元数据 tables: {db.metadata.tables.keys()}", flush=True)
-              db.create_all()
-              # 验证表是否创建成功
-              tables = db.engine.table_names()
-              print(f"创建的数据库表: {tables}", flush=True)
-              print("数据库表创建成功", flush=True)
-              
-              # 检查是否已有默认维度，没有则添加
-              print("检查默认维度...")
-              if not EvaluationDimension.query.first():
-                  print("添加默认维度...")
-                  default_dimensions = [
-                      ('本职工作', 0.5),
-                      ('附加业绩', 0.2),
-                      ('合规守纪', 0.15),
-                      ('互助', 0.1),
-                      ('勤勉', 0.05)
-                  ]
-                  for name, weight in default_dimensions:
-                      dimension = EvaluationDimension(name=name, weight=weight)
-                      db.session.add(dimension)
-                  db.session.commit()
-                  print("默认维度添加成功")
-              else:
-                  print("默认维度已存在")
-        except Exception as e:
-            print(f"数据库初始化错误: {str(e)}")
-            db.session.rollback()
-        finally:
-            print("数据库初始化流程结束")
-
 # 导入并注册评估结果蓝图
 from routes.evaluation_results import evaluation_results_bp
-app.register_blueprint(evaluation_results_bp)
+views.register_blueprint(evaluation_results_bp)
+from routes.background_jobs import background_jobs_bp
+views.register_blueprint(background_jobs_bp)
+
+# 默认应用（gunicorn app:app、flask run 和 from app import app 使用）
+app = create_app()
 
 if __name__ == '__main__':
+    # 直接运行时（开发环境单进程）先初始化数据库；生产部署请先执行 flask init-db
+    with app.app_context():
+        init_database()
     app.run(debug=True, host='0.0.0.0', port=3008, use_reloader=False)
 
 
@@ -0,0 +1,258 @@
+"""后台任务
+
+较大的 Excel 导出和名册导入在请求线程中执行时会长时间占用工作进程，还可能超过反向代理的超时时间。
+这里提供一个进程内的后台任务执行器：路由创建任务后立即返回任务ID，任务在线程池中执行；状态、进度和
+结果文件位置保存在数据库的 background_jobs 表中，因此任意工作进程都可以查询进度和下载结果。
+
+工作进程重启时尚未完成的任务会中断，flask init-db 会把它们标记为失败（见 commands.py）。
+
+配置项:
+    BACKGROUND_JOB_WORKERS: 每个工作进程执行后台任务的线程数，默认 2
+    BACKGROUND_JOB_DIR: 上传文件和结果文件的保存目录，多台服务器部署时应为共享目录
+    BACKGROUND_JOB_RETENTION_HOURS: 已结束任务及其文件的保留小时数，默认 24
+"""
+import json
+import os
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from loguru import logger
+
+from employee_import import import_roster, summary_messages
+from exports import evaluation_results_workbook, evaluation_summary_workbook
+from extensions import db
+from lookup_cache import invalidate_employees
+from models import BackgroundJob, EvaluationTask
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+# 任务的执行结果：下载文件名（没有结果文件时为 None）和说明信息
+JobOutput = namedtuple('JobOutput', 'filename message')
+
+# 任务类型 -> 执行函数 handler(参数字典, 进度回调, 结果文件路径)，返回 JobOutput；
+# 有结果文件的任务直接写入结果文件路径，不在内存中保留文件内容
+_handlers = {}
+
+
+def job_handler(kind):
+    """注册任务类型的执行函数"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+class JobRunner:
+    """每个应用一个线程池，首次提交任务时才创建线程（gunicorn 预加载应用后 fork 的进程各自创建）"""
+
+    def __init__(self, app):
+        self.app = app
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.app.config.get('BACKGROUND_JOB_WORKERS', 2),
+                    thread_name_prefix='background-job')
+            # 只保留未完成任务的 future
+            self._futures = {key: future for key, future in self._futures.items() if not future.done()}
+            self._futures[job_id] = self._executor.submit(self._run, job_id)
+
+    def wait(self, job_id, timeout=None):
+        """等待本进程提交的任务结束（用于测试和命令行）"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                run_job(job_id)
+            finally:
+                db.session.remove()
+
+
+def init_background_jobs(app):
+    """为应用创建后台任务执行器"""
+    app.extensions['background_jobs'] = JobRunner(app)
+
+
+def _job_dir():
+    path = current_app.config['BACKGROUND_JOB_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _update_job(job_id, **values):
+    # 用独立的连接更新任务状态，不影响执行函数所在会话中未提交的事务
+    table = BackgroundJob.__table__
+    with db.engine.begin() as connection:
+        connection.execute(table.update().where(table.c.id == job_id).values(**values))
+
+
+def submit_job(kind, params=None, created_by=None, upload=None):
+    """
+    创建后台任务并提交到当前工作进程的线程池
+
+    Args:
+        kind: 任务类型，见 job_handler 注册的类型
+        params: 任务参数，需可JSON序列化
+        created_by: 创建者的员工主键
+        upload: 随任务保存的上传文件（FileStorage），保存路径通过参数 path 传给执行函数
+    Returns:
+        任务ID
+    """
+    if kind not in _handlers:
+        raise ValueError(f'未知的后台任务类型: {kind}')
+    purge_expired_jobs()
+    job_id = uuid.uuid4().hex
+    params = dict(params or {})
+    if upload is not None:
+        params['path'] = os.path.join(_job_dir(), f'{job_id}.upload')
+        upload.save(params['path'])
+    db.session.add(BackgroundJob(id=job_id, kind=kind, status=JOB_PENDING, progress=0,
+                                 params=json.dumps(params, ensure_ascii=False), created_by=created_by))
+    db.session.commit()
+    current_app.extensions['background_jobs'].submit(job_id)
+    return job_id
+
+
+def run_job(job_id):
+    """在当前应用上下文中执行任务，结果文件写入 BACKGROUND_JOB_DIR，状态写回数据库"""
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.status != JOB_PENDING:
+        return
+    kind, params = job.kind, json.loads(job.params or '{}')
+    db.session.rollback()
+    _update_job(job_id, status=JOB_RUNNING, started_at=datetime.utcnow())
+
+    result_path = os.path.join(_job_dir(), f'{job_id}.result')
+    reported = [0]
+
+    def progress(done, total):
+        # 百分比变化时才写数据库
+        percent = min(99, done * 100 // total) if total else 0
+        if percent > reported[0]:
+            reported[0] = percent
+            _update_job(job_id, progress=percent)
+
+    try:
+        output = _handlers[kind](params, progress, result_path)
+    except Exception as e:
+        db.session.rollback()
+        _remove_file(result_path)
+        logger.exception(f'后台任务 {job_id}（{kind}）失败')
+        _update_job(job_id, status=JOB_FAILED, message=str(e) or e.__class__.__name__,
+                    finished_at=datetime.utcnow())
+        return
+
+    values = dict(status=JOB_SUCCEEDED, progress=100, message=output.message, finished_at=datetime.utcnow())
+    if output.filename is not None:
+        values.update(result_path=result_path, result_filename=output.filename)
+    _update_job(job_id, **values)
+
+
+def job_status(job):
+    """
+    任务状态的JSON表示
+
+    Returns:
+        {'id', 'kind', 'status', 'progress', 'message', 'created_at', 'finished_at', 'has_result'}
+    """
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'has_result': job.status == JOB_SUCCEEDED and bool(job.result_path),
+    }
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_job_files(job):
+    paths = [job.result_path, json.loads(job.params or '{}').get('path')]
+    for path in filter(None, paths):
+        _remove_file(path)
+
+
+def purge_expired_jobs():
+    """删除超过保留时间的已结束任务及其文件"""
+    hours = current_app.config.get('BACKGROUND_JOB_RETENTION_HOURS', 24)
+    expired = BackgroundJob.query.filter(
+        BackgroundJob.status.in_([JOB_SUCCEEDED, JOB_FAILED]),
+        BackgroundJob.finished_at < datetime.utcnow() - timedelta(hours=hours)
+    ).all()
+    for job in expired:
+        _remove_job_files(job)
+        db.session.delete(job)
+    if expired:
+        db.session.commit()
+
+
+def fail_interrupted_jobs():
+    """
+    把等待或执行中的任务标记为失败，在没有工作进程运行时（部署、flask init-db）调用
+
+    Returns:
+        标记的任务数
+    """
+    interrupted = BackgroundJob.query.filter(BackgroundJob.status.in_([JOB_PENDING, JOB_RUNNING])).all()
+    for job in interrupted:
+        job.status = JOB_FAILED
+        job.message = '服务重启，任务已中断，请重新提交'
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return len(interrupted)
+
+
+def _get_task(task_id):
+    task = EvaluationTask.query.get(task_id) if task_id else None
+    if task is None:
+        raise ValueError('无效的任务ID')
+    return task
+
+
+@job_handler('export_evaluation_results')
+def _export_evaluation_results(params, progress, result_path):
+    filename = evaluation_results_workbook(
+        _get_task(params.get('task_id')), params['department_rating'], result_path, progress=progress)
+    return JobOutput(filename, None)
+
+
+@job_handler('export_evaluation_summary')
+def _export_evaluation_summary(params, progress, result_path):
+    # pandas 按扩展名选择写入引擎，传入文件对象而不是 .result 路径
+    with open(result_path, 'wb') as output:
+        filename = evaluation_summary_workbook(params.get('task_id'), output, progress=progress)
+    return JobOutput(filename, None)
+
+
+@job_handler('employee_import')
+def _import_employees(params, progress, result_path):
+    try:
+        with open(params['path'], 'rb') as stream:
+            summary = import_roster(stream, progress=progress)
+        db.session.commit()
+        invalidate_employees()
+    finally:
+        os.remove(params['path'])
+    return JobOutput(None, '；'.join(message for _, message in summary_messages(summary)))
@@ -0,0 +1,80 @@
+"""批量导入员工的多进程加速基准测试
+
+生成 --rows 行名册，在不同进程数下分别导入到新的临时数据库（employee_import.import_employees：
+分配工号、进程池计算密码哈希、批量插入），报告耗时、每秒导入人数、相对单进程的加速比和并行效率。
+密码哈希是 CPU 密集的，理想情况下加速比随进程数线性增长，直到用满CPU核心。
+
+用法:
+    python benchmarks/bench_employee_import.py
+    python benchmarks/bench_employee_import.py --rows 2000 --processes 1,2,4,8
+    python benchmarks/bench_employee_import.py --method pbkdf2:sha256:50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from employee_import import import_employees
+from extensions import db
+
+
+def _default_process_counts():
+    counts, count = [], 1
+    while count < (os.cpu_count() or 1):
+        counts.append(count)
+        count *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def run_import(rows, processes):
+    """在新的临时数据库上导入名册，返回耗时秒数"""
+    db_path = tempfile.mkstemp(suffix='.db')[1]
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    try:
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            summary = import_employees(rows, processes=processes)
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+            if summary.imported != len(rows):
+                raise RuntimeError(f'只导入了 {summary.imported}/{len(rows)} 行')
+            db.session.remove()
+        return elapsed
+    finally:
+        os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导入员工的多进程加速基准测试')
+    parser.add_argument('--rows', type=int, default=400, help='名册行数')
+    parser.add_argument('--processes', help='逗号分隔的进程数，默认 1,2,4... 直到CPU核心数')
+    parser.add_argument('--method', help='密码哈希方法，默认取应用配置')
+    args = parser.parse_args()
+    if args.method:
+        app.config['PASSWORD_HASH_METHOD'] = args.method
+    process_counts = [int(count) for count in args.processes.split(',')] if args.processes \
+        else _default_process_counts()
+    rows = [(f'导入员工{i}', '开发', f'password{i}') for i in range(args.rows)]
+
+    print(f'{args.rows} 行，哈希方法 {app.config["PASSWORD_HASH_METHOD"]}，CPU核心 {os.cpu_count()}')
+    print(f'{"进程数":>6}{"耗时":>10}{"人/秒":>10}{"加速比":>8}{"效率":>8}')
+    baseline = None
+    for processes in process_counts:
+        elapsed = run_import(rows, processes)
+        if processes == 1:
+            baseline = elapsed
+        if baseline:
+            speedup = baseline / elapsed
+            speedup_text = f'{speedup:>8.2f}{speedup / processes:>8.0%}'
+        else:
+            speedup_text = f'{"-":>8}{"-":>8}'  # 未测单进程时无法计算加速比
+        print(f'{processes:>8}{elapsed:>9.1f}s{args.rows / elapsed:>10.1f}{speedup_text}')
+
+
+if __name__ == '__main__':
+    main()
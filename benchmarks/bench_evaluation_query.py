@@ -0,0 +1,109 @@
+"""评估查询去重子查询的基准测试
+
+在临时SQLite数据库中生成 N 名员工两两互评的已提交记录，对比：
+  - dedupe: 原先按 (评估者, 被评估者, 任务) 取 max(id) 的子查询自连接
+  - plain : 唯一约束保证每个组合一条记录后的普通索引过滤
+
+用法: python benchmarks/bench_evaluation_query.py --employees 300 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import with_expression
+
+from app import app
+from extensions import db
+from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationScore, EvaluationTask
+
+
+def seed(employee_count):
+    employees = [{'employee_id': str(20000 + i), 'name': f'员工{i}', 'position': '开发', 'role': '员工',
+                  'password_hash': 'x', 'position_coefficient': 1.0} for i in range(employee_count)]
+    db.session.bulk_insert_mappings(Employee, employees)
+    task = EvaluationTask(year=2024, quarter=1, name='基准任务', status='published')
+    dimensions = [EvaluationDimension(name=f'维度{i}', weight=0.25) for i in range(4)]
+    db.session.add_all([task] + dimensions)
+    db.session.commit()
+
+    ids = [row.id for row in db.session.query(Employee.id)]
+    records = [{'evaluator_id': evaluator, 'evaluatee_id': evaluatee, 'task_id': task.id, 'status': 'submitted'}
+               for evaluator in ids for evaluatee in ids if evaluator != evaluatee]
+    db.session.bulk_insert_mappings(EvaluationRecord, records)
+    db.session.commit()
+    record_ids = [row.id for row in db.session.query(EvaluationRecord.id)]
+    scores = [{'evaluation_record_id': record_id, 'dimension_id': dimension.id, 'score': random.choice([3, 4, 5])}
+              for record_id in record_ids for dimension in dimensions]
+    db.session.bulk_insert_mappings(EvaluationScore, scores)
+    db.session.commit()
+    return task.id, len(record_ids)
+
+
+def base_query(task_id):
+    return EvaluationRecord.query.filter_by(status='submitted', task_id=task_id)
+
+
+def dedupe_query(task_id):
+    query = base_query(task_id)
+    subquery = query.with_entities(
+        EvaluationRecord.evaluator_id,
+        EvaluationRecord.evaluatee_id,
+        EvaluationRecord.task_id,
+        func.max(EvaluationRecord.id).label('max_id')
+    ).group_by(
+        EvaluationRecord.evaluator_id,
+        EvaluationRecord.evaluatee_id,
+        EvaluationRecord.task_id
+    ).subquery()
+    return query.join(subquery, and_(
+        EvaluationRecord.evaluator_id == subquery.c.evaluator_id,
+        EvaluationRecord.evaluatee_id == subquery.c.evaluatee_id,
+        EvaluationRecord.task_id == subquery.c.task_id,
+        EvaluationRecord.id == subquery.c.max_id
+    ))
+
+
+def timed(build, task_id, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        rows = build(task_id).options(
+            with_expression(EvaluationRecord.queried_total_score, EvaluationRecord.total_score)
+        ).all()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='评估查询去重子查询基准测试')
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = tempfile.mkstemp(suffix='.db')[1]
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    try:
+        with app.app_context():
+            db.create_all()
+            task_id, record_count = seed(args.employees)
+            print(f'员工 {args.employees} 名，评估记录 {record_count} 条，取 {args.repeat} 次中的最快值')
+            results = {name: timed(build, task_id, args.repeat)
+                       for name, build in (('dedupe', dedupe_query), ('plain', base_query))}
+            for name, (elapsed, rows) in results.items():
+                print(f'{name:<8}{elapsed * 1000:10.1f} ms  {rows} 行')
+            print(f'加速比: {results["dedupe"][0] / results["plain"][0]:.2f}x')
+            db.session.remove()
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
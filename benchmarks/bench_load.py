@@ -0,0 +1,216 @@
+"""季度末集中提交的并发压力测试
+
+在本进程中启动一个多线程的本地服务器（连接生成的数据集），再用线程池模拟 N 名员工同时：
+登录 -> 打开 batch_evaluate -> 提交 submit_batch_evaluation（给组内其他员工打分）。
+结束后报告吞吐量、各步骤的 p50/p95/p99 延迟、HTTP错误数，以及通过引擎事件统计到的
+SQLite 锁错误（database is locked）。
+
+压测关闭了CSRF校验；数据集按场景规模生成，所有员工初始均未提交评估。
+
+用法:
+    python benchmarks/bench_load.py --scenario department
+    python benchmarks/bench_load.py --scenario quarter_end --concurrency 200
+"""
+import argparse
+import http.cookiejar
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import app
+from extensions import db
+from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationTask
+from generate_workload import generate_workload
+
+# 场景：数据集规模、每组人数和并发数
+SCENARIOS = {
+    'team': dict(staff=30, managers=2, heads=2, leaders=1, team_size=10, concurrency=10),
+    'department': dict(staff=200, managers=10, heads=10, leaders=4, team_size=20, concurrency=50),
+    'quarter_end': dict(staff=1000, managers=40, heads=40, leaders=10, team_size=25, concurrency=100),
+}
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    # 压测期间不逐条输出访问日志
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class EmployeeClient:
+    """带独立 cookie 的HTTP客户端，代表一名登录的员工"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, path, data=None):
+        """返回 HTTP 状态码；重定向（302）视为正常响应"""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with self.opener.open(self.base_url + path, body, timeout=120) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class LoadStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.http_errors = defaultdict(int)
+        self.db_lock_errors = 0
+
+    def record(self, step, elapsed, status):
+        with self.lock:
+            self.latencies[step].append(elapsed)
+            if status >= 400:
+                self.http_errors[step] += 1
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def prepare_dataset(scenario):
+    """生成数据集并返回 (任务ID, 维度ID列表, [(工号, 评估者ID, 组内被评估者ID列表)])"""
+    generate_workload(staff=scenario['staff'], managers=scenario['managers'], heads=scenario['heads'],
+                      leaders=scenario['leaders'], quarters=1, team_size=scenario['team_size'],
+                      submit_ratio=0, draft_ratio=0, seed=1)
+    task_id = EvaluationTask.query.first().id
+    dimension_ids = [d.id for d in EvaluationDimension.query.all()]
+    staff = Employee.query.filter(Employee.role == '员工', Employee.employee_id != '10000') \
+        .order_by(Employee.id).all()
+    team_size = scenario['team_size']
+    evaluators = []
+    for start in range(0, len(staff), team_size):
+        team = staff[start:start + team_size]
+        for member in team:
+            evaluators.append((member.employee_id, member.id, [e.id for e in team if e.id != member.id]))
+    return task_id, dimension_ids, evaluators
+
+
+def simulate_employee(base_url, stats, task_id, dimension_ids, evaluator):
+    employee_id, evaluator_id, evaluatee_ids = evaluator
+    client = EmployeeClient(base_url)
+    form = {'evaluator_id': evaluator_id, 'task_id': task_id, 'action': 'submit'}
+    for evaluatee_id in evaluatee_ids:
+        for dimension_id in dimension_ids:
+            form[f'scores[{evaluatee_id}][{dimension_id}]'] = '4'
+
+    started = time.perf_counter()
+    for step, path, data in (
+        ('login', '/login', {'employee_id': employee_id, 'password': 'password'}),
+        ('batch_evaluate', f'/batch_evaluate?evaluator_id={evaluator_id}&task_id={task_id}', None),
+        ('submit_batch_evaluation', '/submit_batch_evaluation', form),
+    ):
+        start = time.perf_counter()
+        status = client.request(path, data)
+        stats.record(step, time.perf_counter() - start, status)
+    stats.record('total', time.perf_counter() - started, 200)
+
+
+def report(stats, elapsed, submitted, expected):
+    print(f'\n完成 {len(stats.latencies["total"])} 名员工，耗时 {elapsed:.1f}s，'
+          f'吞吐量 {len(stats.latencies["total"]) / elapsed:.1f} 人/秒')
+    print(f'{"步骤":<26}{"p50":>10}{"p95":>10}{"p99":>10}{"HTTP错误":>10}')
+    for step in ('login', 'batch_evaluate', 'submit_batch_evaluation', 'total'):
+        values = stats.latencies[step]
+        if values:
+            print(f'{step:<28}' + ''.join(f'{percentile(values, p) * 1000:>9.0f}ms' for p in (50, 95, 99))
+                  + f'{stats.http_errors[step]:>10}')
+    print(f'SQLite 锁错误: {stats.db_lock_errors}')
+    print(f'已提交记录: {submitted} / {expected}')
+
+
+def run_load_test(scenario, concurrency, employees=None, port=0):
+    """
+    在临时数据库上运行一次压测
+
+    Args:
+        scenario: SCENARIOS 中的场景配置
+        concurrency: 并发员工数
+        employees: 参与提交的员工数，默认为全部员工
+        port: 本地服务器端口，0 为随机
+    Returns:
+        (LoadStats, 耗时秒数, 已提交记录数, 应提交记录数)
+    """
+    db_path = tempfile.mkstemp(suffix='.db')[1]
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}', WTF_CSRF_ENABLED=False)
+    stats = LoadStats()
+    server = None
+    try:
+        with app.app_context():
+            db.create_all()
+            task_id, dimension_ids, evaluators = prepare_dataset(scenario)
+            if employees:
+                evaluators = evaluators[:employees]
+
+            @event.listens_for(db.engine, 'handle_error')
+            def count_lock_errors(context):
+                if isinstance(context.sqlalchemy_exception, OperationalError) and \
+                        'database is locked' in str(context.original_exception):
+                    with stats.lock:
+                        stats.db_lock_errors += 1
+
+            db.session.remove()
+
+        server = make_server('127.0.0.1', port, app, threaded=True, request_handler=_QuietRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        print(f'{len(evaluators)} 名员工，并发 {concurrency}，服务器 {base_url}')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(simulate_employee, base_url, stats, task_id, dimension_ids, evaluator)
+                           for evaluator in evaluators]:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            submitted = EvaluationRecord.query.filter_by(task_id=task_id, status='submitted').count()
+            db.session.remove()
+        return stats, elapsed, submitted, sum(len(e[2]) for e in evaluators)
+    finally:
+        if server:
+            server.shutdown()
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='季度末集中提交的并发压力测试')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='department')
+    parser.add_argument('--concurrency', type=int, help='并发员工数，默认取场景配置')
+    parser.add_argument('--employees', type=int, help='参与提交的员工数，默认为全部员工')
+    parser.add_argument('--port', type=int, default=0, help='本地服务器端口，默认随机')
+    args = parser.parse_args()
+    scenario = SCENARIOS[args.scenario]
+    print(f'场景 {args.scenario}')
+    report(*run_load_test(scenario, args.concurrency or scenario['concurrency'], args.employees, args.port))
+
+
+if __name__ == '__main__':
+    main()
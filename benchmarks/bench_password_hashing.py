@@ -0,0 +1,93 @@
+"""密码哈希成本与登录吞吐量基准测试
+
+对每种哈希方法（werkzeug method 字符串，如 pbkdf2:sha256:260000）测量：
+  - 单核每秒可完成的密码校验次数（check_password_hash，即登录时的主要CPU开销）
+  - 用 --processes 个进程同时校验时的总吞吐量
+  - 单核每秒可完成的完整登录请求（经过 /login 路由、查询员工并写入会话，临时数据库，关闭CSRF）
+并按 --employees 估算早高峰所有员工登录所需的CPU时间，用于选择 PASSWORD_HASH_METHOD。
+
+用法:
+    python benchmarks/bench_password_hashing.py
+    python benchmarks/bench_password_hashing.py --method pbkdf2:sha256:260000 --method pbkdf2:sha256:100000
+    python benchmarks/bench_password_hashing.py --processes 4 --employees 3000 --seconds 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash
+
+from app import app
+from extensions import db
+from models import Employee
+from password_hashing import hash_password
+
+DEFAULT_METHODS = ('pbkdf2:sha256:260000', 'pbkdf2:sha256:150000', 'pbkdf2:sha256:50000')
+
+
+def verify_rate(method, seconds):
+    """单个进程在 seconds 秒内反复校验密码，返回每秒校验次数"""
+    password_hash = hash_password('password', method)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        check_password_hash(password_hash, 'password')
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def login_rate(method, seconds):
+    """单线程在临时数据库上反复登录、退出，返回每秒完成的登录请求数"""
+    db_path = tempfile.mkstemp(suffix='.db')[1]
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}', WTF_CSRF_ENABLED=False,
+                      PASSWORD_HASH_METHOD=method)
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.add(Employee(employee_id='20001', name='压测员工', position='开发',
+                                    password_hash=hash_password('password', method)))
+            db.session.commit()
+            db.session.remove()
+
+        client = app.test_client()
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            response = client.post('/login', data={'employee_id': '20001', 'password': 'password'})
+            if response.status_code != 302 or '/login' in response.headers['Location']:
+                raise RuntimeError(f'登录失败: {response.status_code}')
+            client.get('/logout')
+            count += 1
+        return count / (time.perf_counter() - start)
+    finally:
+        os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='密码哈希成本与登录吞吐量基准测试')
+    parser.add_argument('--method', action='append', help='哈希方法，可重复指定')
+    parser.add_argument('--seconds', type=float, default=2.0, help='每项测量的持续秒数')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='多进程校验的进程数')
+    parser.add_argument('--employees', type=int, default=1000, help='早高峰登录的员工数')
+    parser.add_argument('--skip-login', action='store_true', help='不测量完整登录请求')
+    args = parser.parse_args()
+
+    print(f'{"方法":<24}{"单次校验":>10}{"校验/秒/核":>12}{f"校验/秒({args.processes}进程)":>18}'
+          f'{"登录/秒/核":>12}{"全员登录CPU":>14}')
+    for method in args.method or DEFAULT_METHODS:
+        per_core = verify_rate(method, args.seconds)
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            total = sum(executor.map(verify_rate, [method] * args.processes, [args.seconds] * args.processes))
+        logins = None if args.skip_login else login_rate(method, args.seconds)
+        logins_text = f'{logins:>12.1f}' if logins else f'{"-":>12}'
+        print(f'{method:<26}{1000 / per_core:>8.1f}ms{per_core:>12.1f}{total:>18.1f}'
+              f'{logins_text}{args.employees / per_core:>13.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""考评结果导出的内存与耗时基准测试
+
+生成不同行数的考评结果，分别用原来的 DataFrame 方式（to_excel 后按 iloc 逐格计算列宽、逐格重写）和
+导出所用的 xlsxwriter constant_memory 流式写入（exports.write_evaluation_results）生成 xlsx，报告耗时
+和 tracemalloc 记录的 Python 内存峰值。流式写入的内存峰值应基本不随行数增长，耗时与行数成线性关系。
+
+用法:
+    python benchmarks/bench_results_export.py
+    python benchmarks/bench_results_export.py --rows 1000,10000,50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports import RESULT_COLUMNS, SCORE_KEYS, write_evaluation_results
+
+
+def build_results(rows):
+    """生成 rows 条考评结果"""
+    rng = random.Random(rows)
+    results = []
+    for i in range(rows):
+        result = {'name': f'员工{i}', 'position': rng.choice(['开发', '测试', '软件开发工程师'])}
+        for key in SCORE_KEYS:
+            result[key] = rng.uniform(60, 99)
+        result['performance_level'] = rng.choice('ABCD')
+        results.append(result)
+    return results
+
+
+def write_dataframe(output, title, results):
+    """原导出方式：DataFrame 写入后按 iloc 逐格计算列宽并重写带边框的单元格"""
+    import pandas as pd
+    df = pd.DataFrame(results)
+    for col in SCORE_KEYS:
+        df[col] = df[col].round(2)
+    df = df[[key for key, _ in RESULT_COLUMNS]]
+    df.columns = [label for _, label in RESULT_COLUMNS]
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    df.to_excel(writer, index=False, sheet_name='绩效考评结果', startrow=1)
+    workbook, worksheet = writer.book, writer.sheets['绩效考评结果']
+    worksheet.merge_range(0, 0, 0, len(df.columns) - 1, title, workbook.add_format({'bold': True}))
+    cell_format = workbook.add_format({'border': 1})
+    for col_num, col_name in enumerate(df.columns):
+        max_width = len(col_name) * 1.5 + 2
+        for row in range(len(df)):
+            max_width = max(max_width, len(str(df.iloc[row, col_num])) + 1)
+        worksheet.set_column(col_num, col_num, max_width)
+    for row_num in range(len(df)):
+        for col_num in range(len(df.columns)):
+            cell_value = df.iloc[row_num, col_num]
+            if pd.notna(cell_value):
+                worksheet.write(row_num + 2, col_num, cell_value, cell_format)
+    writer.close()
+
+
+def measure(write, results):
+    """返回 (文件大小KB, 耗时秒数, 内存峰值MB)"""
+    output = BytesIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    write(output, '基准测试', results)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(output.getvalue()) / 1024, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='考评结果导出的内存与耗时基准测试')
+    parser.add_argument('--rows', default='1000,5000,20000', help='逗号分隔的结果行数')
+    parser.add_argument('--skip-dataframe', action='store_true', help='不运行原 DataFrame 方式（行数很大时较慢）')
+    args = parser.parse_args()
+
+    print(f'{"行数":>8}{"DataFrame耗时":>14}{"DataFrame内存":>14}{"流式写入耗时":>14}{"流式写入内存":>14}{"文件大小":>10}')
+    for rows in [int(count) for count in args.rows.split(',')]:
+        results = build_results(rows)
+        if args.skip_dataframe:
+            df_time = df_peak = float('nan')
+        else:
+            _, df_time, df_peak = measure(write_dataframe, results)
+        size, stream_time, stream_peak = measure(write_evaluation_results, results)
+        print(f'{rows:>10}{df_time:>15.2f}s{df_peak:>14.1f}MB{stream_time:>15.2f}s{stream_peak:>14.1f}MB{size:>10.0f}KB')
+
+
+if __name__ == '__main__':
+    main()
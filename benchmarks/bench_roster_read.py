@@ -0,0 +1,74 @@
+"""名册读取的内存与耗时基准测试
+
+生成不同行数的名册 xlsx，分别用 openpyxl 完整模式（为每个单元格创建对象）和导入所用的只读流式
+模式（employee_import.open_roster，values_only）读取全部数据行，报告耗时和 tracemalloc 记录的
+Python 内存峰值。只读模式的内存峰值应基本不随行数增长，耗时与行数成线性关系。
+
+用法:
+    python benchmarks/bench_roster_read.py
+    python benchmarks/bench_roster_read.py --rows 1000,10000,50000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook
+
+from employee_import import open_roster, roster_rows
+
+
+def build_roster(rows):
+    """生成包含 rows 行员工的名册文件内容"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['姓名', '职位', '默认密码'])
+    for i in range(rows):
+        sheet.append([f'员工{i}', '开发', f'password{i}'])
+    stream = BytesIO()
+    workbook.save(stream)
+    return stream.getvalue()
+
+
+def read_full(content):
+    worksheet = load_workbook(BytesIO(content)).active
+    return sum(1 for _ in worksheet.iter_rows(min_row=2, values_only=True))
+
+
+def read_streaming(content):
+    with open_roster(BytesIO(content)) as (headers, rows):
+        return sum(1 for _ in roster_rows(rows, (1, 2, 3)))
+
+
+def measure(read, content):
+    """返回 (读取行数, 耗时秒数, 内存峰值MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = read(content)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='名册读取的内存与耗时基准测试')
+    parser.add_argument('--rows', default='1000,5000,20000', help='逗号分隔的名册行数')
+    args = parser.parse_args()
+
+    print(f'{"行数":>8}{"完整模式耗时":>14}{"完整模式内存":>14}{"只读模式耗时":>14}{"只读模式内存":>14}')
+    for rows in [int(count) for count in args.rows.split(',')]:
+        content = build_roster(rows)
+        _, full_time, full_peak = measure(read_full, content)
+        count, stream_time, stream_peak = measure(read_streaming, content)
+        if count != rows:
+            raise RuntimeError(f'只读模式只读到 {count}/{rows} 行')
+        print(f'{rows:>10}{full_time:>15.2f}s{full_peak:>14.1f}MB{stream_time:>15.2f}s{stream_peak:>14.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""路由级基准测试
+
+用 Flask 测试客户端在生成的数据集上依次请求主要页面，记录每个路由的耗时（多次取中位数）
+和SQL语句数，结果写入JSON基准文件。再次运行时与基准比较：耗时超过基准的 --threshold
+百分比（且多出 --min-delta-ms 毫秒以上）、或语句数超过基准的 --statement-threshold
+百分比即视为性能回退，以非零状态退出。
+
+基准文件与机器相关，首次运行（或 --update-baseline）时生成。生成考评结果和导出前
+会清空结果缓存，测的是完整计算路径；批量提交每次计时后会把记录恢复为草稿。
+
+用法:
+    python benchmarks/bench_routes.py                      # 生成临时数据集并与基准比较
+    python benchmarks/bench_routes.py --update-baseline    # 重新记录基准
+    python benchmarks/bench_routes.py --db /tmp/workload.db --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from extensions import db
+from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationTask
+from query_stats import count_queries
+from results_engine import clear_results_cache, set_records_status
+from generate_workload import generate_workload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'route_baseline.json')
+
+
+def login(client, employee_id, password='password'):
+    client.get('/logout')
+    client.post('/login', data={'employee_id': employee_id, 'password': password})
+
+
+def find_evaluator(task_id):
+    """找一名在任务中尚未提交评估的员工作为批量评估的评估者"""
+    submitted = db.session.query(EvaluationRecord.evaluator_id).filter_by(task_id=task_id, status='submitted')
+    evaluator = Employee.query.filter(
+        Employee.role == '员工', Employee.employee_id != '10000', ~Employee.id.in_(submitted)
+    ).first()
+    if evaluator is None:
+        raise SystemExit('数据集中没有尚未提交评估的员工，请调低 --submit-ratio 重新生成')
+    evaluatees = [e.id for e in Employee.query.filter(Employee.role == '员工', Employee.employee_id != '10000',
+                                                      Employee.id != evaluator.id).limit(20)]
+    return evaluator, evaluatees
+
+
+def build_cases(task_id, evaluator, evaluatee_ids, dimension_ids):
+    """返回 [(名称, 登录工号, 请求函数, 计时后的清理函数)]"""
+    batch_form = {'evaluator_id': evaluator.id, 'task_id': task_id, 'action': 'submit'}
+    for evaluatee_id in evaluatee_ids:
+        for dimension_id in dimension_ids:
+            batch_form[f'scores[{evaluatee_id}][{dimension_id}]'] = '4'
+    results_form = {'task_id': str(task_id), 'department_rating': '丙'}
+
+    def reset_batch():
+        records = EvaluationRecord.query.filter(EvaluationRecord.evaluator_id == evaluator.id,
+                                                EvaluationRecord.task_id == task_id,
+                                                EvaluationRecord.evaluatee_id.in_(evaluatee_ids)).all()
+        set_records_status(records, 'draft')
+        db.session.commit()
+
+    return [
+        ('admin_evaluation_query', '10000',
+         lambda c: c.get(f'/admin/evaluations?task_id={task_id}'), None),
+        ('admin_leader_evaluation_stats', '10000',
+         lambda c: c.get(f'/admin/leader_evaluation_stats?task_id={task_id}'), None),
+        ('admin_generate_evaluation_results', '10000',
+         lambda c: c.post('/admin/generate-evaluation-results', data=results_form), None),
+        ('export_evaluation_results', '10000',
+         lambda c: c.post('/admin/export-evaluation-results', data=results_form), None),
+        ('batch_evaluate', evaluator.employee_id,
+         lambda c: c.get(f'/batch_evaluate?evaluator_id={evaluator.id}&task_id={task_id}'), None),
+        ('submit_batch_evaluation', evaluator.employee_id,
+         lambda c: c.post('/submit_batch_evaluation', data=batch_form), reset_batch),
+        ('my_evaluations', evaluator.employee_id,
+         lambda c: c.get('/my_evaluations'), None),
+    ]
+
+
+def run_cases(repeat):
+    client = app.test_client()
+    task_id = EvaluationTask.query.order_by(EvaluationTask.id).first().id
+    evaluator, evaluatee_ids = find_evaluator(task_id)
+    dimension_ids = [d.id for d in EvaluationDimension.query.all()]
+    results = {}
+    for name, employee_id, request_route, cleanup in build_cases(task_id, evaluator, evaluatee_ids, dimension_ids):
+        login(client, employee_id)
+        timings, statements, status = [], None, None
+        for i in range(repeat + 1):
+            clear_results_cache()
+            db.session.remove()
+            with count_queries() as stats:
+                start = time.perf_counter()
+                response = request_route(client)
+                elapsed = time.perf_counter() - start
+            if cleanup:
+                cleanup()
+            if i == 0:
+                continue  # 第一次为预热
+            timings.append(elapsed * 1000)
+            statements, status = stats.count, response.status_code
+        results[name] = {'median_ms': round(statistics.median(timings), 2), 'min_ms': round(min(timings), 2),
+                         'statements': statements, 'status': status}
+        print(f'{name:<36}{results[name]["median_ms"]:>10.1f} ms {statements:>6} 条SQL  HTTP {status}')
+    return results
+
+
+def compare(results, baseline, threshold, statement_threshold, min_delta_ms):
+    """返回回退项描述列表"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        slower = current['median_ms'] - previous['median_ms']
+        if slower > min_delta_ms and current['median_ms'] > previous['median_ms'] * (1 + threshold / 100):
+            regressions.append(f'{name}: 耗时 {previous["median_ms"]}ms -> {current["median_ms"]}ms')
+        if current['statements'] > previous['statements'] * (1 + statement_threshold / 100):
+            regressions.append(f'{name}: SQL语句数 {previous["statements"]} -> {current["statements"]}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='路由级基准测试')
+    parser.add_argument('--db', help='使用已生成的数据集（默认按下列规模生成临时数据集）')
+    parser.add_argument('--staff', type=int, default=200)
+    parser.add_argument('--managers', type=int, default=10)
+    parser.add_argument('--heads', type=int, default=10)
+    parser.add_argument('--leaders', type=int, default=4)
+    parser.add_argument('--quarters', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=25, help='耗时允许超出基准的百分比')
+    parser.add_argument('--min-delta-ms', type=float, default=5, help='耗时增加不超过该毫秒数时不算回退（避免短请求的抖动）')
+    parser.add_argument('--statement-threshold', type=float, default=0, help='SQL语句数允许超出基准的百分比')
+    args = parser.parse_args()
+
+    temp_path = None
+    db_path = args.db
+    if not db_path:
+        temp_path = db_path = tempfile.mkstemp(suffix='.db')[1]
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{os.path.abspath(db_path)}', TESTING=True,
+                      WTF_CSRF_ENABLED=False, QUERY_COUNT_WARNING_THRESHOLD=0)
+    try:
+        with app.app_context():
+            if temp_path:
+                db.create_all()
+                generate_workload(staff=args.staff, managers=args.managers, heads=args.heads,
+                                  leaders=args.leaders, quarters=args.quarters, seed=1)
+            results = run_cases(args.repeat)
+            db.session.remove()
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'基准已写入 {args.baseline}')
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.statement_threshold, args.min_delta_ms)
+    if regressions:
+        print('性能回退:\n  ' + '\n  '.join(regressions))
+        sys.exit(1)
+    print('未发现性能回退')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""SQLite 连接参数基准测试
+
+用 bench_load.py 的并发提交压测，分别在以下连接设置下运行并对比吞吐量、提交延迟和锁错误：
+  - default   : SQLite 默认设置（回滚日志，synchronous=FULL）
+  - busy      : 只设置 busy_timeout
+  - production: config.py 中的生产配置（WAL、busy_timeout、synchronous=NORMAL、页缓存、mmap）
+
+每种设置使用各自新生成的临时数据库（journal_mode=WAL 会写入数据库文件）。
+
+用法:
+    python benchmarks/bench_sqlite_pragmas.py --scenario department
+    python benchmarks/bench_sqlite_pragmas.py --scenario team --concurrency 30 --profiles default,production
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from config import PRODUCTION_SQLITE_PRAGMAS
+from bench_load import SCENARIOS, percentile, run_load_test
+
+PROFILES = {
+    'default': {},
+    'busy': {'busy_timeout': PRODUCTION_SQLITE_PRAGMAS['busy_timeout']},
+    'production': PRODUCTION_SQLITE_PRAGMAS,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 连接参数基准测试')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='department')
+    parser.add_argument('--concurrency', type=int, help='并发员工数，默认取场景配置')
+    parser.add_argument('--employees', type=int, help='参与提交的员工数，默认为全部员工')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='逗号分隔的设置名称')
+    args = parser.parse_args()
+    scenario = SCENARIOS[args.scenario]
+    concurrency = args.concurrency or scenario['concurrency']
+
+    results = {}
+    for name in args.profiles.split(','):
+        print(f'[{name}] ', end='')
+        app.config['SQLITE_PRAGMAS'] = PROFILES[name]
+        results[name] = run_load_test(scenario, concurrency, args.employees)
+
+    print(f'\n{"设置":<12}{"吞吐量(人/秒)":>14}{"提交p50":>10}{"提交p95":>10}{"提交p99":>10}{"锁错误":>8}{"已提交":>14}')
+    for name, (stats, elapsed, submitted, expected) in results.items():
+        submit = stats.latencies['submit_batch_evaluation']
+        print(f'{name:<14}{len(stats.latencies["total"]) / elapsed:>14.1f}'
+              + ''.join(f'{percentile(submit, p) * 1000:>8.0f}ms' for p in (50, 95, 99))
+              + f'{stats.db_lock_errors:>8}{f"{submitted}/{expected}":>16}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""应用冷启动基准测试
+
+在全新的子进程中导入指定模块（默认 app），记录导入耗时（多次取中位数）和导入后的常驻内存，
+并检查 pandas / openpyxl / xlsxwriter / numpy 等重量级依赖是否在导入时就被加载——
+这些库应只在导出、导入等用到的代码路径中加载。每个 gunicorn 工作进程和每个
+from app import app 的维护脚本都要付出这部分启动成本。
+
+超过 --max-import-ms / --max-rss-mb，或导入时加载了 --forbid 中的模块时以非零状态退出。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --module app --module check_db --repeat 10
+    python benchmarks/bench_startup.py --max-import-ms 800 --max-rss-mb 90
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_FORBIDDEN = ('pandas', 'openpyxl', 'xlsxwriter', 'numpy')
+
+# 在子进程中执行：导入模块并以JSON输出耗时、内存和已加载的模块
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+rss_kb = None
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS'))
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+print(json.dumps({'import_ms': elapsed * 1000, 'rss_mb': rss_kb / 1024,
+                  'modules': sorted({name.split('.')[0] for name in sys.modules})}))
+'''
+
+
+def measure(module, repeat):
+    """
+    在 repeat 个新进程中分别导入模块
+
+    Returns:
+        (导入耗时中位数毫秒, 内存中位数MB, 已加载的顶层模块集合)
+    """
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE, module], cwd=ROOT, check=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return (statistics.median(s['import_ms'] for s in samples),
+            statistics.median(s['rss_mb'] for s in samples),
+            set(samples[-1]['modules']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='应用冷启动基准测试')
+    parser.add_argument('--module', action='append', help='要导入的模块，可重复指定，默认 app')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--forbid', default=','.join(DEFAULT_FORBIDDEN), help='导入时不应加载的模块，逗号分隔')
+    parser.add_argument('--max-import-ms', type=float, help='导入耗时上限')
+    parser.add_argument('--max-rss-mb', type=float, help='导入后常驻内存上限')
+    args = parser.parse_args()
+    forbidden = [name for name in args.forbid.split(',') if name]
+
+    failures = []
+    print(f'{"模块":<24}{"导入耗时":>10}{"内存":>10}  已加载的重量级依赖')
+    for module in args.module or ['app']:
+        import_ms, rss_mb, modules = measure(module, args.repeat)
+        loaded = [name for name in forbidden if name in modules]
+        print(f'{module:<26}{import_ms:>8.0f}ms{rss_mb:>8.1f}MB  {", ".join(loaded) or "-"}')
+        if loaded:
+            failures.append(f'{module}: 导入时加载了 {", ".join(loaded)}')
+        if args.max_import_ms and import_ms > args.max_import_ms:
+            failures.append(f'{module}: 导入耗时 {import_ms:.0f}ms 超过 {args.max_import_ms:.0f}ms')
+        if args.max_rss_mb and rss_mb > args.max_rss_mb:
+            failures.append(f'{module}: 内存 {rss_mb:.1f}MB 超过 {args.max_rss_mb:.1f}MB')
+
+    if failures:
+        print('启动成本超标:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
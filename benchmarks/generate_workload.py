@@ -0,0 +1,215 @@
+"""合成评估数据生成器
+
+按指定规模向一个独立的数据库写入员工（各角色人数可配）、季度任务、评估维度，
+以及完全或部分提交的评估矩阵，供基准测试和压力测试在已知规模的数据上运行。
+
+员工按 --team-size 分组，每组分配部门经理、部门负责人和分管领导；组内每名评估者
+对组内其他员工打分。每个 (评估者, 任务) 按比例随机为已提交、草稿或尚未评估。
+全部数据通过驱动层批量插入写入（记录ID在内存中分配，总分同时算好），最后重建物化结果表。
+
+用法:
+    python benchmarks/generate_workload.py --db /tmp/workload.db --staff 4500 --managers 250 \\
+        --heads 200 --leaders 50 --quarters 8 --team-size 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text
+
+from extensions import db
+from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationScore, EvaluationTask
+from password_hashing import hash_password
+from results_engine import rebuild_results
+
+# 批量插入时每批的行数
+CHUNK_SIZE = 20000
+
+# 生成评分时可选的分值
+SCORE_CHOICES = (2.5, 3, 3.5, 4, 4, 4.5, 4.5, 5)
+
+DIMENSION_NAMES = ('本职工作', '附加业绩', '工作态度', '团队协作', '学习成长', '创新能力', '执行力', '沟通能力')
+
+
+def create_workload_app(db_path):
+    """创建只连接指定数据库的Flask应用（不导入app.py，避免改动项目自带的数据库）"""
+    workload_app = Flask(__name__)
+    workload_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(db_path)}'
+    workload_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(workload_app)
+    return workload_app
+
+
+def _bulk_insert(model, rows, columns=None):
+    """
+    用数据库驱动的 executemany 分批插入，跳过 SQLAlchemy 的逐行参数处理
+
+    Args:
+        model: 目标模型
+        rows: 行字典（键为数据库列名）列表；传入 columns 时为按 columns 顺序排列的元组列表
+        columns: 列名列表
+    """
+    if not rows:
+        return
+    if columns is None:
+        columns = list(rows[0])
+        rows = [tuple(row[column] for column in columns) for row in rows]
+    sql = f'INSERT INTO {model.__tablename__} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+    connection = db.session.connection()
+    for start in range(0, len(rows), CHUNK_SIZE):
+        connection.exec_driver_sql(sql, rows[start:start + CHUNK_SIZE])
+
+
+def _dimension_weights(count):
+    # 权重合计为1，保留两位小数，余数计入第一个维度
+    base = round(1.0 / count, 2)
+    weights = [base] * count
+    weights[0] = round(1.0 - base * (count - 1), 2)
+    return weights
+
+
+def generate_workload(staff=200, managers=10, heads=10, leaders=4, quarters=4, dimensions=5, team_size=20,
+                      submit_ratio=0.9, draft_ratio=0.05, seed=None, start_year=None):
+    """
+    在当前应用上下文的数据库中生成评估数据
+
+    Args:
+        staff / managers / heads / leaders: 员工、部门经理、部门负责人、分管领导人数
+        quarters: 生成的季度任务数，从 start_year 第一季度开始
+        dimensions: 评估维度数
+        team_size: 每组员工人数，组内互评
+        submit_ratio: (评估者, 任务) 已提交的比例
+        draft_ratio: (评估者, 任务) 只保存了草稿的比例，其余为尚未评估
+        seed: 随机数种子
+        start_year: 第一个任务的年份，默认为今年往前推 quarters 个季度
+    Returns:
+        各表生成行数的字典
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    today = datetime.utcnow()
+    # 与 SQLAlchemy 在 SQLite 中存储 DateTime 的格式一致
+    now = today.strftime('%Y-%m-%d %H:%M:%S.%f')
+    # 按当前配置的方法生成，登录时不会触发重新哈希
+    password_hash = hash_password('password')
+
+    # 员工：管理员 + 各角色人员
+    employees = [dict(employee_id='10000', name='系统管理员', position='管理员', role='员工', is_admin=True, is_frozen=False,
+                      password_hash=password_hash, position_coefficient=1.0, created_at=now, updated_at=now)]
+    for role, count in (('员工', staff), ('部门经理', managers), ('部门负责人', heads), ('分管领导', leaders)):
+        for i in range(count):
+            employees.append(dict(employee_id=str(20000 + len(employees)), name=f'{role}{i + 1}', position=role,
+                                  role=role, is_admin=False, is_frozen=False, password_hash=password_hash,
+                                  position_coefficient=rng.choice((0.9, 1.0, 1.0, 1.1, 1.2)),
+                                  created_at=now, updated_at=now))
+    for employee_id, row in enumerate(employees, start=1):
+        row['id'] = employee_id
+    _bulk_insert(Employee, employees)
+
+    weights = _dimension_weights(dimensions)
+    dimension_rows = [dict(id=i + 1, name=DIMENSION_NAMES[i % len(DIMENSION_NAMES)] + ('' if i < len(DIMENSION_NAMES) else str(i)),
+                           weight=weight, status='published', created_at=now, updated_at=now)
+                      for i, weight in enumerate(weights)]
+    _bulk_insert(EvaluationDimension, dimension_rows)
+
+    start_year = start_year or today.year - (quarters + 3) // 4
+    task_rows = [dict(id=i + 1, year=start_year + i // 4, quarter=i % 4 + 1,
+                      name=f'{start_year + i // 4}年第{i % 4 + 1}季度考评', status='published',
+                      created_at=now, updated_at=now)
+                 for i in range(quarters)]
+    _bulk_insert(EvaluationTask, task_rows)
+
+    # 分组：员工按 team_size 切分，非员工角色轮流分配到各组
+    staff_ids = [row['id'] for row in employees if row['role'] == '员工' and not row['is_admin']]
+    teams = [{'staff': staff_ids[i:i + team_size], 'others': []} for i in range(0, len(staff_ids), team_size)]
+    if teams:
+        others = [row['id'] for row in employees if row['role'] != '员工']
+        for i, employee_id in enumerate(others):
+            teams[i % len(teams)]['others'].append(employee_id)
+
+    # 评估记录和评分数据量大，直接生成元组；持久化总分列在表上名为 total_score
+    record_columns = ('id', 'evaluator_id', 'evaluatee_id', 'task_id', 'status', 'submitted_at', 'created_at',
+                      'updated_at', 'total_score', 'weight_sum')
+    score_columns = ('evaluation_record_id', 'dimension_id', 'score')
+    pairs = []
+    for task in task_rows:
+        for team in teams:
+            for evaluator_id in team['staff'] + team['others']:
+                draw = rng.random()
+                if draw >= submit_ratio + draft_ratio:
+                    continue
+                status = 'submitted' if draw < submit_ratio else 'draft'
+                pairs.extend((evaluator_id, evaluatee_id, task['id'], status)
+                             for evaluatee_id in team['staff'] if evaluatee_id != evaluator_id)
+
+    # 一次生成全部评分矩阵（记录数 × 维度数），总分规则与 EvaluationRecord.total_score 相同
+    values = np_rng.choice(SCORE_CHOICES, size=(len(pairs), len(weights)))
+    totals = np.minimum((values * np.array(weights)).sum(axis=1) * 20, 100.0).tolist()
+    weight_sum = sum(weights)
+    records = [(record_id, evaluator_id, evaluatee_id, task_id, status, now, now, now, round(total, 2), weight_sum)
+               for record_id, ((evaluator_id, evaluatee_id, task_id, status), total)
+               in enumerate(zip(pairs, totals), start=1)]
+    record_ids = np.arange(1, len(pairs) + 1).repeat(len(weights)).tolist()
+    dimension_ids = [row['id'] for row in dimension_rows] * len(pairs)
+    scores = list(zip(record_ids, dimension_ids, values.ravel().tolist()))
+
+    # 先插入数据再建二级索引，比逐行维护索引快得多
+    connection = db.session.connection()
+    indexes = list(EvaluationRecord.__table__.indexes) + list(EvaluationScore.__table__.indexes)
+    for index in indexes:
+        index.drop(connection)
+    _bulk_insert(EvaluationRecord, records, record_columns)
+    _bulk_insert(EvaluationScore, scores, score_columns)
+    for index in indexes:
+        index.create(connection)
+    rebuild_results()
+    db.session.commit()
+    return {'employees': len(employees), 'tasks': len(task_rows), 'dimensions': len(dimension_rows),
+            'records': len(records), 'scores': len(scores)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成评估数据')
+    parser.add_argument('--db', required=True, help='目标SQLite数据库文件（不能是已有数据的数据库）')
+    parser.add_argument('--staff', type=int, default=200)
+    parser.add_argument('--managers', type=int, default=10)
+    parser.add_argument('--heads', type=int, default=10)
+    parser.add_argument('--leaders', type=int, default=4)
+    parser.add_argument('--quarters', type=int, default=4)
+    parser.add_argument('--dimensions', type=int, default=5)
+    parser.add_argument('--team-size', type=int, default=20)
+    parser.add_argument('--submit-ratio', type=float, default=0.9)
+    parser.add_argument('--draft-ratio', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--reset', action='store_true', help='先清空目标数据库中的全部表')
+    args = parser.parse_args()
+
+    workload_app = create_workload_app(args.db)
+    with workload_app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if Employee.query.first():
+            parser.error(f'{args.db} 中已有数据，使用 --reset 清空后重新生成')
+        # 生成的是一次性数据，关闭同步写盘以加快批量插入
+        db.session.execute(text('PRAGMA synchronous=OFF'))
+
+        start = time.perf_counter()
+        counts = generate_workload(staff=args.staff, managers=args.managers, heads=args.heads,
+                                   leaders=args.leaders, quarters=args.quarters, dimensions=args.dimensions,
+                                   team_size=args.team_size, submit_ratio=args.submit_ratio,
+                                   draft_ratio=args.draft_ratio, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        print(', '.join(f'{name} {count}' for name, count in counts.items()) + f'，耗时 {elapsed:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
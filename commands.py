@@ -0,0 +1,151 @@
+"""数据库维护命令
+
+建表、补齐旧版本表结构、初始数据和派生数据的修复都放在这里，由部署脚本显式执行，
+导入应用（每个 gunicorn 工作进程启动、维护脚本 from app import app）时不再访问数据库。
+
+    flask init-db                         # 首次部署或升级后执行，可重复执行
+    flask init-db --reset-admin-password  # 同时把默认管理员密码重置为 password
+    flask rebuild-results                 # 从原始评分重建物化结果表
+"""
+import click
+from loguru import logger
+from sqlalchemy import cast, column as sql_column, false as sql_false, table as sql_table
+
+from background_jobs import fail_interrupted_jobs
+from extensions import db
+from lookup_cache import invalidate
+from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationResult, EvaluationScore
+from results_engine import rebuild_results, verify_results
+from schema_guard import create_index, ensure_columns, ensure_indexes, set_not_null
+
+# 新数据库中预置的评估维度及权重
+DEFAULT_DIMENSIONS = (
+    ('本职工作', 0.5),
+    ('附加业绩', 0.2),
+    ('合规守纪', 0.15),
+    ('互助', 0.1),
+    ('勤勉', 0.05),
+)
+
+# 默认管理员工号及初始密码
+DEFAULT_ADMIN_ID = '10000'
+DEFAULT_PASSWORD = 'password'
+
+
+def upgrade_schema():
+    """建表，并补齐旧版本数据库中缺失的列和索引（DDL 由当前数据库方言生成，见 schema_guard.py）"""
+    db.create_all()
+    try:
+        with db.engine.begin() as connection:
+            ensure_columns(connection, 'evaluation_task', [
+                db.Column('status', db.String(20), server_default='published', nullable=False)])
+            ensure_columns(connection, 'evaluation_dimension', [
+                db.Column('status', db.String(20), server_default='published', nullable=False)])
+            # 持久化总分列
+            ensure_columns(connection, 'evaluation_records', [
+                db.Column('total_score', db.Float), db.Column('weight_sum', db.Float)])
+            # 会话身份快照的版本号和密码版本号
+            ensure_columns(connection, 'employees', [
+                db.Column('auth_version', db.Integer, server_default='0', nullable=False),
+                db.Column('credential_version', db.Integer, server_default='0', nullable=False)])
+            ensure_columns(connection, 'employee', [
+                db.Column('password_hash', db.String(128)),
+                db.Column('is_admin', db.Boolean, server_default=sql_false())])
+    except Exception as e:
+        logger.warning(f'补充缺失列时出错: {str(e)}')
+
+    # 旧版本的employee表（现已迁移到employees）没有工号列：先用主键填充，再加唯一索引和非空约束
+    try:
+        with db.engine.begin() as connection:
+            if ensure_columns(connection, 'employee', [db.Column('employee_id', db.String(20))]):
+                legacy_employee = sql_table('employee', sql_column('id'), sql_column('employee_id'))
+                connection.execute(legacy_employee.update().values(
+                    employee_id=cast(legacy_employee.c.id, db.String(20))))
+                create_index(connection, 'employee_id_unique', 'employee', ['employee_id'], unique=True)
+                set_not_null(connection, 'employee', 'employee_id', db.String(20))
+    except Exception as e:
+        logger.warning(f'处理employee表时出错: {str(e)}')
+
+    # 补建评估记录和评分的索引/唯一约束（已有重复数据时需先运行 flask db upgrade 合并）
+    for index_name, error in ensure_indexes(db.engine, (EvaluationRecord.__table__, EvaluationScore.__table__)):
+        logger.warning(f'创建索引 {index_name} 失败，请运行 flask db upgrade 合并重复数据: {str(error)}')
+
+
+def seed_defaults(reset_admin_password=False):
+    """
+    写入初始数据：默认评估维度、默认管理员，并为没有密码的员工设置初始密码
+
+    Args:
+        reset_admin_password: 是否把已存在的默认管理员密码重置为初始密码
+    """
+    if not EvaluationDimension.query.first():
+        db.session.add_all([EvaluationDimension(name=name, weight=weight) for name, weight in DEFAULT_DIMENSIONS])
+
+    employees_without_password = Employee.query.filter(
+        (Employee.password_hash.is_(None)) |
+        (Employee.password_hash == '') |
+        (Employee.password_hash == 'pbkdf2:sha256:150000$abc123$def456')
+    ).all()
+    for employee in employees_without_password:
+        employee.set_password(DEFAULT_PASSWORD)
+
+    default_admin = Employee.query.filter_by(employee_id=DEFAULT_ADMIN_ID).first()
+    if not default_admin:
+        default_admin = Employee(employee_id=DEFAULT_ADMIN_ID, name='系统管理员', position='管理员')
+        default_admin.set_password(DEFAULT_PASSWORD)
+        db.session.add(default_admin)
+    elif reset_admin_password:
+        default_admin.set_password(DEFAULT_PASSWORD)
+    default_admin.is_admin = True
+    db.session.commit()
+    # 使用共享缓存时，让运行中的工作进程读到新写入的维度和管理员
+    invalidate('dimensions', 'employees')
+
+
+def backfill_derived_data():
+    """补算派生数据：首次部署物化结果表时生成结果，新增的持久化总分列为空时补算"""
+    if not EvaluationResult.query.first() and EvaluationRecord.query.filter_by(status='submitted').first():
+        rebuild_results()
+        db.session.commit()
+
+    if EvaluationRecord.query.filter(EvaluationRecord.cached_total_score.is_(None)).first():
+        EvaluationRecord.refresh_cached_totals(EvaluationRecord.cached_total_score.is_(None))
+        db.session.commit()
+
+
+def init_database(reset_admin_password=False):
+    """依次执行表结构补齐、初始数据和派生数据补算，可重复执行"""
+    upgrade_schema()
+    seed_defaults(reset_admin_password)
+    backfill_derived_data()
+    # 部署时没有工作进程在运行，之前未完成的后台任务已随进程退出而中断
+    interrupted = fail_interrupted_jobs()
+    if interrupted:
+        logger.warning(f'{interrupted} 个未完成的后台任务已标记为失败')
+
+
+def register_commands(app):
+    """为应用注册数据库维护命令"""
+
+    @app.cli.command('init-db')
+    @click.option('--reset-admin-password', is_flag=True, help=f'把默认管理员 {DEFAULT_ADMIN_ID} 的密码重置为初始密码')
+    def init_db_command(reset_admin_password):
+        """建表、补齐表结构、写入初始数据并补算派生数据"""
+        init_database(reset_admin_password)
+        click.echo('数据库初始化完成')
+
+    @app.cli.command('rebuild-results')
+    @click.option('--task-id', type=int, default=None, help='只处理指定任务，默认处理全部任务')
+    @click.option('--check-only', is_flag=True, help='只核对物化结果与原始评分，不重建')
+    def rebuild_results_command(task_id, check_only):
+        """从原始评分重建 evaluation_results 表并核对结果"""
+        if not check_only:
+            rebuild_results(task_id)
+            db.session.commit()
+            click.echo('物化结果表已重建')
+        mismatches = verify_results(task_id)
+        for task, evaluatee_id, role, actual, expected in mismatches:
+            click.echo(f'不一致: 任务{task} 被评估者{evaluatee_id} {role} 物化={actual} 实际={expected}')
+        if mismatches:
+            raise SystemExit(1)
+        click.echo('物化结果与原始评分一致')
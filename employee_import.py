@@ -0,0 +1,202 @@
+"""批量导入员工
+
+导入名册时密码哈希占了绝大部分耗时（PBKDF2 每个密码约 0.1~0.2 秒，见 password_hashing.py），
+逐行 set_password 会让一次两千人的导入占用请求进程数分钟。这里先整理出待导入的行并分配工号，
+再用进程池在多个CPU核心上并行计算哈希，最后一次性批量插入。
+
+名册以 openpyxl 只读模式逐行读取（不创建单元格对象，内存占用不随行数增长），现有姓名和工号
+一次性载入集合，新工号在内存中分配，整个导入的耗时与行数成线性关系。
+
+配置项:
+    IMPORT_HASH_PROCESSES: 计算哈希的进程数，默认 0 表示使用全部CPU核心
+"""
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+
+from flask import current_app
+
+from extensions import db
+from models import Employee
+from password_hashing import hash_password, password_hash_method
+
+# 密码少于此数量时直接在当前进程计算，启动进程池的开销不划算
+PARALLEL_MIN_PASSWORDS = 16
+
+# 进度回调的大致次数
+PROGRESS_STEPS = 20
+
+# 名册必须包含的表头
+ROSTER_HEADERS = ('姓名', '职位', '默认密码')
+
+ImportSummary = namedtuple('ImportSummary', 'imported duplicate_names')
+
+
+@contextmanager
+def open_roster(stream):
+    """
+    以只读流式模式打开名册工作簿的活动工作表
+
+    Args:
+        stream: xlsx 文件对象（需支持 seek，例如上传文件的 stream）
+    Returns:
+        上下文管理器，产出 (表头元组, 数据行迭代器)，表格为空时表头为 None；退出时关闭工作簿
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        yield next(rows, None), rows
+    finally:
+        workbook.close()
+
+
+def roster_columns(headers):
+    """
+    校验表头并返回姓名、职位、默认密码的列号（从1开始）
+
+    Args:
+        headers: 表头行
+    Returns:
+        (姓名列, 职位列, 密码列)
+    Raises:
+        ValueError: 没有表头或缺少必需的表头，异常信息可直接展示给用户
+    """
+    if not headers:
+        raise ValueError('Excel文件格式错误，未找到表头行')
+    headers = list(headers)
+    if not all(header in headers for header in ROSTER_HEADERS):
+        raise ValueError('Excel表头必须包含：' + '、'.join(ROSTER_HEADERS))
+    return tuple(headers.index(header) + 1 for header in ROSTER_HEADERS)
+
+
+def roster_rows(rows, columns):
+    """
+    从数据行中按列号取出导入所需的字段
+
+    Args:
+        rows: open_roster 产出的数据行迭代器
+        columns: 各字段的列号（从1开始），如 (姓名列, 职位列, 密码列)
+    Returns:
+        字段元组的生成器；只读模式下行尾的空单元格可能被省略，缺失的字段为 None
+    """
+    for row in rows:
+        yield tuple(row[column - 1] if column <= len(row) else None for column in columns)
+
+
+def _hash_process_count():
+    return current_app.config.get('IMPORT_HASH_PROCESSES') or os.cpu_count() or 1
+
+
+def hash_passwords(passwords, method=None, processes=None, progress=None):
+    """
+    计算一批密码的哈希，数量足够多时分配到多个进程
+
+    Args:
+        passwords: 明文密码列表
+        method: 哈希方法，默认取当前配置
+        processes: 进程数，默认取配置 IMPORT_HASH_PROCESSES
+        progress: 进度回调 progress(已完成数, 总数)
+    Returns:
+        与 passwords 顺序一致的哈希列表
+    """
+    method = method or password_hash_method()
+    total = len(passwords)
+    processes = min(processes or _hash_process_count(), total)
+    step = max(1, total // PROGRESS_STEPS)
+    hashes = []
+
+    def collect(password_hash):
+        hashes.append(password_hash)
+        if progress and (len(hashes) % step == 0 or len(hashes) == total):
+            progress(len(hashes), total)
+
+    if processes <= 1 or total < PARALLEL_MIN_PASSWORDS:
+        for password in passwords:
+            collect(hash_password(password, method))
+        return hashes
+
+    # 用 spawn 启动子进程：请求进程中可能有其他线程持有锁，fork 出的子进程会继承这些锁
+    context = multiprocessing.get_context('spawn')
+    chunksize = max(1, total // (processes * 4))
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        for password_hash in executor.map(hash_password, passwords, repeat(method), chunksize=chunksize):
+            collect(password_hash)
+    return hashes
+
+
+def import_employees(rows, processes=None, progress=None):
+    """
+    批量导入员工：跳过信息不全和姓名重复的行，分配工号，并行计算密码哈希后批量插入（不提交）
+
+    Args:
+        rows: (姓名, 职位, 默认密码) 元组的可迭代对象，只遍历一次
+        processes: 计算哈希的进程数，默认取配置 IMPORT_HASH_PROCESSES
+        progress: 哈希计算的进度回调 progress(已完成数, 总数)
+    Returns:
+        ImportSummary(导入人数, 重复的姓名列表)
+    """
+    existing_names = set()
+    existing_ids = set()
+    for name, employee_id in db.session.query(Employee.name, Employee.employee_id):
+        existing_names.add(name)
+        existing_ids.add(employee_id)
+    duplicate_names = {}  # 按出现顺序去重
+    pending = []
+    for name, position, password in rows:
+        if not all([name, position, password]):
+            continue  # 跳过空行
+        if name in existing_names:
+            duplicate_names[name] = None
+            continue
+        existing_names.add(name)  # 防止当前批次内重复
+        pending.append((name, position, str(password)))
+    if not pending:
+        return ImportSummary(0, list(duplicate_names))
+
+    # 新工号从现有最大的数字工号之后连续编号，比最大值大的数字不可能与现有工号重复
+    start_id = max((int(employee_id) for employee_id in existing_ids if employee_id.isdigit()), default=0) + 1
+    employee_ids = [str(start_id + offset) for offset in range(len(pending))]
+
+    password_hashes = hash_passwords([password for _, _, password in pending],
+                                     processes=processes, progress=progress)
+    db.session.execute(Employee.__table__.insert(), [
+        dict(employee_id=employee_id, name=name, position=position, password_hash=password_hash, is_admin=False)
+        for employee_id, (name, position, _), password_hash in zip(employee_ids, pending, password_hashes)
+    ])
+    return ImportSummary(len(pending), list(duplicate_names))
+
+
+def import_roster(stream, processes=None, progress=None):
+    """
+    读取名册文件并导入员工（不提交），供导入路由和后台任务共用
+
+    Args:
+        stream: xlsx 文件对象
+        processes: 计算哈希的进程数
+        progress: 哈希计算的进度回调 progress(已完成数, 总数)
+    Returns:
+        ImportSummary
+    Raises:
+        ValueError: 名册格式错误
+    """
+    with open_roster(stream) as (headers, rows):
+        return import_employees(roster_rows(rows, roster_columns(headers)), processes=processes, progress=progress)
+
+
+def summary_messages(summary):
+    """
+    导入结果的提示信息
+
+    Returns:
+        [(类别, 信息)]，类别为 success / warning / info
+    """
+    messages = []
+    if summary.imported > 0:
+        messages.append(('success', f'成功导入 {summary.imported} 名员工'))
+    if summary.duplicate_names:
+        messages.append(('warning', f"跳过 {len(summary.duplicate_names)} 个重复姓名: {', '.join(summary.duplicate_names)}"))
+    return messages or [('info', '未导入任何员工数据')]
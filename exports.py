@@ -0,0 +1,225 @@
+"""Excel 导出
+
+考评结果表和评估汇总表的生成逻辑，由同步下载路由和后台任务（见 background_jobs.py）共用。
+pandas / openpyxl / xlsxwriter 只在生成时加载，避免拖慢应用启动。
+"""
+from datetime import datetime
+
+from lookup_cache import get_admin_employee, get_employees
+from models import EvaluationRecord, EvaluationTask
+from results_engine import compute_evaluation_results
+from score_matrix import build_score_matrix
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _report(progress, done, total):
+    if progress:
+        progress(done, total)
+
+
+# 考评结果表的列：(结果字典键, 表头)
+RESULT_COLUMNS = (
+    ('name', '姓名'),
+    ('position', '岗位'),
+    ('dept_head_score', '部门负责人分数'),
+    ('dept_manager_score', '部门经理分数'),
+    ('peer_score', '员工互评分数'),
+    ('leader_score', '分管领导分数'),
+    ('final_score', '最终分数'),
+    ('performance_level', '绩效等级'),
+)
+SCORE_KEYS = ('dept_head_score', 'dept_manager_score', 'peer_score', 'leader_score', 'final_score')
+
+
+def _text_width(text):
+    # 中文内容宽度系数调整
+    return len(text) * 1.5 if any('\u4e00' <= char <= '\u9fff' for char in text) else len(text)
+
+
+def _result_rows(results):
+    """按列顺序取出每行的值，分数保留两位小数，缺失值为 None"""
+    for result in results:
+        row = []
+        for key, _ in RESULT_COLUMNS:
+            value = result.get(key)
+            if key in SCORE_KEYS and value is not None:
+                value = round(value, 2)
+            row.append(value)
+        yield row
+
+
+def _column_widths(rows):
+    """
+    在一次遍历中计算各列宽度：取表头宽度与内容宽度的较大值，岗位列只按内容宽度设置
+
+    Args:
+        rows: _result_rows 生成的行
+    Returns:
+        各列宽度列表
+    """
+    widths = [len(label) * 1.5 + 2 for _, label in RESULT_COLUMNS]
+    position_col = [key for key, _ in RESULT_COLUMNS].index('position')
+    widths[position_col] = 0
+    for row in rows:
+        for col_num, value in enumerate(row):
+            if value is not None:
+                cell_width = _text_width(str(value))
+                if cell_width > widths[col_num]:
+                    widths[col_num] = cell_width + 1
+    return widths
+
+
+def write_evaluation_results(output, title, results, progress=None):
+    """
+    把考评结果写入 xlsx。
+
+    使用 xlsxwriter 的 constant_memory 模式逐行写出，每写完一行即刷到临时文件，
+    内存占用不随行数增长；列宽在写入前对原始值遍历一次算出。
+
+    Args:
+        output: 文件路径或可写的二进制文件对象
+        title: 标题行内容
+        results: 结果字典列表，见 compute_evaluation_results
+        progress: 进度回调 progress(已写行数, 总行数)
+    """
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('绩效考评结果')
+
+    title_format = workbook.add_format({'font_size': 20, 'bold': True, 'align': 'center', 'valign': 'vcenter', 'border': 1})
+    # 设置表头和数据单元格格式（表头添加自动换行）
+    header_format = workbook.add_format({'font_size': 12, 'align': 'center', 'valign': 'vcenter', 'border': 1, 'bold': True, 'text_wrap': True})
+    cell_format = workbook.add_format({'align': 'center', 'valign': 'vcenter', 'border': 1})
+    empty_cell_format = workbook.add_format({'align': 'center', 'valign': 'vcenter'})
+
+    # 自动调整列宽并设置默认格式（无边框）
+    for col_num, width in enumerate(_column_widths(_result_rows(results))):
+        worksheet.set_column(col_num, col_num, width, empty_cell_format)
+
+    # constant_memory 模式只能按行顺序写入：标题行、表头行、数据行
+    worksheet.merge_range(0, 0, 0, len(RESULT_COLUMNS) - 1, title, title_format)
+    for col_num, (_, label) in enumerate(RESULT_COLUMNS):
+        worksheet.write(1, col_num, label, header_format)
+
+    total = len(results)
+    step = max(total // 20, 1)
+    for row_num, row in enumerate(_result_rows(results), start=2):
+        # 只为非空单元格添加边框
+        for col_num, value in enumerate(row):
+            if value is not None:
+                worksheet.write(row_num, col_num, value, cell_format)
+        done = row_num - 1
+        if done % step == 0 or done == total:
+            _report(progress, done, total)
+
+    workbook.close()
+
+
+def evaluation_results_workbook(task, department_rating, output, progress=None):
+    """
+    生成考评结果表（各角色分数、最终分数和绩效等级）
+
+    Args:
+        task: 评估任务
+        department_rating: 部门绩效评级
+        output: 文件路径或可写的二进制文件对象；后台任务直接写入结果文件，不在内存中保留整个文件
+        progress: 进度回调 progress(已完成步骤, 总步骤)
+    Returns:
+        下载文件名
+    """
+    # 生成结果（与生成页面共用计算与缓存）
+    results = compute_evaluation_results(task.id, department_rating)
+    # 总步骤：计算结果 1 步，每行 1 步，保存文件 1 步
+    steps = len(results) + 2
+    _report(progress, 1, steps)
+
+    write_evaluation_results(output, task.name, results,
+                             progress=lambda done, total: _report(progress, done + 1, steps))
+    _report(progress, steps, steps)
+    return f'绩效考评结果_{task.name}_{datetime.now().strftime("%Y%m%d%H%M%S")}.xlsx'
+
+
+def evaluation_summary_workbook(task_id, output, progress=None):
+    """
+    生成评估汇总表（被评估者 × 评估者的评分矩阵）
+
+    Args:
+        task_id: 评估任务ID，为 None 时汇总全部任务
+        output: 文件路径或可写的二进制文件对象
+        progress: 进度回调 progress(已完成步骤, 总步骤)
+    Returns:
+        下载文件名
+    """
+    import pandas as pd
+    from openpyxl.styles import Font
+    # 获取所有已提交的评估
+    query = EvaluationRecord.query.filter_by(status='submitted')
+    if task_id:
+        query = query.filter_by(task_id=task_id)
+    # 排除管理员相关的评估记录
+    admin_employee = get_admin_employee()
+    if admin_employee:
+        query = query.filter(
+            ~EvaluationRecord.evaluator_id.in_([admin_employee.id]) &
+            ~EvaluationRecord.evaluatee_id.in_([admin_employee.id])
+        )
+    # 排除employee_id >= '2'的评估者
+    non_valid_evaluators = get_employees(exclude_roles=('员工',), include_admin=True)
+    non_valid_evaluator_ids = [emp.id for emp in non_valid_evaluators]
+    if non_valid_evaluator_ids:
+        query = query.filter(~EvaluationRecord.evaluator_id.in_(non_valid_evaluator_ids))
+    # 只取汇总所需的字段，总分由数据库直接计算
+    all_evaluations = query.with_entities(
+        EvaluationRecord.id,
+        EvaluationRecord.evaluator_id,
+        EvaluationRecord.evaluatee_id,
+        EvaluationRecord.total_score_source().label('total_score')
+    ).all()
+    
+    # 获取任务名称用于文件名
+    task = None
+    task_name = "all_tasks"
+    if task_id:
+        task = EvaluationTask.query.get(task_id)
+        if task:
+            task_name = task.name.replace(" ", "_")
+    evaluators = get_employees(roles=('员工',))
+    evaluatees = get_employees(roles=('员工',))
+
+    # 生成评分矩阵，与页面预览使用相同的结构
+    matrix = build_score_matrix(all_evaluations, evaluators, evaluatees)
+
+    # 创建Excel文件
+    df_data = []
+    for evaluatee, scores, average in matrix.rows():
+        row = {'评估对象': evaluatee.name}
+        for evaluator, score in zip(evaluators, scores):
+            row[evaluator.name] = score
+        row['平均分'] = average
+        df_data.append(row)
+
+    df = pd.DataFrame(df_data)
+
+    _report(progress, 1, 3)
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        # 添加表头
+        df.to_excel(writer, index=False, sheet_name='评估汇总', startrow=1)  # 预留第一行给表头
+        worksheet = writer.sheets['评估汇总']
+        
+        # 设置表头文本
+        if task:
+            title = f"信息技术部{task.year}年{task.quarter}季度绩效互评汇总"
+        else:
+            title = "信息技术部绩效互评汇总"
+        
+        # 合并单元格并设置表头
+        worksheet.merge_cells('A1:Z1')  # 合并A1到Z1的单元格
+        worksheet['A1'] = title
+        
+        # 设置表头样式
+        header_font = Font(bold=True, size=14)
+        worksheet['A1'].font = header_font
+        _report(progress, 2, 3)
+    _report(progress, 3, 3)
+    return f'绩效评估汇总表_{task_name}_{datetime.now().strftime("%Y%m%d%H%M%S")}.xlsx'
@@ -1,3 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
\ No newline at end of file
+from sqlite_tuning import bind_sqlite_pragmas
+
+
+class PooledSQLAlchemy(SQLAlchemy):
+    """
+    服务器数据库使用配置 DATABASE_POOL_OPTIONS 中的连接池参数，SQLite 保持 Flask-SQLAlchemy 的默认连接池；
+    SQLite 引擎在创建时绑定配置 SQLITE_PRAGMAS（见 sqlite_tuning.py）
+    """
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        if not sa_url.drivername.startswith('sqlite'):
+            # SQLALCHEMY_ENGINE_OPTIONS 中显式设置的参数优先；须在父类为 MySQL 填入默认值之前设置
+            for key, value in app.config.get('DATABASE_POOL_OPTIONS', {}).items():
+                options.setdefault(key, value)
+        else:
+            # 不是 create_engine 的参数，在 create_engine 中取出
+            options['sqlite_pragmas'] = app.config.get('SQLITE_PRAGMAS')
+        return super().apply_driver_hacks(app, sa_url, options)
+
+    def create_engine(self, sa_url, engine_opts):
+        pragmas = engine_opts.pop('sqlite_pragmas', None)
+        engine = super().create_engine(sa_url, engine_opts)
+        bind_sqlite_pragmas(engine, pragmas)
+        return engine
+
+
+db = PooledSQLAlchemy()
@@ -85,11 +85,9 @@ class EvaluationForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(EvaluationForm, self).__init__(*args, **kwargs)
-        from models import Employee, EvaluationTask
-        # 加载评估者选项
-
-        # 加载评估任务选项
-        self.task_id.choices = [(t.id, t.name) for t in EvaluationTask.query.filter_by(status='published').order_by(EvaluationTask.year.desc(), EvaluationTask.quarter.desc()).all()]
+        from lookup_cache import get_task_choices
+        # 加载评估任务选项（缓存，发布/删除任务时失效）
+        self.task_id.choices = get_task_choices()
 
 class EvaluationTaskForm(FlaskForm):
     year = StringField('年份', validators=[
@@ -156,6 +154,6 @@ class EvaluationSearchForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(EvaluationSearchForm, self).__init__(*args, **kwargs)
-        from models import Employee
-        # 加载评估对象选项
-        self.evaluatee_id.choices = [(e.id, e.name) for e in Employee.query.all()]
\ No newline at end of file
+        from lookup_cache import get_employee_choices
+        # 加载评估对象选项（缓存，增删改员工时失效）
+        self.evaluatee_id.choices = get_employee_choices()
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""参考数据缓存
+
+评估维度、评估任务和员工名册每季度只变化几次，却几乎在每个页面都要读取。这里把它们缓存为
+只含基本字段的快照（namedtuple，可跨请求、跨进程共享，不会出现脱离会话的ORM对象），
+在管理后台增删改这些数据后由路由显式调用 invalidate_* 使缓存失效。表单下拉选项等由快照派生的
+列表也单独缓存，随所依赖的快照一起失效，构造表单时既不查询数据库也不重新遍历名册。
+
+配置项:
+    LOOKUP_CACHE_ENABLED: 是否启用缓存，默认开启
+    LOOKUP_CACHE_BACKEND: local（进程内，默认）或 redis（多个工作进程共享，失效对所有进程生效）
+    LOOKUP_CACHE_REDIS_URL: redis 连接地址，例如 redis://localhost:6379/0
+    LOOKUP_CACHE_TTL: 缓存有效秒数，默认 300，0 表示不过期。使用进程内缓存部署多个工作进程时，
+        管理操作只会让处理该请求的进程失效，其他进程最多在 TTL 后读到新数据
+"""
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from loguru import logger
+
+from extensions import db
+from models import Employee, EvaluationDimension, EvaluationTask
+
+# 默认管理员工号，不参与评估
+ADMIN_EMPLOYEE_ID = '10000'
+
+DimensionInfo = namedtuple('DimensionInfo', 'id name weight status')
+TaskInfo = namedtuple('TaskInfo', 'id year quarter name status')
+EmployeeInfo = namedtuple('EmployeeInfo',
+                          'id employee_id name position role is_admin is_frozen position_coefficient auth_version')
+
+# 由快照派生的缓存：快照名称 -> 派生缓存名称，快照失效时一并失效
+_DERIVED = {
+    'tasks': ('task_choices',),
+    'employees': ('employee_choices', 'auth_versions'),
+}
+
+# 命中/未命中计数：缓存名称 -> [命中, 未命中]
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class LocalCacheBackend:
+    """进程内缓存"""
+
+    name = 'local'
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at and expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+
+class RedisCacheBackend:
+    """redis 共享缓存；redis 不可用时按未命中处理，直接查询数据库"""
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='pes:lookup:'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+        self._prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self._client.get(self._prefix + key)
+        except self._errors as e:
+            logger.warning(f'读取参考数据缓存失败: {e}')
+            return None
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self._client.set(self._prefix + key, pickle.dumps(value), ex=ttl or None)
+        except self._errors as e:
+            logger.warning(f'写入参考数据缓存失败: {e}')
+
+    def delete(self, *keys):
+        try:
+            self._client.delete(*[self._prefix + key for key in keys])
+        except self._errors as e:
+            logger.warning(f'清除参考数据缓存失败: {e}')
+
+
+def init_lookup_cache(app):
+    """按配置为应用创建缓存后端"""
+    backend = None
+    if app.config.get('LOOKUP_CACHE_BACKEND', 'local') == 'redis':
+        url = app.config.get('LOOKUP_CACHE_REDIS_URL')
+        if not url:
+            logger.warning('未设置 LOOKUP_CACHE_REDIS_URL，参考数据缓存改用进程内缓存')
+        else:
+            try:
+                backend = RedisCacheBackend(url)
+            except (ImportError, ValueError) as e:
+                logger.warning(f'无法使用 redis 参考数据缓存，改用进程内缓存: {e!r}')
+    app.extensions['lookup_cache'] = backend or LocalCacheBackend()
+
+
+def _backend():
+    backend = current_app.extensions.get('lookup_cache')
+    if backend is None:
+        # 未调用 init_lookup_cache 的应用（如独立脚本）使用进程内缓存
+        backend = current_app.extensions.setdefault('lookup_cache', LocalCacheBackend())
+    return backend
+
+
+def _cache_key(name):
+    # 测试和基准脚本会切换数据库，键中包含数据库地址（隐藏其中的密码，避免写入 redis 键名）
+    return f'{name}:{db.engine.url.render_as_string(hide_password=True)}'
+
+
+def _record(name, hit):
+    with _stats_lock:
+        counts = _stats.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+def _cached(name, load):
+    if not current_app.config.get('LOOKUP_CACHE_ENABLED', True):
+        return load()
+    backend = _backend()
+    key = _cache_key(name)
+    value = backend.get(key)
+    _record(name, value is not None)
+    if value is None:
+        value = load()
+        backend.set(key, value, current_app.config.get('LOOKUP_CACHE_TTL', 300))
+    return value
+
+
+def _load_dimensions():
+    return tuple(DimensionInfo(*row) for row in db.session.query(
+        EvaluationDimension.id, EvaluationDimension.name, EvaluationDimension.weight, EvaluationDimension.status
+    ).order_by(EvaluationDimension.id))
+
+
+def _load_tasks():
+    return tuple(TaskInfo(*row) for row in db.session.query(
+        EvaluationTask.id, EvaluationTask.year, EvaluationTask.quarter, EvaluationTask.name, EvaluationTask.status
+    ).order_by(EvaluationTask.id))
+
+
+def _load_employees():
+    return tuple(EmployeeInfo(*row) for row in db.session.query(
+        Employee.id, Employee.employee_id, Employee.name, Employee.position, Employee.role,
+        Employee.is_admin, Employee.is_frozen, Employee.position_coefficient, Employee.auth_version
+    ).order_by(Employee.id))
+
+
+def get_dimensions(status=None):
+    """
+    评估维度快照，按ID排序
+
+    Args:
+        status: 只返回该状态的维度，默认全部
+    Returns:
+        DimensionInfo 列表
+    """
+    dimensions = _cached('dimensions', _load_dimensions)
+    return [d for d in dimensions if status is None or d.status == status]
+
+
+def get_tasks(status=None):
+    """
+    评估任务快照，按ID排序
+
+    Args:
+        status: 只返回该状态的任务，默认全部
+    Returns:
+        TaskInfo 列表
+    """
+    tasks = _cached('tasks', _load_tasks)
+    return [t for t in tasks if status is None or t.status == status]
+
+
+def get_task(task_id):
+    """按ID返回任务快照，不存在时返回 None"""
+    try:
+        task_id = int(task_id)
+    except (TypeError, ValueError):
+        return None
+    return next((t for t in _cached('tasks', _load_tasks) if t.id == task_id), None)
+
+
+def get_employees(roles=None, exclude_roles=None, include_admin=False, include_frozen=True):
+    """
+    员工名册快照，按ID排序
+
+    Args:
+        roles: 只返回这些角色的员工
+        exclude_roles: 排除这些角色的员工
+        include_admin: 是否包含默认管理员
+        include_frozen: 是否包含已冻结的员工
+    Returns:
+        EmployeeInfo 列表
+    """
+    return [e for e in _cached('employees', _load_employees)
+            if (include_admin or e.employee_id != ADMIN_EMPLOYEE_ID)
+            and (include_frozen or not e.is_frozen)
+            and (roles is None or e.role in roles)
+            and (exclude_roles is None or e.role not in exclude_roles)]
+
+
+def get_admin_employee():
+    """返回默认管理员的快照，不存在时返回 None"""
+    return next((e for e in _cached('employees', _load_employees) if e.employee_id == ADMIN_EMPLOYEE_ID), None)
+
+
+def get_task_choices():
+    """已发布任务的下拉选项 (id, 名称)，按年份、季度倒序"""
+    return _cached('task_choices', lambda: tuple(
+        (t.id, t.name) for t in sorted(get_tasks(status='published'), key=lambda t: (t.year, t.quarter), reverse=True)))
+
+
+def get_employee_choices():
+    """全部员工（含管理员和已冻结员工）的下拉选项 (id, 姓名)，按ID排序"""
+    return _cached('employee_choices', lambda: tuple((e.id, e.name) for e in get_employees(include_admin=True)))
+
+
+def get_auth_version(employee_pk):
+    """员工（主键）当前的登录身份版本号，员工不存在时返回 None"""
+    versions = _cached('auth_versions', lambda: {e.id: e.auth_version for e in get_employees(include_admin=True)})
+    return versions.get(employee_pk)
+
+
+def invalidate(*names):
+    """使指定名称（dimensions / tasks / employees）的缓存及由其派生的缓存失效，应在提交事务之后调用"""
+    names = [derived for name in names for derived in (name,) + _DERIVED.get(name, ())]
+    _backend().delete(*[_cache_key(name) for name in names])
+
+
+def invalidate_dimensions():
+    invalidate('dimensions')
+
+
+def invalidate_tasks():
+    invalidate('tasks')
+
+
+def invalidate_employees():
+    invalidate('employees')
+
+
+def lookup_cache_stats():
+    """
+    返回缓存后端和各缓存的命中统计（当前进程）
+
+    Returns:
+        {'backend': 名称, 'caches': {名称: {'hits', 'misses', 'hit_rate'}}}
+    """
+    with _stats_lock:
+        snapshot = {name: tuple(counts) for name, counts in _stats.items()}
+    caches = {}
+    for name, (hits, misses) in snapshot.items():
+        total = hits + misses
+        caches[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total, 4) if total else None}
+    return {'backend': _backend().name, 'caches': caches}
+
+
+def reset_lookup_cache_stats():
+    with _stats_lock:
+        _stats.clear()
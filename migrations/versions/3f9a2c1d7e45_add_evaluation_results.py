@@ -0,0 +1,51 @@
+"""Add materialized evaluation_results table
+
+Revision ID: 3f9a2c1d7e45
+Revises: 78d0005fe173
+Create Date: 2025-09-02 10:12:08.413202
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a2c1d7e45'
+down_revision = '78d0005fe173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'evaluation_results' not in inspector.get_table_names():
+        op.create_table('evaluation_results',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('evaluatee_id', sa.Integer(), nullable=False),
+        sa.Column('evaluator_role', sa.String(length=20), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('score_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['evaluatee_id'], ['employees.id'], ),
+        sa.ForeignKeyConstraint(['task_id'], ['evaluation_tasks.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('task_id', 'evaluatee_id', 'evaluator_role')
+        )
+
+        # 根据已提交的评分生成初始结果（之后由提交/退回路径增量维护，可用 flask rebuild-results 重建）
+        op.execute("""
+            INSERT INTO evaluation_results (task_id, evaluatee_id, evaluator_role, score_sum, score_count, updated_at)
+            SELECT r.task_id, r.evaluatee_id, e.role, SUM(s.score), COUNT(s.id), CURRENT_TIMESTAMP
+            FROM evaluation_scores s
+            JOIN evaluation_records r ON s.evaluation_record_id = r.id
+            JOIN employees e ON e.id = r.evaluator_id
+            WHERE r.status = 'submitted'
+            GROUP BY r.task_id, r.evaluatee_id, e.role
+        """)
+
+
+def downgrade():
+    op.drop_table('evaluation_results')
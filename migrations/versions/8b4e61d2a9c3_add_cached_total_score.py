@@ -0,0 +1,52 @@
+"""Add persisted total_score and weight_sum to evaluation_records
+
+Revision ID: 8b4e61d2a9c3
+Revises: 3f9a2c1d7e45
+Create Date: 2025-09-04 15:26:41.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e61d2a9c3'
+down_revision = '3f9a2c1d7e45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    column_names = [col['name'] for col in inspector.get_columns('evaluation_records')]
+
+    with op.batch_alter_table('evaluation_records', schema=None) as batch_op:
+        if 'total_score' not in column_names:
+            batch_op.add_column(sa.Column('total_score', sa.Float(), nullable=True))
+        if 'weight_sum' not in column_names:
+            batch_op.add_column(sa.Column('weight_sum', sa.Float(), nullable=True))
+
+    # 根据现有评分补算（规则与 EvaluationRecord.total_score 相同：SUM(score*weight)*20，封顶100分）
+    op.execute("""
+        UPDATE evaluation_records SET
+            weight_sum = (
+                SELECT COALESCE(SUM(d.weight), 0)
+                FROM evaluation_scores s
+                JOIN evaluation_dimensions d ON s.dimension_id = d.id
+                WHERE s.evaluation_record_id = evaluation_records.id
+            ),
+            total_score = (
+                SELECT ROUND(CASE WHEN COALESCE(SUM(s.score * d.weight), 0) * 20 > 100
+                                  THEN 100 ELSE COALESCE(SUM(s.score * d.weight), 0) * 20 END, 2)
+                FROM evaluation_scores s
+                JOIN evaluation_dimensions d ON s.dimension_id = d.id
+                WHERE s.evaluation_record_id = evaluation_records.id
+            )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('evaluation_records', schema=None) as batch_op:
+        batch_op.drop_column('weight_sum')
+        batch_op.drop_column('total_score')
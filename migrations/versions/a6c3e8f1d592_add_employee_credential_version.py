@@ -0,0 +1,31 @@
+"""Add credential_version to employees
+
+Revision ID: a6c3e8f1d592
+Revises: f4b8d2e6a107
+Create Date: 2025-09-24 09:41:27.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c3e8f1d592'
+down_revision = 'f4b8d2e6a107'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    column_names = [col['name'] for col in inspector.get_columns('employees')]
+
+    if 'credential_version' not in column_names:
+        with op.batch_alter_table('employees', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('credential_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_column('credential_version')
@@ -0,0 +1,103 @@
+"""Add evaluation hot-path indexes and uniqueness constraints
+
+Revision ID: c5d7e9a1b2f4
+Revises: 8b4e61d2a9c3
+Create Date: 2025-09-08 09:41:17.562930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7e9a1b2f4'
+down_revision = '8b4e61d2a9c3'
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicate_records(conn):
+    """每个 (评估者, 被评估者, 任务) 只保留一条记录：优先保留已提交的，其次保留最新的"""
+    rows = conn.execute(sa.text(
+        'SELECT id, evaluator_id, evaluatee_id, task_id, status FROM evaluation_records ORDER BY id'
+    )).fetchall()
+    keepers = {}
+    for row in rows:
+        key = (row.evaluator_id, row.evaluatee_id, row.task_id)
+        kept = keepers.get(key)
+        if kept is None or row.status == 'submitted' or kept.status != 'submitted':
+            keepers[key] = row
+    kept_ids = {row.id for row in keepers.values()}
+    duplicate_ids = [row.id for row in rows if row.id not in kept_ids]
+
+    for start in range(0, len(duplicate_ids), 500):
+        chunk = {'ids': duplicate_ids[start:start + 500]}
+        conn.execute(sa.text('DELETE FROM evaluation_scores WHERE evaluation_record_id IN :ids')
+                     .bindparams(sa.bindparam('ids', expanding=True)), chunk)
+        conn.execute(sa.text('DELETE FROM evaluation_records WHERE id IN :ids')
+                     .bindparams(sa.bindparam('ids', expanding=True)), chunk)
+    return len(duplicate_ids)
+
+
+def _merge_duplicate_scores(conn):
+    """同一记录同一维度的重复评分只保留最新的一条"""
+    result = conn.execute(sa.text("""
+        DELETE FROM evaluation_scores WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT MAX(id) AS id FROM evaluation_scores GROUP BY evaluation_record_id, dimension_id
+            ) AS latest_scores
+        )
+    """))
+    return result.rowcount
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    removed = _merge_duplicate_records(conn) + _merge_duplicate_scores(conn)
+    if removed:
+        # 清理后重算物化结果和记录上的持久化总分
+        op.execute('DELETE FROM evaluation_results')
+        op.execute("""
+            INSERT INTO evaluation_results (task_id, evaluatee_id, evaluator_role, score_sum, score_count, updated_at)
+            SELECT r.task_id, r.evaluatee_id, e.role, SUM(s.score), COUNT(s.id), CURRENT_TIMESTAMP
+            FROM evaluation_scores s
+            JOIN evaluation_records r ON s.evaluation_record_id = r.id
+            JOIN employees e ON e.id = r.evaluator_id
+            WHERE r.status = 'submitted'
+            GROUP BY r.task_id, r.evaluatee_id, e.role
+        """)
+        op.execute("""
+            UPDATE evaluation_records SET
+                weight_sum = (
+                    SELECT COALESCE(SUM(d.weight), 0)
+                    FROM evaluation_scores s
+                    JOIN evaluation_dimensions d ON s.dimension_id = d.id
+                    WHERE s.evaluation_record_id = evaluation_records.id
+                ),
+                total_score = (
+                    SELECT ROUND(CASE WHEN COALESCE(SUM(s.score * d.weight), 0) * 20 > 100
+                                      THEN 100 ELSE COALESCE(SUM(s.score * d.weight), 0) * 20 END, 2)
+                    FROM evaluation_scores s
+                    JOIN evaluation_dimensions d ON s.dimension_id = d.id
+                    WHERE s.evaluation_record_id = evaluation_records.id
+                )
+        """)
+
+    # 应用启动时可能已补建了部分索引，只创建缺失的
+    inspector = sa.inspect(conn)
+    indexes = [
+        ('ix_evaluation_records_evaluator_task_status', 'evaluation_records', ['evaluator_id', 'task_id', 'status'], False),
+        ('ix_evaluation_records_task_status', 'evaluation_records', ['task_id', 'status'], False),
+        ('uq_evaluation_records_evaluator_evaluatee_task', 'evaluation_records', ['evaluator_id', 'evaluatee_id', 'task_id'], True),
+        ('uq_evaluation_scores_record_dimension', 'evaluation_scores', ['evaluation_record_id', 'dimension_id'], True),
+    ]
+    for name, table_name, columns, unique in indexes:
+        if name not in {index['name'] for index in inspector.get_indexes(table_name)}:
+            op.create_index(name, table_name, columns, unique=unique)
+
+def downgrade():
+    op.drop_index('uq_evaluation_scores_record_dimension', table_name='evaluation_scores')
+    op.drop_index('uq_evaluation_records_evaluator_evaluatee_task', table_name='evaluation_records')
+    op.drop_index('ix_evaluation_records_task_status', table_name='evaluation_records')
+    op.drop_index('ix_evaluation_records_evaluator_task_status', table_name='evaluation_records')
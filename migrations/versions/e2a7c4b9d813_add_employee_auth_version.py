@@ -0,0 +1,31 @@
+"""Add auth_version to employees
+
+Revision ID: e2a7c4b9d813
+Revises: c5d7e9a1b2f4
+Create Date: 2025-09-15 10:12:08.734215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4b9d813'
+down_revision = 'c5d7e9a1b2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    column_names = [col['name'] for col in inspector.get_columns('employees')]
+
+    if 'auth_version' not in column_names:
+        with op.batch_alter_table('employees', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('auth_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_column('auth_version')
@@ -0,0 +1,48 @@
+"""Add background_jobs table
+
+Revision ID: f4b8d2e6a107
+Revises: e2a7c4b9d813
+Create Date: 2025-09-22 14:03:52.918406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d2e6a107'
+down_revision = 'e2a7c4b9d813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'background_jobs' not in inspector.get_table_names():
+        op.create_table(
+            'background_jobs',
+            sa.Column('id', sa.String(length=32), nullable=False),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('progress', sa.Integer(), nullable=False),
+            sa.Column('params', sa.Text(), nullable=True),
+            sa.Column('message', sa.Text(), nullable=True),
+            sa.Column('result_path', sa.String(length=500), nullable=True),
+            sa.Column('result_filename', sa.String(length=255), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['created_by'], ['employees.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'background_jobs' in inspector.get_table_names():
+        op.drop_table('background_jobs')
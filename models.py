@@ -2,7 +2,10 @@ from extensions import db
 from flask_login import UserMixin
 from datetime import datetime
 import pytz
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import hash_password, needs_rehash, verify_password
+from sqlalchemy import bindparam, case, cast, event, func, inspect, select, type_coerce
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.hybrid import hybrid_property
 class Employee(UserMixin, db.Model):
     __tablename__ = 'employees'
     id = db.Column(db.Integer, primary_key=True)
@@ -16,18 +19,48 @@ class Employee(UserMixin, db.Model):
     role = db.Column(db.String(20), default='员工', nullable=False)
     # 岗位系数字段，精确到一位小数
     position_coefficient = db.Column(db.Float, default=1.0, nullable=False)
+    # 登录身份版本号：工号、姓名、职位、角色、管理员/冻结状态或密码版本号变化时加一，
+    # 会话中缓存的身份快照与之不一致时重新从数据库加载（见 session_identity.py）
+    auth_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # 密码版本号：只在设置新密码（set_password）时加一，登录时按新配置重新哈希同一密码不变；
+    # 与会话中记录的值不一致时旧会话失效
+    credential_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    # 会话身份快照中包含的字段
+    IDENTITY_FIELDS = ('employee_id', 'name', 'position', 'role', 'is_admin', 'is_frozen', 'credential_version')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
+        self.credential_version = (self.credential_version or 0) + 1
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        校验密码；校验通过且存储的哈希与当前配置的方法或成本不一致时，按当前配置重新哈希
+
+        Args:
+            password: 明文密码
+        Returns:
+            密码是否正确（重新哈希后需由调用方提交）
+        """
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            # 同一密码只更换哈希参数，不改变密码版本号和身份版本号，其他已登录会话不受影响
+            self.password_hash = hash_password(password)
+        return True
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<Employee {self.name}>'
 
+@event.listens_for(Employee, 'before_update')
+def _bump_auth_version(mapper, connection, target):
+    # 通过 ORM 修改身份字段时递增版本号，使已登录会话中的身份快照失效
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in Employee.IDENTITY_FIELDS):
+        target.auth_version = (target.auth_version or 0) + 1
+
 class EvaluationDimension(db.Model):
     __tablename__ = 'evaluation_dimensions'
     id = db.Column(db.Integer, primary_key=True)
@@ -51,6 +84,17 @@ class EvaluationRecord(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     withdrawal_reason = db.Column(db.Text)
+    # 持久化的总分（列名 total_score）和所评维度的权重合计，评分或维度权重变化时由 refresh_cached_totals 重算
+    cached_total_score = db.Column('total_score', db.Float, default=0)
+    weight_sum = db.Column(db.Float, default=0)
+
+    # 评估页、审批和结果计算均按 (评估者, 任务, 状态) 或 (任务, 状态) 过滤；
+    # 每个评估者在同一任务中对同一被评估者只有一条记录
+    __table_args__ = (
+        db.Index('ix_evaluation_records_evaluator_task_status', 'evaluator_id', 'task_id', 'status'),
+        db.Index('ix_evaluation_records_task_status', 'task_id', 'status'),
+        db.Index('uq_evaluation_records_evaluator_evaluatee_task', 'evaluator_id', 'evaluatee_id', 'task_id', unique=True),
+    )
 
     # 关系
     evaluator = db.relationship('Employee', foreign_keys=[evaluator_id], backref='evaluations_made')
@@ -61,8 +105,14 @@ class EvaluationRecord(db.Model):
     def __repr__(self):
         return f'<Evaluation {self.evaluator.name} -> {self.evaluatee.name} ({self.status})>'
 
-    @property
+    # 查询时通过 with_expression(EvaluationRecord.queried_total_score, EvaluationRecord.total_score)
+    # 直接由数据库算出的总分，避免为计算总分加载全部评分和维度对象；未加载时为 None
+    queried_total_score = db.query_expression()
+
+    @hybrid_property
     def total_score(self):
+        if self.queried_total_score is not None:
+            return self.queried_total_score
         # 仅计算已发布维度的加权总分 (5分制 -> 百分制)
         published_scores = self.scores  # 包含所有维度的评分，不限制发布状态
         total = sum(score.score * score.dimension.weight for score in published_scores)
@@ -75,6 +125,105 @@ class EvaluationRecord(db.Model):
             current_app.logger.warning(f"评估维度权重总和超过100%: {total_weight:.4f}")
         return round(min(total * 20, 100.0), 2)  # 确保总分不超过100分
 
+    @total_score.expression
+    def total_score(cls):
+        # 与实例属性相同的规则：SUM(score*weight)*20，封顶100分，保留两位小数；
+        # 没有评分或权重总和为0时加权和为0，总分即为0
+        weighted_sum = select(
+            func.coalesce(func.sum(EvaluationScore.score * EvaluationDimension.weight), 0)
+        ).select_from(EvaluationScore).join(
+            EvaluationDimension, EvaluationScore.dimension_id == EvaluationDimension.id
+        ).where(
+            EvaluationScore.evaluation_record_id == cls.id
+        ).scalar_subquery()
+        total = weighted_sum * 20
+        capped = case((total > 100.0, 100.0), else_=total)
+        return type_coerce(func.round(cast(capped, db.Numeric(12, 4)), 2), db.Float)
+
+    @classmethod
+    def refresh_cached_totals(cls, *criteria):
+        """
+        在数据库中重算持久化的总分和权重合计
+
+        Args:
+            criteria: 需要重算的评估记录的过滤条件，不传时重算全部记录
+        Returns:
+            更新的记录数
+        """
+        weight_sum = select(
+            func.coalesce(func.sum(EvaluationDimension.weight), 0)
+        ).select_from(EvaluationScore).join(
+            EvaluationDimension, EvaluationScore.dimension_id == EvaluationDimension.id
+        ).where(
+            EvaluationScore.evaluation_record_id == cls.id
+        ).scalar_subquery()
+        return db.session.query(cls).filter(*criteria).update({
+            cls.cached_total_score: cls.total_score,
+            cls.weight_sum: weight_sum,
+        }, synchronize_session=False)
+
+    @classmethod
+    def get_or_create(cls, evaluator_id, evaluatee_id, task_id):
+        """
+        获取评估者在任务中对被评估者的唯一记录，不存在时创建草稿记录
+
+        Args:
+            evaluator_id: 评估者ID
+            evaluatee_id: 被评估者ID
+            task_id: 评估任务ID
+        Returns:
+            已写入数据库（有ID）的评估记录；并发创建时唯一约束冲突后改为读取对方写入的记录
+        """
+        criteria = dict(evaluator_id=evaluator_id, evaluatee_id=evaluatee_id, task_id=task_id)
+        record = cls.query.filter_by(**criteria).first()
+        if record is None:
+            try:
+                with db.session.begin_nested():
+                    record = cls(status='draft', **criteria)
+                    db.session.add(record)
+            except IntegrityError:
+                record = cls.query.filter_by(**criteria).one()
+        return record
+
+    @classmethod
+    def get_or_create_many(cls, evaluator_id, task_id, evaluatee_ids):
+        """
+        批量获取评估者在任务中对多名被评估者的记录，缺失的记录一次性插入为草稿
+
+        Args:
+            evaluator_id: 评估者ID
+            task_id: 评估任务ID
+            evaluatee_ids: 被评估者ID列表
+        Returns:
+            {被评估者ID: 评估记录}
+        """
+        records = {record.evaluatee_id: record
+                   for record in cls.query.filter_by(evaluator_id=evaluator_id, task_id=task_id)}
+        missing = [evaluatee_id for evaluatee_id in evaluatee_ids if evaluatee_id not in records]
+        if missing:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(cls.__table__.insert(), [
+                        dict(evaluator_id=evaluator_id, evaluatee_id=evaluatee_id, task_id=task_id, status='draft')
+                        for evaluatee_id in missing
+                    ])
+            except IntegrityError:
+                # 并发请求已创建了其中部分记录，逐条获取或创建
+                for evaluatee_id in missing:
+                    records[evaluatee_id] = cls.get_or_create(evaluator_id, evaluatee_id, task_id)
+            else:
+                records.update((record.evaluatee_id, record) for record in cls.query.filter(
+                    cls.evaluator_id == evaluator_id, cls.task_id == task_id, cls.evaluatee_id.in_(missing)))
+        return {evaluatee_id: records[evaluatee_id] for evaluatee_id in evaluatee_ids}
+
+    @classmethod
+    def total_score_source(cls):
+        """汇总查询使用的总分表达式：配置 USE_CACHED_TOTAL_SCORE 时读取持久化列，否则实时计算"""
+        from flask import current_app
+        if current_app.config.get('USE_CACHED_TOTAL_SCORE'):
+            return cls.cached_total_score
+        return cls.total_score
+
 class EvaluationTask(db.Model):
     __tablename__ = 'evaluation_tasks'
     id = db.Column(db.Integer, primary_key=True)
@@ -87,6 +236,7 @@ class EvaluationTask(db.Model):
 
     # 关系: 一个任务包含多个评估记录，删除任务时级联删除所有相关评估记录
     records = db.relationship('EvaluationRecord', back_populates='task', cascade='all, delete-orphan', lazy='dynamic')
+    results = db.relationship('EvaluationResult', cascade='all, delete-orphan', lazy='dynamic')
 
     def __repr__(self):
         return self.name
@@ -105,14 +255,95 @@ class EvaluationScore(db.Model):
     score = db.Column(db.Float, nullable=False)
     comment = db.Column(db.String(500))
 
+    # 每条评估记录的每个维度只有一个评分
+    __table_args__ = (
+        db.Index('uq_evaluation_scores_record_dimension', 'evaluation_record_id', 'dimension_id', unique=True),
+    )
+
     # 关系
     record = db.relationship('EvaluationRecord', overlaps="scores")
     dimension = db.relationship('EvaluationDimension')
 
+    @classmethod
+    def set_score(cls, evaluation_record_id, dimension_id, score):
+        """
+        写入某条评估记录在某个维度上的唯一评分，已存在时更新分数
+
+        Args:
+            evaluation_record_id: 评估记录ID
+            dimension_id: 评估维度ID
+            score: 分数
+        Returns:
+            评分对象
+        """
+        criteria = dict(evaluation_record_id=evaluation_record_id, dimension_id=dimension_id)
+        score_record = cls.query.filter_by(**criteria).first()
+        if score_record is None:
+            try:
+                with db.session.begin_nested():
+                    score_record = cls(score=score, **criteria)
+                    db.session.add(score_record)
+                return score_record
+            except IntegrityError:
+                score_record = cls.query.filter_by(**criteria).one()
+        score_record.score = score
+        return score_record
+
+    @classmethod
+    def set_scores(cls, scores):
+        """
+        批量写入评分：一次查询已有评分，已有的批量更新，缺失的批量插入
+
+        Args:
+            scores: {(评估记录ID, 维度ID): 分数}
+        """
+        if not scores:
+            return
+        table = cls.__table__
+        record_ids = {record_id for record_id, _ in scores}
+        existing = {(row.evaluation_record_id, row.dimension_id): row.id
+                    for row in db.session.query(cls.id, cls.evaluation_record_id, cls.dimension_id)
+                    .filter(cls.evaluation_record_id.in_(record_ids))}
+        updates = [{'b_id': existing[key], 'score': score} for key, score in scores.items() if key in existing]
+        inserts = {key: score for key, score in scores.items() if key not in existing}
+        if updates:
+            db.session.execute(table.update().where(table.c.id == bindparam('b_id')).values(score=bindparam('score')), updates)
+        if inserts:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), [
+                        dict(evaluation_record_id=record_id, dimension_id=dimension_id, score=score)
+                        for (record_id, dimension_id), score in inserts.items()
+                    ])
+            except IntegrityError:
+                # 并发请求已写入了其中部分评分，逐条写入
+                for (record_id, dimension_id), score in inserts.items():
+                    cls.set_score(record_id, dimension_id, score)
+
     def __repr__(self):
         return f'<EvaluationScore {self.evaluation_record_id}-{self.dimension_id}: {self.score}>'
 
 
+# 物化结果表：按 (任务, 被评估者, 评估者角色) 汇总已提交评分的合计与个数，提交/退回时增量维护
+class EvaluationResult(db.Model):
+    __tablename__ = 'evaluation_results'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('evaluation_tasks.id'), nullable=False)
+    evaluatee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    evaluator_role = db.Column(db.String(20), nullable=False)
+    score_sum = db.Column(db.Float, default=0, nullable=False)
+    score_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('task_id', 'evaluatee_id', 'evaluator_role'),
+    )
+
+    def __repr__(self):
+        return f'<EvaluationResult {self.task_id}-{self.evaluatee_id}-{self.evaluator_role}: {self.score_sum}/{self.score_count}>'
+
+
 class DimensionDefaultScore(db.Model):
     __tablename__ = 'dimension_default_scores'
 
@@ -131,4 +362,28 @@ class DimensionDefaultScore(db.Model):
     dimension = db.relationship('EvaluationDimension')
 
     def __repr__(self):
-        return f'<DimensionDefaultScore {self.employee_id}-{self.dimension_id}: {self.default_score}>'
\ No newline at end of file
+        return f'<DimensionDefaultScore {self.employee_id}-{self.dimension_id}: {self.default_score}>'
+
+class BackgroundJob(db.Model):
+    """后台导出/导入任务，状态保存在数据库中，任意工作进程都可查询（见 background_jobs.py）"""
+    __tablename__ = 'background_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # 状态：pending 等待执行、running 执行中、succeeded 成功、failed 失败
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    # 进度百分比
+    progress = db.Column(db.Integer, default=0, nullable=False)
+    # 任务参数（JSON）
+    params = db.Column(db.Text)
+    # 结果说明或错误信息
+    message = db.Column(db.Text)
+    result_path = db.Column(db.String(500))
+    result_filename = db.Column(db.String(255))
+    created_by = db.Column(db.Integer, db.ForeignKey('employees.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,61 @@
+"""密码哈希
+
+哈希方法和计算成本由配置项 PASSWORD_HASH_METHOD 指定（werkzeug 的 method 字符串，例如
+pbkdf2:sha256:260000，最后一段为 PBKDF2 迭代次数），可用同名环境变量覆盖。迭代次数越高越难
+离线破解，但每次登录验证、新建或导入员工时的 CPU 开销也越大，调整前可用
+benchmarks/bench_password_hashing.py 测量每个 CPU 核心每秒能完成的登录次数。
+
+已存储的哈希与当前配置不一致时，用户下次登录成功后按当前配置重新哈希（升级或降级），
+无需批量重置密码。
+"""
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# werkzeug 2.0 的默认方法和迭代次数
+DEFAULT_PASSWORD_HASH_METHOD = 'pbkdf2:sha256:260000'
+
+
+def password_hash_method():
+    """当前应用配置的哈希方法，没有应用上下文时使用默认值"""
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_PASSWORD_HASH_METHOD
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+def hash_password(password, method=None):
+    """
+    按配置的方法生成密码哈希
+
+    Args:
+        password: 明文密码
+        method: 哈希方法，默认取 password_hash_method()
+    Returns:
+        哈希字符串
+    """
+    return generate_password_hash(password, method=method or password_hash_method())
+
+
+def verify_password(password_hash, password):
+    """校验明文密码与存储的哈希是否匹配"""
+    return bool(password_hash) and check_password_hash(password_hash, password)
+
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    # 哈希串为 "方法$盐$摘要"，省略的迭代次数由 werkzeug 补全，因此取一次实际生成结果的方法部分
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
+
+def needs_rehash(password_hash, method=None):
+    """
+    存储的哈希与配置的方法或迭代次数是否不一致
+
+    Args:
+        password_hash: 已存储的哈希
+        method: 目标哈希方法，默认取 password_hash_method()
+    Returns:
+        需要重新哈希时返回 True
+    """
+    return password_hash.split('$', 1)[0] != _method_prefix(method or password_hash_method())
@@ -0,0 +1,148 @@
+"""请求级SQL统计
+
+通过 SQLAlchemy 引擎事件记录每个请求执行的语句数、数据库总耗时和最慢的几条语句，
+请求结束时写入 loguru 日志；语句数超过阈值时按疑似 N+1 查询记录警告。
+
+配置项:
+    QUERY_STATS_ENABLED: 是否统计，默认开启
+    QUERY_STATS_HEADER: 是否在响应头 X-Query-Stats 中返回统计结果，默认关闭
+    QUERY_COUNT_WARNING_THRESHOLD: 单个请求的语句数超过该值时记录警告，默认 50
+    SLOW_QUERY_THRESHOLD_MS: 单条语句超过该耗时（毫秒）时记录慢查询日志，默认 200
+    QUERY_STATS_TOP: 日志中列出的最慢语句条数，默认 3
+"""
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 当前线程中正在收集统计的 QueryStats（请求级统计与 count_queries 可以嵌套）
+_collectors = threading.local()
+
+
+class QueryStats:
+    """一段时间内执行的SQL语句统计"""
+
+    def __init__(self, top=3):
+        self.count = 0
+        self.total_time = 0.0
+        self.top = top
+        self.slowest = []  # (耗时, 序号, 语句) 小顶堆
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        item = (elapsed, self.count, statement)
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, item)
+        elif self.top:
+            heapq.heappushpop(self.slowest, item)
+
+    def slowest_statements(self):
+        """按耗时从高到低返回 (耗时秒数, 语句) 列表"""
+        return [(elapsed, statement) for elapsed, _, statement in sorted(self.slowest, reverse=True)]
+
+    def header_value(self):
+        return f'count={self.count}; time={self.total_time * 1000:.1f}ms'
+
+
+def _active_collectors():
+    if not hasattr(_collectors, 'stack'):
+        _collectors.stack = []
+    return _collectors.stack
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_collectors():
+        conn.info.setdefault('query_stats_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active_collectors()
+    starts = conn.info.get('query_stats_start')
+    if not collectors or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, elapsed)
+    slow_threshold = current_app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) if has_app_context() else 200
+    if elapsed * 1000 > slow_threshold:
+        logger.warning(f'慢查询 {elapsed * 1000:.1f}ms: {" ".join(statement.split())[:500]}')
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # 语句执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间，避免连接池中的连接累积过期记录
+    starts = context.connection.info.get('query_stats_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+@contextmanager
+def count_queries(top=3):
+    """
+    统计代码块内执行的SQL语句
+
+    Args:
+        top: 保留的最慢语句条数
+    Returns:
+        QueryStats 对象，代码块结束后读取 count / total_time / slowest_statements()
+    """
+    stats = QueryStats(top)
+    collectors = _active_collectors()
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+def _start_request_stats():
+    if not current_app.config.get('QUERY_STATS_ENABLED', True):
+        return
+    stats = QueryStats(current_app.config.get('QUERY_STATS_TOP', 3))
+    _active_collectors().append(stats)
+    g.query_stats = stats
+
+
+def _finish_request_stats(response):
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    collectors = _active_collectors()
+    if stats in collectors:
+        collectors.remove(stats)
+
+    summary = f'{request.method} {request.path} 执行SQL {stats.count} 条，耗时 {stats.total_time * 1000:.1f}ms'
+    threshold = current_app.config.get('QUERY_COUNT_WARNING_THRESHOLD', 50)
+    if threshold and stats.count > threshold:
+        slowest = '; '.join(f'{elapsed * 1000:.1f}ms {" ".join(statement.split())[:200]}'
+                            for elapsed, statement in stats.slowest_statements())
+        logger.warning(f'{summary}，超过阈值 {threshold}，可能存在 N+1 查询。最慢语句: {slowest}')
+    else:
+        logger.debug(summary)
+
+    if current_app.config.get('QUERY_STATS_HEADER'):
+        response.headers['X-Query-Stats'] = stats.header_value()
+    return response
+
+
+def _discard_request_stats(exception=None):
+    # 请求异常结束时 after_request 不会执行，在这里移除未结束的统计
+    stats = g.pop('query_stats', None)
+    collectors = _active_collectors()
+    if stats is not None and stats in collectors:
+        collectors.remove(stats)
+
+
+def init_query_stats(app):
+    """为应用注册请求级SQL统计"""
+    app.before_request(_start_request_stats)
+    app.after_request(_finish_request_stats)
+    app.teardown_request(_discard_request_stats)
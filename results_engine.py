@@ -0,0 +1,317 @@
+"""考评结果计算引擎
+
+按 (被评估者, 评估者角色) 一次性聚合任务内全部评分，取代逐人、逐角色的循环查询。
+生成结果页面和导出Excel共用本模块的计算与缓存，导出时可直接复用刚预览过的结果。
+各角色评分合计物化在 evaluation_results 表中，评估记录进入或离开'submitted'状态时
+通过 set_records_status 增量维护，rebuild_results / verify_results 用于全量重建与核对。
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, func, literal
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from extensions import db
+from models import Employee, EvaluationDimension, EvaluationRecord, EvaluationResult, EvaluationScore
+
+# 评估者角色 -> (结果字段, 最终分数中的权重)，顺序即加权合计的计算顺序
+ROLE_SCORE_FIELDS = (
+    ('部门负责人', 'dept_head_score', 0.4),
+    ('部门经理', 'dept_manager_score', 0.15),
+    ('员工', 'peer_score', 0.15),
+    ('分管领导', 'leader_score', 0.3),
+)
+
+# 部门绩效评级 -> (A档比例, B档比例)
+DEPARTMENT_RATING_RATIOS = {
+    '甲': (0.4, 0.3),
+    '乙': (0.2, 0.2),
+    '丙': (0.15, 0.2),
+    '丁': (0.1, 0.2),
+}
+
+# 结果缓存：(数据库, task_id, department_rating, 数据版本) -> 结果列表
+_results_cache = OrderedDict()
+_results_cache_lock = threading.Lock()
+
+
+def _raw_score_totals(*criteria):
+    """从原始评分按 (任务, 被评估者, 评估者角色) 聚合评分合计与个数的查询"""
+    return db.session.query(
+        EvaluationRecord.task_id,
+        EvaluationRecord.evaluatee_id,
+        Employee.role,
+        func.sum(EvaluationScore.score),
+        func.count(EvaluationScore.id)
+    ).join(
+        EvaluationRecord, EvaluationScore.evaluation_record_id == EvaluationRecord.id
+    ).join(
+        Employee, Employee.id == EvaluationRecord.evaluator_id
+    ).filter(
+        *criteria
+    ).group_by(
+        EvaluationRecord.task_id,
+        EvaluationRecord.evaluatee_id,
+        Employee.role
+    )
+
+
+def query_role_averages(task_id):
+    """从物化结果表读取任务内每个被评估者在各评估者角色下的平均分（百分制）
+    Args:
+        task_id: 评估任务ID
+    Returns:
+        {evaluatee_id: {role: score}}，未被某角色评估时不含该角色
+    """
+    rows = db.session.query(
+        EvaluationResult.evaluatee_id,
+        EvaluationResult.evaluator_role,
+        EvaluationResult.score_sum,
+        EvaluationResult.score_count
+    ).filter(EvaluationResult.task_id == task_id).all()
+
+    averages = {}
+    for evaluatee_id, role, score_sum, score_count in rows:
+        if score_count:
+            averages.setdefault(evaluatee_id, {})[role] = round(score_sum / score_count * 20, 2)
+    return averages
+
+
+def compute_evaluatee_scores(task_id):
+    """计算任务内所有被评估者的各角色分数和最终分数
+    Args:
+        task_id: 评估任务ID
+    Returns:
+        结果字典列表（未排序），每项包含姓名、岗位、各角色分数和最终分数
+    """
+    evaluatees = db.session.query(
+        Employee.id,
+        Employee.name,
+        Employee.position,
+        Employee.position_coefficient
+    ).filter(
+        Employee.role == '员工',
+        Employee.employee_id != '10000',
+        Employee.is_frozen == False
+    ).all()
+    role_averages = query_role_averages(task_id)
+
+    results = []
+    for evaluatee_id, name, position, position_coefficient in evaluatees:
+        scores = role_averages.get(evaluatee_id, {})
+        result = {'name': name, 'position': position}
+        weighted_score = 0
+        for role, field, weight in ROLE_SCORE_FIELDS:
+            result[field] = scores.get(role, 0)
+            weighted_score += result[field] * weight
+        # 加权合计后乘以岗位系数，并限制最大值为99分
+        weighted_score = round(weighted_score, 2)
+        result['final_score'] = min(round(weighted_score * position_coefficient, 2), 99)
+        results.append(result)
+    return results
+
+
+def assign_performance_levels(results, department_rating):
+    """按最终分数排序并分配排名和A/B/C/D绩效等级（结合排名比例和分数阈值）
+    Args:
+        results: compute_evaluatee_scores 返回的结果列表，原地修改
+        department_rating: 部门绩效评级（甲/乙/丙/丁）
+    """
+    results.sort(key=lambda x: x['final_score'], reverse=True)
+    total_employees = len(results)
+    if total_employees == 0:
+        return
+
+    a_ratio, b_ratio = DEPARTMENT_RATING_RATIOS.get(department_rating, DEPARTMENT_RATING_RATIOS['丁'])
+    a_count = round(total_employees * a_ratio)
+    b_count = round(total_employees * b_ratio)
+
+    for i, result in enumerate(results):
+        if i < a_count and result['final_score'] >= 90:
+            result['performance_level'] = 'A'
+        elif i < a_count + b_count and result['final_score'] >= 80:
+            result['performance_level'] = 'B'
+        elif result['final_score'] >= 70:
+            result['performance_level'] = 'C'
+        else:
+            result['performance_level'] = 'D'
+        result['rank'] = i + 1
+
+
+def results_data_version(task_id):
+    """返回任务结果所依赖数据的版本指纹
+
+    评估记录的提交、退回、改分都会更新记录的 updated_at；员工角色、岗位系数和冻结状态的变化
+    体现在员工表；删除维度会连带删除评分。任一变化都会产生新的指纹，旧缓存自然失效。
+    """
+    records = db.session.query(EvaluationRecord).filter(EvaluationRecord.task_id == task_id)
+    fingerprint = (
+        records.with_entities(func.count(EvaluationRecord.id)).scalar_subquery(),
+        records.with_entities(func.max(EvaluationRecord.updated_at)).scalar_subquery(),
+        db.session.query(func.count(Employee.id)).scalar_subquery(),
+        db.session.query(func.max(Employee.updated_at)).scalar_subquery(),
+        db.session.query(func.count(EvaluationDimension.id)).scalar_subquery(),
+    )
+    return tuple(db.session.query(*fingerprint).one())
+
+
+def compute_evaluation_results(task_id, department_rating):
+    """计算任务的完整考评结果（已排序，含排名和绩效等级），结果按数据版本缓存
+    Args:
+        task_id: 评估任务ID
+        department_rating: 部门绩效评级（甲/乙/丙/丁）
+    Returns:
+        结果字典列表，调用方可自由修改（返回的是缓存的副本）
+    """
+    key = (str(db.engine.url), int(task_id), department_rating, results_data_version(task_id))
+    with _results_cache_lock:
+        cached = _results_cache.get(key)
+        if cached is not None:
+            _results_cache.move_to_end(key)
+    if cached is None:
+        cached = compute_evaluatee_scores(task_id)
+        assign_performance_levels(cached, department_rating)
+        max_size = current_app.config.get('RESULTS_CACHE_SIZE', 32)
+        with _results_cache_lock:
+            _results_cache[key] = cached
+            while len(_results_cache) > max_size:
+                _results_cache.popitem(last=False)
+    return [dict(result) for result in cached]
+
+
+def clear_results_cache():
+    """清空结果缓存"""
+    with _results_cache_lock:
+        _results_cache.clear()
+
+
+def set_records_status(records, status):
+    """设置评估记录状态，并同步维护物化结果表
+
+    进入'submitted'的记录计入结果，离开'submitted'的记录从结果中扣除；提交路径须在评分
+    写入 session 之后调用。调用方负责提交事务。
+    """
+    entering = [record for record in records if record.status != 'submitted' and status == 'submitted']
+    leaving = [record for record in records if record.status == 'submitted' and status != 'submitted']
+    for record in records:
+        record.status = status
+    if entering or leaving:
+        db.session.flush()
+        _apply_results_delta([record.id for record in entering], 1)
+        _apply_results_delta([record.id for record in leaving], -1)
+
+
+def remove_records_from_results(records):
+    """将即将删除的评估记录从物化结果表中扣除（仅对已提交记录生效）"""
+    _apply_results_delta([record.id for record in records if record.status == 'submitted'], -1)
+
+
+def _apply_results_delta(record_ids, sign):
+    """把指定评估记录的评分合计按符号累加到物化结果表"""
+    if not record_ids:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {'task_id': task_id, 'evaluatee_id': evaluatee_id, 'evaluator_role': role,
+         'score_sum': sign * score_sum, 'score_count': sign * score_count, 'updated_at': now}
+        for task_id, evaluatee_id, role, score_sum, score_count
+        in _raw_score_totals(EvaluationRecord.id.in_(record_ids))
+    ]
+    if rows:
+        _increment_results(rows)
+
+
+def _increment_results(rows):
+    """以原子递增的方式写入物化结果行，避免并发提交时丢失更新"""
+    table = EvaluationResult.__table__
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert(table) if dialect == 'sqlite' else postgresql.insert(table)
+        statement = insert.on_conflict_do_update(
+            index_elements=['task_id', 'evaluatee_id', 'evaluator_role'],
+            set_={
+                'score_sum': table.c.score_sum + insert.excluded.score_sum,
+                'score_count': table.c.score_count + insert.excluded.score_count,
+                'updated_at': insert.excluded.updated_at,
+            }
+        )
+        db.session.execute(statement, rows)
+    elif dialect == 'mysql':
+        insert = mysql.insert(table)
+        statement = insert.on_duplicate_key_update(
+            score_sum=table.c.score_sum + insert.inserted.score_sum,
+            score_count=table.c.score_count + insert.inserted.score_count,
+            updated_at=insert.inserted.updated_at,
+        )
+        db.session.execute(statement, rows)
+    else:
+        # 其他数据库：先查已有行，已有的原子递增，缺失的插入
+        task_ids = {row['task_id'] for row in rows}
+        evaluatee_ids = {row['evaluatee_id'] for row in rows}
+        existing = set(db.session.query(
+            EvaluationResult.task_id, EvaluationResult.evaluatee_id, EvaluationResult.evaluator_role
+        ).filter(
+            EvaluationResult.task_id.in_(task_ids),
+            EvaluationResult.evaluatee_id.in_(evaluatee_ids)
+        ))
+        updates = [dict(row, b_task_id=row['task_id'], b_evaluatee_id=row['evaluatee_id'], b_role=row['evaluator_role'])
+                   for row in rows if (row['task_id'], row['evaluatee_id'], row['evaluator_role']) in existing]
+        inserts = [row for row in rows if (row['task_id'], row['evaluatee_id'], row['evaluator_role']) not in existing]
+        if updates:
+            db.session.execute(table.update().where(and_(
+                table.c.task_id == bindparam('b_task_id'),
+                table.c.evaluatee_id == bindparam('b_evaluatee_id'),
+                table.c.evaluator_role == bindparam('b_role')
+            )).values(
+                score_sum=table.c.score_sum + bindparam('score_sum'),
+                score_count=table.c.score_count + bindparam('score_count'),
+                updated_at=bindparam('updated_at')
+            ), updates)
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+
+
+def rebuild_results(task_id=None):
+    """从原始评分全量重建物化结果表（task_id 为空时重建全部任务），调用方负责提交事务"""
+    criteria = [EvaluationRecord.status == 'submitted']
+    existing = EvaluationResult.query
+    if task_id is not None:
+        criteria.append(EvaluationRecord.task_id == task_id)
+        existing = existing.filter(EvaluationResult.task_id == task_id)
+    existing.delete(synchronize_session=False)
+
+    totals = _raw_score_totals(*criteria).add_columns(literal(datetime.utcnow(), db.DateTime))
+    db.session.execute(EvaluationResult.__table__.insert().from_select(
+        ['task_id', 'evaluatee_id', 'evaluator_role', 'score_sum', 'score_count', 'updated_at'],
+        totals.statement
+    ))
+
+
+def verify_results(task_id=None):
+    """核对物化结果表与原始评分是否一致
+    Returns:
+        不一致项列表 [(task_id, evaluatee_id, 角色, 物化值(合计, 个数), 实际值(合计, 个数))]
+    """
+    criteria = [EvaluationRecord.status == 'submitted']
+    materialized = db.session.query(
+        EvaluationResult.task_id,
+        EvaluationResult.evaluatee_id,
+        EvaluationResult.evaluator_role,
+        EvaluationResult.score_sum,
+        EvaluationResult.score_count
+    ).filter(EvaluationResult.score_count != 0)
+    if task_id is not None:
+        criteria.append(EvaluationRecord.task_id == task_id)
+        materialized = materialized.filter(EvaluationResult.task_id == task_id)
+
+    expected = {tuple(row[:3]): (row[3], row[4]) for row in _raw_score_totals(*criteria)}
+    actual = {tuple(row[:3]): (row[3], row[4]) for row in materialized}
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        expected_sum, expected_count = expected.get(key, (0, 0))
+        actual_sum, actual_count = actual.get(key, (0, 0))
+        if expected_count != actual_count or abs(expected_sum - actual_sum) > 1e-6:
+            mismatches.append(key + ((actual_sum, actual_count), (expected_sum, expected_count)))
+    return mismatches
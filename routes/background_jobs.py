@@ -0,0 +1,91 @@
+from flask import Blueprint, jsonify, request, send_file, url_for
+from flask_login import login_required, current_user
+from extensions import db
+from models import BackgroundJob
+from background_jobs import JOB_SUCCEEDED, job_status, submit_job
+from exports import XLSX_MIMETYPE
+from lookup_cache import get_task
+
+# 后台导出/导入任务：提交后立即返回任务ID（202），客户端轮询状态，完成后下载结果文件。
+# 提交接口为 POST，需在表单字段 csrf_token 或请求头 X-CSRFToken 中携带 CSRF 令牌。
+background_jobs_bp = Blueprint('background_jobs', __name__)
+
+DEPARTMENT_RATINGS = ('甲', '乙', '丙', '丁')
+
+
+def _accepted(job_id):
+    job = db.session.get(BackgroundJob, job_id)
+    status_url = url_for('background_jobs.get_job', job_id=job_id)
+    return jsonify(dict(job_status(job), status_url=status_url)), 202, {'Location': status_url}
+
+
+def _forbidden():
+    return jsonify(error='无权限执行此操作'), 403
+
+
+@background_jobs_bp.route('/admin/jobs/export-evaluation-results', methods=['POST'])
+@login_required
+def submit_export_evaluation_results():
+    # 与同步导出相同：管理员和非员工角色可以导出
+    if not current_user.is_admin and current_user.role == '员工':
+        return _forbidden()
+    task_id = request.form.get('task_id', type=int)
+    department_rating = request.form.get('department_rating')
+    if get_task(task_id) is None or department_rating not in DEPARTMENT_RATINGS:
+        return jsonify(error='请选择评估任务和部门绩效评级'), 400
+    job_id = submit_job('export_evaluation_results', {'task_id': task_id, 'department_rating': department_rating},
+                        created_by=current_user.id)
+    return _accepted(job_id)
+
+
+@background_jobs_bp.route('/admin/jobs/export-evaluation-summary', methods=['POST'])
+@login_required
+def submit_export_evaluation_summary():
+    if not current_user.is_admin:
+        return _forbidden()
+    job_id = submit_job('export_evaluation_summary', {'task_id': request.form.get('task_id', type=int)},
+                        created_by=current_user.id)
+    return _accepted(job_id)
+
+
+@background_jobs_bp.route('/admin/jobs/employee-import', methods=['POST'])
+@login_required
+def submit_employee_import():
+    if not current_user.is_admin:
+        return _forbidden()
+    file = request.files.get('file')
+    if file is None or not file.filename.endswith('.xlsx'):
+        return jsonify(error='请上传.xlsx格式的Excel文件'), 400
+    job_id = submit_job('employee_import', created_by=current_user.id, upload=file)
+    return _accepted(job_id)
+
+
+def _get_own_job(job_id):
+    # 只有任务创建者和管理员可以查看任务
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or not (current_user.is_admin or job.created_by == current_user.id):
+        return None
+    return job
+
+
+@background_jobs_bp.route('/admin/jobs/<string:job_id>')
+@login_required
+def get_job(job_id):
+    job = _get_own_job(job_id)
+    if job is None:
+        return jsonify(error='任务不存在'), 404
+    status = job_status(job)
+    if status['has_result']:
+        status['download_url'] = url_for('background_jobs.download_job_result', job_id=job.id)
+    return jsonify(status)
+
+
+@background_jobs_bp.route('/admin/jobs/<string:job_id>/download')
+@login_required
+def download_job_result(job_id):
+    job = _get_own_job(job_id)
+    if job is None:
+        return jsonify(error='任务不存在'), 404
+    if job.status != JOB_SUCCEEDED or not job.result_path:
+        return jsonify(error='任务尚未完成或没有结果文件'), 409
+    return send_file(job.result_path, as_attachment=True, download_name=job.result_filename, mimetype=XLSX_MIMETYPE)
@@ -0,0 +1,92 @@
+"""启动时的表结构补齐
+
+旧版本数据库可能缺少后来新增的列或索引。这里通过 Alembic 的 Operations 生成 DDL，
+由当前数据库方言负责具体语法（SQLite 不支持的修改列操作走 batch 模式重建表），
+因此同一段代码可用于 SQLite、MySQL 和 PostgreSQL。
+"""
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from loguru import logger
+from sqlalchemy import inspect
+
+
+def _operations(connection):
+    return Operations(MigrationContext.configure(connection))
+
+
+def ensure_columns(connection, table_name, columns):
+    """
+    添加表中缺失的列
+
+    Args:
+        connection: SQLAlchemy 连接
+        table_name: 表名，表不存在时不做处理
+        columns: 待补齐的 Column 对象列表（NOT NULL 列需带 server_default）
+    Returns:
+        新增的列名列表
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table(table_name):
+        return []
+    existing = {column['name'] for column in inspector.get_columns(table_name)}
+    operations = _operations(connection)
+    added = []
+    for column in columns:
+        if column.name not in existing:
+            operations.add_column(table_name, column)
+            added.append(column.name)
+    if added:
+        logger.info(f'表 {table_name} 补充列: {", ".join(added)}')
+    return added
+
+
+def ensure_indexes(engine, tables):
+    """
+    创建模型中定义但数据库中缺失的索引
+
+    Args:
+        engine: SQLAlchemy 引擎，每个索引在各自的事务中创建，失败时不影响后续索引
+        tables: Table 对象列表
+    Returns:
+        创建失败的 (索引名, 异常) 列表，例如已有重复数据导致唯一索引无法创建
+    """
+    inspector = inspect(engine)
+    failures = []
+    for table in tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(engine)
+            except Exception as e:
+                failures.append((index.name, e))
+    return failures
+
+
+def create_index(connection, name, table_name, columns, unique=False):
+    """
+    创建索引（不改动模型元数据）
+
+    Args:
+        connection: SQLAlchemy 连接
+        name: 索引名
+        table_name: 表名
+        columns: 列名列表
+        unique: 是否唯一索引
+    """
+    _operations(connection).create_index(name, table_name, columns, unique=unique)
+
+
+def set_not_null(connection, table_name, column_name, existing_type):
+    """
+    把已有的列改为 NOT NULL
+
+    Args:
+        connection: SQLAlchemy 连接
+        table_name: 表名
+        column_name: 列名
+        existing_type: 列当前的类型（MySQL 修改列时需要）
+    """
+    with _operations(connection).batch_alter_table(table_name) as batch:
+        batch.alter_column(column_name, existing_type=existing_type, nullable=False)
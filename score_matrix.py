@@ -0,0 +1,97 @@
+"""评估汇总矩阵
+
+把一批评估记录的总分整理为 被评估者 × 评估者 的 NumPy 矩阵：员工ID先映射为连续下标，
+再一次性写入矩阵，未评分的位置为 NaN，平均分按行用 nanmean 计算。
+评估查询、领导评估统计页面和两个汇总导出共用同一个结构。
+NumPy 在用到时才导入，避免拖慢应用启动。
+"""
+from flask import current_app
+
+# 未评分单元格和无平均分时显示的占位符
+EMPTY_CELL = '-'
+
+
+class ScoreMatrix:
+    """被评估者 × 评估者 的评分矩阵
+
+    Attributes:
+        evaluatees: 被评估者列表，对应矩阵的行
+        evaluators: 评估者列表，对应矩阵的列
+        scores: float 矩阵，未评分处为 NaN
+        averages: 每个被评估者的平均分，没有任何评分时为 NaN
+    """
+
+    def __init__(self, evaluatees, evaluators, scores):
+        import numpy as np
+        self.evaluatees = evaluatees
+        self.evaluators = evaluators
+        self.scores = scores
+        counts = np.count_nonzero(~np.isnan(scores), axis=1)
+        self.averages = np.full(len(evaluatees), np.nan)
+        if scores.size:
+            np.divide(np.nansum(scores, axis=1), counts, out=self.averages, where=counts > 0)
+
+    def rows(self):
+        """
+        生成用于页面和导出的行数据
+
+        Returns:
+            (被评估者, 各评估者的分数列表, 平均分) 列表，分数保留两位小数，缺失处为 EMPTY_CELL
+        """
+        cells = _display_values(self.scores)
+        averages = _display_values(self.averages)
+        return list(zip(self.evaluatees, cells, averages))
+
+
+def _display_values(values):
+    import numpy as np
+    rounded = np.round(values, 2)
+    return np.where(np.isnan(rounded), EMPTY_CELL, rounded.astype(object)).tolist()
+
+
+def _dense_index(employees, ids):
+    """把员工ID映射为矩阵下标，不在列表中的ID返回 -1"""
+    import numpy as np
+    indices = np.full(len(ids), -1, dtype=np.int64)
+    if not employees:
+        return indices
+    employee_ids = np.fromiter((employee.id for employee in employees), dtype=np.int64, count=len(employees))
+    order = np.argsort(employee_ids)
+    sorted_ids = employee_ids[order]
+    positions = np.clip(np.searchsorted(sorted_ids, ids), 0, len(sorted_ids) - 1)
+    found = sorted_ids[positions] == ids
+    indices[found] = order[positions[found]]
+    return indices
+
+
+def build_score_matrix(evaluations, evaluators, evaluatees):
+    """
+    根据评估记录构建评分矩阵
+
+    Args:
+        evaluations: 评估记录列表，需提供 evaluator_id、evaluatee_id、total_score（记录对象或查询行均可）
+        evaluators: 评估者列表，决定矩阵的列顺序
+        evaluatees: 被评估者列表，决定矩阵的行顺序
+    Returns:
+        ScoreMatrix 对象；同一评估者对同一被评估者有多条记录时以最后一条为准
+    """
+    import numpy as np
+    scores = np.full((len(evaluatees), len(evaluators)), np.nan)
+    count = len(evaluations)
+    if count:
+        evaluatee_ids = np.fromiter((e.evaluatee_id for e in evaluations), dtype=np.int64, count=count)
+        evaluator_ids = np.fromiter((e.evaluator_id for e in evaluations), dtype=np.int64, count=count)
+        totals = np.fromiter((e.total_score if e.total_score is not None else np.nan for e in evaluations),
+                             dtype=float, count=count)
+        rows = _dense_index(evaluatees, evaluatee_ids)
+        columns = _dense_index(evaluators, evaluator_ids)
+        valid = (rows >= 0) & (columns >= 0)
+        if not valid.all():
+            current_app.logger.warning(f'{count - int(valid.sum())} 条评估记录的评估者或被评估者不在汇总范围内，已忽略')
+        rows, columns, totals = rows[valid], columns[valid], totals[valid]
+        # 花式索引对重复下标赋值时不保证哪个值生效，先对每个单元格只保留最后一条记录
+        cells = (rows * len(evaluators) + columns)[::-1]
+        _, last = np.unique(cells, return_index=True)
+        last = len(cells) - 1 - last
+        scores[rows[last], columns[last]] = totals[last]
+    return ScoreMatrix(evaluatees, evaluators, scores)
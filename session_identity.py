@@ -0,0 +1,98 @@
+"""会话身份快照
+
+Flask-Login 默认在每个请求的 user_loader 中按主键查询一次员工，admin_required 等装饰器和模板再读取
+角色、冻结状态等字段。这里在登录时把这些身份字段连同员工的 auth_version 存入签名会话，之后的请求
+直接由快照构造 current_user，只与参考数据缓存中的版本号比对（缓存命中时不访问数据库）。
+
+通过 ORM 修改工号、姓名、职位、角色、管理员/冻结状态或设置新密码都会递增 auth_version（见 models.py），
+管理路由提交后调用 invalidate_employees()，下一个请求即发现版本不一致并从数据库重新加载：
+冻结和角色变化立即生效；密码被重置或修改后（credential_version 变化）旧会话失效，需要重新登录。
+登录时按新配置重新哈希同一密码不改变这两个版本号，不影响该用户的其他会话。使用进程内参考数据缓存
+部署多个工作进程时，其他工作进程最多在 LOOKUP_CACHE_TTL 后生效。
+"""
+from flask import session
+from flask_login import UserMixin
+
+from extensions import db
+from lookup_cache import get_auth_version
+from models import Employee
+
+# 会话中保存身份快照的键
+SESSION_KEY = '_identity'
+
+
+class SessionIdentity(UserMixin):
+    """由会话快照构造的当前用户，只含身份字段；需要修改员工数据时请按 id 查询 Employee"""
+
+    def __init__(self, snapshot):
+        self.id = snapshot['id']
+        self.employee_id = snapshot['employee_id']
+        self.name = snapshot['name']
+        self.position = snapshot['position']
+        self.role = snapshot['role']
+        self.is_admin = snapshot['is_admin']
+        self.is_frozen = snapshot['is_frozen']
+        self.auth_version = snapshot['auth_version']
+
+    def __repr__(self):
+        return f'<SessionIdentity {self.name}>'
+
+
+def remember_identity(employee):
+    """
+    把员工的身份快照写入会话，登录成功或当前用户修改自己的资料后调用
+
+    Args:
+        employee: Employee 对象（已提交）
+    Returns:
+        SessionIdentity
+    """
+    snapshot = {
+        'id': employee.id,
+        'employee_id': employee.employee_id,
+        'name': employee.name,
+        'position': employee.position,
+        'role': employee.role,
+        'is_admin': bool(employee.is_admin),
+        'is_frozen': bool(employee.is_frozen),
+        'auth_version': employee.auth_version,
+        'credential_version': employee.credential_version,
+    }
+    session[SESSION_KEY] = snapshot
+    return SessionIdentity(snapshot)
+
+
+def forget_identity():
+    """退出登录时清除会话中的身份快照"""
+    session.pop(SESSION_KEY, None)
+
+
+def load_identity(user_id):
+    """
+    Flask-Login 的 user_loader：版本号一致时直接使用会话快照，否则从数据库重新加载
+
+    Args:
+        user_id: 会话中保存的员工主键
+    Returns:
+        SessionIdentity，员工不存在或密码已被重置时返回 None
+    """
+    try:
+        employee_pk = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    snapshot = session.get(SESSION_KEY)
+    if snapshot is not None and snapshot.get('id') != employee_pk:
+        snapshot = None
+    if snapshot is not None and snapshot.get('auth_version') == get_auth_version(employee_pk):
+        return SessionIdentity(snapshot)
+
+    employee = db.session.get(Employee, employee_pk)
+    if employee is None:
+        forget_identity()
+        return None
+    if snapshot is not None and snapshot.get('credential_version') != employee.credential_version:
+        # 登录后密码被重置：使旧会话失效（此处调用 logout_user 会再次触发 user_loader）
+        session.pop('_user_id', None)
+        forget_identity()
+        return None
+    return remember_identity(employee)
@@ -0,0 +1,62 @@
+"""SQLite 连接级设置
+
+创建引擎时把应用配置 SQLITE_PRAGMAS 绑定到引擎上（见 extensions.py），此后该引擎新建的每个 SQLite
+连接都会执行这些 PRAGMA，与是否处于应用上下文无关（例如后台线程、直接使用 db.engine 的脚本）。
+journal_mode=WAL 会写入数据库文件本身，其余设置只对当前连接有效，所以每个连接都要重新设置。
+"""
+import sqlite3
+
+from loguru import logger
+from sqlalchemy import event
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """
+    在 sqlite3 连接上依次执行 PRAGMA
+
+    Args:
+        dbapi_connection: sqlite3.Connection
+        pragmas: {PRAGMA名称: 值} 字典
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def bind_sqlite_pragmas(engine, pragmas):
+    """
+    在引擎新建的每个 SQLite 连接上执行 PRAGMA
+
+    Args:
+        engine: SQLAlchemy 引擎
+        pragmas: {PRAGMA名称: 值} 字典，为空时不做任何设置
+    """
+    if not pragmas:
+        return
+    pragmas = dict(pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        try:
+            apply_sqlite_pragmas(dbapi_connection, pragmas)
+        except sqlite3.DatabaseError as e:
+            # 例如其他连接持有锁时无法切换 journal_mode，保持默认设置继续使用该连接
+            logger.warning(f'设置SQLite连接参数失败: {e}')
+
+
+def sqlite_settings(connection):
+    """
+    读取连接当前生效的设置，便于核对配置是否生效
+
+    Args:
+        connection: SQLAlchemy 连接
+    Returns:
+        {PRAGMA名称: 当前值} 字典
+    """
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in ('journal_mode', 'busy_timeout', 'synchronous', 'cache_size', 'mmap_size')}
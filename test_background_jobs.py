@@ -0,0 +1,105 @@
+import os
+import unittest
+from extensions import db
+from models import BackgroundJob, Employee, EvaluationTask
+from app import app
+from io import BytesIO
+from openpyxl import Workbook, load_workbook
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+def roster_file(headers, *rows):
+    workbook = Workbook()
+    workbook.active.append(headers)
+    for row in rows:
+        workbook.active.append(row)
+    stream = BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+    return stream
+
+
+class BackgroundJobsTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.csrf_enabled = app.config['WTF_CSRF_ENABLED']
+        app.config['WTF_CSRF_ENABLED'] = False
+        self.job_dir = tempfile.mkdtemp()
+        self.configured_job_dir = app.config['BACKGROUND_JOB_DIR']
+        app.config['BACKGROUND_JOB_DIR'] = self.job_dir
+        self.client = app.test_client()
+
+        with app.app_context():
+            db.create_all()
+            admin = Employee(employee_id='20001', name='审核员', position='综合', is_admin=True)
+            staff = Employee(employee_id='20002', name='员工甲', position='开发', role='员工')
+            for employee in (admin, staff):
+                employee.set_password('password')
+            db.session.add_all([admin, staff, EvaluationTask(year=2024, quarter=1, name='2024年第一季度')])
+            db.session.commit()
+            admin_pk = admin.id
+
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(admin_pk)
+            sess['_fresh'] = True
+
+    def tearDown(self):
+        app.config['WTF_CSRF_ENABLED'] = self.csrf_enabled
+        app.config['BACKGROUND_JOB_DIR'] = self.configured_job_dir
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _run(self, response):
+        self.assertEqual(response.status_code, 202, response.get_data(as_text=True))
+        job_id = response.get_json()['id']
+        app.extensions['background_jobs'].wait(job_id, timeout=60)
+        return self.client.get(response.headers['Location']).get_json()
+
+    def test_export_job_reports_progress_and_serves_file(self):
+        status = self._run(self.client.post('/admin/jobs/export-evaluation-summary', data={'task_id': '1'}))
+        self.assertEqual((status['status'], status['progress']), ('succeeded', 100))
+
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data.startswith(b'PK'))
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+
+        # 考评结果表直接写入任务的结果文件
+        status = self._run(self.client.post('/admin/jobs/export-evaluation-results',
+                                            data={'task_id': '1', 'department_rating': '甲'}))
+        self.assertEqual(status['status'], 'succeeded', status['message'])
+        with app.app_context():
+            job = BackgroundJob.query.get(status['id'])
+            self.assertEqual(job.result_path, os.path.join(self.job_dir, f'{job.id}.result'))
+            self.assertTrue(job.result_filename.startswith('绩效考评结果_2024年第一季度_'))
+        with open(job.result_path, 'rb') as result:
+            self.assertEqual(load_workbook(result).active['A2'].value, '姓名')
+
+    def test_import_job(self):
+        bad = roster_file(['姓名', '职位'], ['新员工', '开发'])
+        status = self._run(self.client.post('/admin/jobs/employee-import', data={'file': (bad, 'roster.xlsx')},
+                                            content_type='multipart/form-data'))
+        self.assertEqual(status['status'], 'failed')
+        self.assertIn('表头必须包含', status['message'])
+
+        good = roster_file(['姓名', '职位', '默认密码'], ['新员工', '开发', 'pw'], ['员工甲', '开发', 'pw'])
+        status = self._run(self.client.post('/admin/jobs/employee-import', data={'file': (good, 'roster.xlsx')},
+                                            content_type='multipart/form-data'))
+        self.assertEqual(status['status'], 'succeeded')
+        self.assertIn('成功导入 1 名员工', status['message'])
+        self.assertFalse(status['has_result'])
+        # 上传的名册在导入后删除
+        self.assertEqual(os.listdir(self.job_dir), [])
+        with app.app_context():
+            self.assertTrue(Employee.query.filter_by(name='新员工').one().check_password('pw'))
+            self.assertEqual(BackgroundJob.query.count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from extensions import db
+from models import Employee, EvaluationDimension
+from app import app
+from commands import DEFAULT_ADMIN_ID, DEFAULT_DIMENSIONS
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class InitDbCommandTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.runner = app.test_cli_runner()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_init_db_seeds_once_and_keeps_admin_password(self):
+        result = self.runner.invoke(args=['init-db'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with app.app_context():
+            self.assertEqual(EvaluationDimension.query.count(), len(DEFAULT_DIMENSIONS))
+            admin = Employee.query.filter_by(employee_id=DEFAULT_ADMIN_ID).one()
+            self.assertTrue(admin.is_admin)
+            admin.set_password('changed')
+            db.session.commit()
+
+        # 重复执行不会再次写入维度，也不会重置管理员已修改的密码
+        self.assertEqual(self.runner.invoke(args=['init-db']).exit_code, 0)
+        with app.app_context():
+            self.assertEqual(EvaluationDimension.query.count(), len(DEFAULT_DIMENSIONS))
+            self.assertTrue(Employee.query.filter_by(employee_id=DEFAULT_ADMIN_ID).one().check_password('changed'))
+
+        self.assertEqual(self.runner.invoke(args=['init-db', '--reset-admin-password']).exit_code, 0)
+        with app.app_context():
+            self.assertTrue(Employee.query.filter_by(employee_id=DEFAULT_ADMIN_ID).one().check_password('password'))
+
+    def test_create_app_registers_views(self):
+        from app import create_app
+        testing_app = create_app('testing')
+        testing_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tempfile.mkstemp()[1]}'
+        testing_app.config['WTF_CSRF_ENABLED'] = False
+        self.assertEqual({rule.endpoint for rule in testing_app.url_map.iter_rules()},
+                         {rule.endpoint for rule in app.url_map.iter_rules()})
+        self.assertEqual(testing_app.test_cli_runner().invoke(args=['init-db']).exit_code, 0)
+
+        client = testing_app.test_client()
+        response = client.post('/login', data={'employee_id': DEFAULT_ADMIN_ID, 'password': 'password'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(client.get('/admin/employees').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from extensions import db
+from app import app
+from schema_guard import ensure_columns, ensure_indexes
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class DatabaseBackendTest(unittest.TestCase):
+    def test_pool_options_only_for_server_databases(self):
+        _, options = db.apply_driver_hacks(app, make_url('postgresql+psycopg2://user@localhost/pes'), {})
+        self.assertEqual(options['pool_size'], app.config['DATABASE_POOL_OPTIONS']['pool_size'])
+        self.assertTrue(options['pool_pre_ping'])
+
+        # 显式的 SQLALCHEMY_ENGINE_OPTIONS 优先，MySQL 也不会被父类的默认值覆盖
+        _, options = db.apply_driver_hacks(app, make_url('mysql+pymysql://user@localhost/pes'), {'pool_size': 3})
+        self.assertEqual(options['pool_size'], 3)
+        self.assertEqual(options['pool_recycle'], app.config['DATABASE_POOL_OPTIONS']['pool_recycle'])
+
+        _, options = db.apply_driver_hacks(app, make_url(f'sqlite:///{test_db_path}'), {})
+        self.assertNotIn('pool_size', options)
+
+    def test_ensure_columns_and_indexes(self):
+        engine = create_engine(f'sqlite:///{test_db_path}')
+        with engine.begin() as connection:
+            connection.exec_driver_sql('CREATE TABLE evaluation_task (id INTEGER PRIMARY KEY, name VARCHAR(200))')
+            connection.exec_driver_sql("INSERT INTO evaluation_task (name) VALUES ('2024年第一季度')")
+            column = db.Column('status', db.String(20), server_default='published', nullable=False)
+            self.assertEqual(ensure_columns(connection, 'evaluation_task', [column]), ['status'])
+            self.assertEqual(ensure_columns(connection, 'evaluation_task', [column]), [])
+            self.assertEqual(connection.exec_driver_sql('SELECT status FROM evaluation_task').scalar(), 'published')
+
+        table = db.Table('evaluation_task', db.MetaData(), db.Column('id', db.Integer, primary_key=True),
+                         db.Column('name', db.String(200)), db.Index('ix_evaluation_task_name', 'name'))
+        self.assertEqual(ensure_indexes(engine, [table]), [])
+        self.assertIn('ix_evaluation_task_name', {index['name'] for index in inspect(engine).get_indexes('evaluation_task')})
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from extensions import db
+from models import Employee
+from app import app
+from employee_import import PARALLEL_MIN_PASSWORDS, import_employees, open_roster, roster_rows
+from io import BytesIO
+from openpyxl import Workbook
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class EmployeeImportTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.configured_method = app.config['PASSWORD_HASH_METHOD']
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+        with app.app_context():
+            db.create_all()
+            existing = Employee(employee_id='20005', name='员工甲', position='开发')
+            existing.set_password('password')
+            db.session.add(existing)
+            db.session.commit()
+
+    def tearDown(self):
+        app.config['PASSWORD_HASH_METHOD'] = self.configured_method
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_import_hashes_in_process_pool_and_bulk_inserts(self):
+        count = PARALLEL_MIN_PASSWORDS + 4
+        rows = [(f'新员工{i}', '开发', f'pw{i}') for i in range(count)]
+        rows += [('员工甲', '开发', 'x'), ('新员工0', '测试', 'y'), (None, '开发', 'z')]
+        progress = []
+        with app.app_context():
+            summary = import_employees(rows, processes=2, progress=lambda done, total: progress.append((done, total)))
+            db.session.commit()
+
+            self.assertEqual(summary.imported, count)
+            self.assertEqual(summary.duplicate_names, ['员工甲', '新员工0'])
+            self.assertEqual(progress[-1], (count, count))
+            imported = Employee.query.filter(Employee.name.like('新员工%')).order_by(Employee.id).all()
+            self.assertEqual([e.employee_id for e in imported], [str(20006 + i) for i in range(count)])
+            self.assertTrue(imported[-1].check_password(f'pw{count - 1}'))
+            self.assertEqual((imported[0].role, imported[0].auth_version, imported[0].is_frozen), ('员工', 0, False))
+
+    def test_read_only_roster_rows(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['默认密码', '姓名', '职位'])
+        sheet.append(['pw1', '新员工甲', '开发'])
+        sheet.append([None, '新员工乙'])
+        stream = BytesIO()
+        workbook.save(stream)
+
+        with open_roster(stream) as (headers, rows):
+            self.assertEqual(headers, ('默认密码', '姓名', '职位'))
+            self.assertEqual(list(roster_rows(rows, (2, 3, 1))),
+                             [('新员工甲', '开发', 'pw1'), ('新员工乙', None, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+from extensions import db
+from models import Employee, EvaluationRecord, EvaluationTask, EvaluationDimension, EvaluationScore
+from app import app
+from sqlalchemy.orm import with_expression
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class EvaluationTotalsTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+        with app.app_context():
+            db.create_all()
+            evaluatee = Employee(employee_id='20000', name='被评估者', position='开发')
+            evaluators = [Employee(employee_id=f'2000{i}', name=f'评估者{i}', position='开发') for i in (1, 2, 3)]
+            for employee in [evaluatee] + evaluators:
+                employee.set_password('password')
+            task = EvaluationTask(year=2024, quarter=2, name='测试任务', status='published')
+            self.dimensions = [EvaluationDimension(name='本职工作', weight=0.5),
+                               EvaluationDimension(name='附加业绩', weight=0.35),
+                               EvaluationDimension(name='勤勉', weight=0.15)]
+            db.session.add_all([evaluatee, task] + evaluators + self.dimensions)
+            db.session.commit()
+
+            self.record_ids = []
+            for evaluator, scores in zip(evaluators, ([4.5, 3.5, 5], [5, 5, 5], [])):
+                record = EvaluationRecord(evaluator_id=evaluator.id, evaluatee_id=evaluatee.id,
+                                          task_id=task.id, status='submitted')
+                db.session.add(record)
+                db.session.flush()
+                for dimension, score in zip(self.dimensions, scores):
+                    db.session.add(EvaluationScore(evaluation_record_id=record.id, dimension_id=dimension.id, score=score))
+                self.record_ids.append(record.id)
+            db.session.commit()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _python_totals(self):
+        return {record.id: record.total_score for record in EvaluationRecord.query.all()}
+
+    def test_sql_total_score_matches_python(self):
+        with app.app_context():
+            python_totals = self._python_totals()
+            db.session.expunge_all()
+            sql_totals = dict(db.session.query(EvaluationRecord.id, EvaluationRecord.total_score).all())
+        self.assertEqual(python_totals, sql_totals)
+        self.assertEqual(sql_totals[self.record_ids[0]], 84.5)
+        self.assertEqual(sql_totals[self.record_ids[1]], 100.0)
+        self.assertEqual(sql_totals[self.record_ids[2]], 0)
+
+    def test_total_score_is_capped_at_100(self):
+        with app.app_context():
+            dimension = EvaluationDimension.query.filter_by(name='本职工作').first()
+            dimension.weight = 2
+            db.session.commit()
+            db.session.expunge_all()
+            total = db.session.query(EvaluationRecord.total_score).filter(
+                EvaluationRecord.id == self.record_ids[0]).scalar()
+        self.assertEqual(total, 100.0)
+
+    def test_with_expression_loads_total_without_scores(self):
+        with app.app_context():
+            record = EvaluationRecord.query.options(
+                with_expression(EvaluationRecord.queried_total_score, EvaluationRecord.total_score)
+            ).get(self.record_ids[0])
+            self.assertEqual(record.total_score, 84.5)
+            self.assertNotIn('scores', record.__dict__)
+
+    def test_get_or_create_and_set_score_keep_one_row(self):
+        with app.app_context():
+            existing = EvaluationRecord.query.get(self.record_ids[0])
+            dimension_id = EvaluationDimension.query.filter_by(name='本职工作').first().id
+            record = EvaluationRecord.get_or_create(existing.evaluator_id, existing.evaluatee_id, existing.task_id)
+            self.assertEqual(record.id, existing.id)
+            EvaluationScore.set_score(record.id, dimension_id, 3)
+            db.session.commit()
+            scores = EvaluationScore.query.filter_by(evaluation_record_id=record.id,
+                                                     dimension_id=dimension_id).all()
+            self.assertEqual([s.score for s in scores], [3])
+
+            created = EvaluationRecord.get_or_create(existing.evaluatee_id, existing.evaluator_id, existing.task_id)
+            self.assertIsNotNone(created.id)
+            self.assertEqual(created.status, 'draft')
+
+    def test_bulk_get_or_create_and_set_scores(self):
+        with app.app_context():
+            existing = EvaluationRecord.query.get(self.record_ids[0])
+            evaluator_id, task_id = existing.evaluator_id, existing.task_id
+            records = EvaluationRecord.get_or_create_many(evaluator_id, task_id,
+                                                          [existing.evaluatee_id, evaluator_id])
+            self.assertEqual(records[existing.evaluatee_id].id, existing.id)
+            self.assertEqual(records[evaluator_id].status, 'draft')
+
+            dimension_ids = [d.id for d in EvaluationDimension.query.order_by(EvaluationDimension.id)]
+            EvaluationScore.set_scores({(existing.id, dimension_ids[0]): 2,
+                                        (records[evaluator_id].id, dimension_ids[0]): 4})
+            db.session.commit()
+            self.assertEqual(EvaluationScore.query.filter_by(evaluation_record_id=existing.id).count(), 3)
+            self.assertEqual(db.session.query(EvaluationScore.score).filter_by(
+                evaluation_record_id=existing.id, dimension_id=dimension_ids[0]).scalar(), 2)
+            self.assertEqual(db.session.query(EvaluationScore.score).filter_by(
+                evaluation_record_id=records[evaluator_id].id).all(), [(4,)])
+
+    def test_refresh_cached_totals(self):
+        with app.app_context():
+            self.assertEqual(EvaluationRecord.refresh_cached_totals(), 3)
+            db.session.commit()
+            cached = dict(db.session.query(EvaluationRecord.id, EvaluationRecord.cached_total_score).all())
+            self.assertEqual(cached, self._python_totals())
+            self.assertAlmostEqual(EvaluationRecord.query.get(self.record_ids[0]).weight_sum, 1.0)
+
+            # 修改维度权重后只重算使用该维度的记录
+            dimension = EvaluationDimension.query.filter_by(name='勤勉').first()
+            dimension.weight = 0.1
+            EvaluationRecord.refresh_cached_totals(EvaluationRecord.id.in_(
+                db.session.query(EvaluationScore.evaluation_record_id).filter_by(dimension_id=dimension.id)
+            ))
+            db.session.commit()
+            db.session.expunge_all()
+            record = EvaluationRecord.query.get(self.record_ids[0])
+            self.assertEqual(record.cached_total_score, 79.5)
+            self.assertAlmostEqual(record.weight_sum, 0.95)
+
+            app.config['USE_CACHED_TOTAL_SCORE'] = True
+            try:
+                total = db.session.query(EvaluationRecord.total_score_source()).filter(
+                    EvaluationRecord.id == self.record_ids[1]).scalar()
+            finally:
+                app.config['USE_CACHED_TOTAL_SCORE'] = False
+            self.assertEqual(total, 95.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from extensions import db
+from models import Employee
+from app import app
+from password_hashing import hash_password, needs_rehash
+from lookup_cache import invalidate_employees
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class PasswordHashingTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.csrf_enabled = app.config['WTF_CSRF_ENABLED']
+        app.config['WTF_CSRF_ENABLED'] = False
+        self.configured_method = app.config['PASSWORD_HASH_METHOD']
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+        self.client = app.test_client()
+
+        with app.app_context():
+            db.create_all()
+            # 按旧配置（更高成本）存储的哈希
+            employee = Employee(employee_id='20001', name='员工甲', position='开发',
+                                password_hash=hash_password('password', 'pbkdf2:sha256:2000'))
+            db.session.add(employee)
+            db.session.commit()
+
+    def tearDown(self):
+        app.config['WTF_CSRF_ENABLED'] = self.csrf_enabled
+        app.config['PASSWORD_HASH_METHOD'] = self.configured_method
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_needs_rehash_normalizes_default_iterations(self):
+        stored = hash_password('password', 'pbkdf2:sha256:260000')
+        self.assertFalse(needs_rehash(stored, 'pbkdf2:sha256'))
+        self.assertTrue(needs_rehash(stored, 'pbkdf2:sha256:1000'))
+
+    def test_login_rehashes_with_configured_method(self):
+        response = self.client.post('/login', data={'employee_id': '20001', 'password': 'wrong'})
+        self.assertIn('/login', response.headers['Location'])
+        with app.app_context():
+            self.assertTrue(Employee.query.one().password_hash.startswith('pbkdf2:sha256:2000$'))
+
+        response = self.client.post('/login', data={'employee_id': '20001', 'password': 'password'})
+        self.assertNotIn('/login', response.headers['Location'])
+        with app.app_context():
+            employee = Employee.query.one()
+            self.assertTrue(employee.password_hash.startswith('pbkdf2:sha256:1000$'))
+            self.assertTrue(employee.check_password('password'))
+        # 重新哈希后本会话仍有效
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+    def test_rehash_keeps_other_sessions(self):
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+        first = app.test_client()
+        first.post('/login', data={'employee_id': '20001', 'password': 'password'})
+
+        # 调整哈希成本后在另一个会话登录，触发重新哈希
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+        second = app.test_client()
+        response = second.post('/login', data={'employee_id': '20001', 'password': 'password'})
+        self.assertNotIn('/login', response.headers['Location'])
+        with app.app_context():
+            employee = Employee.query.one()
+            self.assertTrue(employee.password_hash.startswith('pbkdf2:sha256:1000$'))
+            self.assertEqual((employee.auth_version, employee.credential_version), (0, 0))
+            # 其他身份字段变化后旧会话从数据库重新加载，密码版本号未变，仍然有效
+            employee.position = '测试'
+            db.session.commit()
+            invalidate_employees()
+        self.assertEqual(first.get('/').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from extensions import db
+from models import Employee
+from app import app
+from query_stats import count_queries
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class QueryStatsTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config['QUERY_STATS_HEADER'] = True
+        self.client = app.test_client()
+
+        with app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        app.config['QUERY_STATS_HEADER'] = False
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_response_header_reports_statement_count(self):
+        response = self.client.get('/login')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers['X-Query-Stats'], r'^count=\d+; time=[\d.]+ms$')
+
+    def test_count_queries_records_statements(self):
+        with app.app_context():
+            with count_queries() as stats:
+                Employee.query.all()
+                Employee.query.filter_by(employee_id='10000').first()
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(len(stats.slowest_statements()), 2)
+        self.assertIn('SELECT', stats.slowest_statements()[0][1])
+
+    def test_failed_statement_discards_start_time(self):
+        with app.app_context():
+            with count_queries() as stats:
+                with db.engine.connect() as connection:
+                    with self.assertRaises(Exception):
+                        connection.exec_driver_sql('SELECT * FROM missing_table')
+                    self.assertEqual(connection.info.get('query_stats_start'), [])
+                    connection.exec_driver_sql('SELECT 1')
+        self.assertEqual(stats.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
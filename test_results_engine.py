@@ -0,0 +1,149 @@
+import unittest
+from extensions import db
+from models import Employee, EvaluationRecord, EvaluationTask, EvaluationDimension, EvaluationScore
+from app import app
+from results_engine import rebuild_results, set_records_status, verify_results
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class ResultsEngineTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+        with app.app_context():
+            db.create_all()
+
+            # 各角色评估者和两名被评估员工
+            self.head = Employee(employee_id='20001', name='负责人', position='负责人', role='部门负责人')
+            self.leader = Employee(employee_id='20002', name='分管领导', position='领导', role='分管领导')
+            self.staff1 = Employee(employee_id='20003', name='员工1', position='开发', role='员工', position_coefficient=1.1)
+            self.staff2 = Employee(employee_id='20004', name='员工2', position='测试', role='员工')
+            for employee in (self.head, self.leader, self.staff1, self.staff2):
+                employee.set_password('password')
+
+            self.task = EvaluationTask(year=2024, quarter=1, name='测试任务', status='published')
+            self.dim1 = EvaluationDimension(name='维度1', weight=0.6)
+            self.dim2 = EvaluationDimension(name='维度2', weight=0.4)
+            db.session.add_all([self.head, self.leader, self.staff1, self.staff2, self.task, self.dim1, self.dim2])
+            db.session.commit()
+
+            self.task_id = self.task.id
+            self.ids = {e.name: e.id for e in (self.head, self.leader, self.staff1, self.staff2)}
+            self._add_record(self.head, self.staff1, 'submitted', [5, 4])
+            self._add_record(self.leader, self.staff1, 'submitted', [4, 4])
+            self._add_record(self.staff2, self.staff1, 'submitted', [3, 3])
+            # 已退回的评估不计入结果
+            self._add_record(self.staff1, self.staff2, 'returned', [5, 5])
+            rebuild_results()
+            db.session.commit()
+
+    def _add_record(self, evaluator, evaluatee, status, scores):
+        record = EvaluationRecord(evaluator_id=evaluator.id, evaluatee_id=evaluatee.id,
+                                  task_id=self.task.id, status=status)
+        db.session.add(record)
+        db.session.flush()
+        for dimension, score in zip((self.dim1, self.dim2), scores):
+            db.session.add(EvaluationScore(evaluation_record_id=record.id, dimension_id=dimension.id, score=score))
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_query_role_averages(self):
+        from results_engine import query_role_averages
+        with app.app_context():
+            averages = query_role_averages(self.task_id)
+        self.assertEqual(averages[self.ids['员工1']], {'部门负责人': 90.0, '分管领导': 80.0, '员工': 60.0})
+        self.assertNotIn(self.ids['员工2'], averages)
+
+    def test_compute_evaluatee_scores(self):
+        from results_engine import compute_evaluatee_scores
+        with app.app_context():
+            results = {r['name']: r for r in compute_evaluatee_scores(self.task_id)}
+        self.assertEqual(set(results), {'员工1', '员工2'})
+        staff1 = results['员工1']
+        self.assertEqual(staff1['dept_manager_score'], 0)
+        # (90*0.4 + 60*0.15 + 80*0.3) * 1.1
+        self.assertEqual(staff1['final_score'], 75.9)
+        self.assertEqual(results['员工2']['final_score'], 0)
+
+    def test_compute_evaluation_results_levels_and_cache(self):
+        from results_engine import compute_evaluation_results
+        with app.app_context():
+            results = compute_evaluation_results(self.task_id, '甲')
+            self.assertEqual([r['name'] for r in results], ['员工1', '员工2'])
+            self.assertEqual([r['rank'] for r in results], [1, 2])
+            self.assertEqual([r['performance_level'] for r in results], ['C', 'D'])
+
+            # 修改返回值不影响缓存
+            results[0]['final_score'] = 0
+            self.assertEqual(compute_evaluation_results(self.task_id, '甲')[0]['final_score'], 75.9)
+
+            # 评估被退回后数据版本变化，缓存失效
+            record = EvaluationRecord.query.filter_by(evaluator_id=self.ids['负责人']).first()
+            set_records_status([record], 'returned')
+            db.session.commit()
+            self.assertEqual(compute_evaluation_results(self.task_id, '甲')[0]['final_score'], 36.3)
+
+    def test_export_writes_rows_in_order(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+        from exports import evaluation_results_workbook
+        progress = []
+        output = BytesIO()
+        with app.app_context():
+            filename = evaluation_results_workbook(
+                EvaluationTask.query.get(self.task_id), '甲', output,
+                progress=lambda done, total: progress.append((done, total)))
+
+        self.assertTrue(filename.startswith('绩效考评结果_测试任务_'))
+        self.assertEqual(progress[0], (1, 4))
+        self.assertEqual(progress[-1], (4, 4))
+        worksheet = load_workbook(output).active
+        rows = [list(row) for row in worksheet.iter_rows(values_only=True)]
+        self.assertEqual(rows[0][0], '测试任务')
+        self.assertEqual(rows[1], ['姓名', '岗位', '部门负责人分数', '部门经理分数', '员工互评分数', '分管领导分数', '最终分数', '绩效等级'])
+        self.assertEqual([row[0] for row in rows[2:]], ['员工1', '员工2'])
+        self.assertEqual((rows[2][6], rows[2][7]), (75.9, 'C'))
+        self.assertEqual(worksheet['A3'].border.left.style, 'thin')
+
+    def test_statement_count_does_not_grow_with_evaluatees(self):
+        from query_stats import count_queries
+        from results_engine import compute_evaluatee_scores
+        with app.app_context():
+            with count_queries() as before:
+                compute_evaluatee_scores(self.task_id)
+            for i in range(5):
+                employee = Employee(employee_id=f'3000{i}', name=f'新员工{i}', position='开发', role='员工')
+                employee.set_password('password')
+                db.session.add(employee)
+            db.session.commit()
+            with count_queries() as after:
+                results = compute_evaluatee_scores(self.task_id)
+        self.assertEqual(len(results), 7)
+        self.assertEqual(after.count, before.count)
+
+    def test_status_changes_keep_results_in_sync(self):
+        from results_engine import query_role_averages
+        with app.app_context():
+            returned = EvaluationRecord.query.filter_by(status='returned').first()
+            set_records_status([returned], 'submitted')
+            db.session.commit()
+            self.assertEqual(query_role_averages(self.task_id)[self.ids['员工2']], {'员工': 100.0})
+
+            submitted = EvaluationRecord.query.filter_by(evaluator_id=self.ids['分管领导']).all()
+            set_records_status(submitted, 'withdrawal_requested')
+            set_records_status(submitted, 'returned')
+            db.session.commit()
+            self.assertNotIn('分管领导', query_role_averages(self.task_id)[self.ids['员工1']])
+            self.assertEqual(verify_results(self.task_id), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
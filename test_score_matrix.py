@@ -0,0 +1,43 @@
+import unittest
+from collections import namedtuple
+from app import app
+from score_matrix import EMPTY_CELL, build_score_matrix
+
+Person = namedtuple('Person', 'id name')
+Row = namedtuple('Row', 'evaluator_id evaluatee_id total_score')
+
+
+class ScoreMatrixTest(unittest.TestCase):
+    def setUp(self):
+        self.evaluators = [Person(7, '甲'), Person(3, '乙'), Person(5, '丙')]
+        self.evaluatees = [Person(3, '乙'), Person(9, '丁')]
+
+    def test_build_matrix_and_averages(self):
+        evaluations = [Row(7, 3, 80.0), Row(5, 3, 91.256), Row(3, 9, 70.0),
+                       Row(3, 9, 75.0),  # 重复记录以最后一条为准
+                       Row(42, 3, 10.0)]  # 不在汇总范围内的评估者被忽略
+        with app.app_context():
+            matrix = build_score_matrix(evaluations, self.evaluators, self.evaluatees)
+        self.assertEqual(matrix.scores.shape, (2, 3))
+        rows = matrix.rows()
+        self.assertEqual([r[0].name for r in rows], ['乙', '丁'])
+        self.assertEqual(rows[0][1], [80.0, EMPTY_CELL, 91.26])
+        self.assertEqual(rows[0][2], 85.63)
+        self.assertEqual(rows[1][1], [EMPTY_CELL, 75.0, EMPTY_CELL])
+        self.assertEqual(rows[1][2], 75.0)
+
+    def test_last_duplicate_wins(self):
+        evaluations = [Row(7, 3, float(score)) for score in range(100)] + [Row(5, 9, 60.0), Row(7, 3, 88.0)]
+        with app.app_context():
+            matrix = build_score_matrix(evaluations, self.evaluators, self.evaluatees)
+        self.assertEqual(matrix.scores[0, 0], 88.0)
+        self.assertEqual(matrix.scores[1, 2], 60.0)
+
+    def test_empty_rows_have_no_average(self):
+        with app.app_context():
+            matrix = build_score_matrix([], self.evaluators, self.evaluatees)
+        self.assertEqual(matrix.rows()[1][1:], ([EMPTY_CELL] * 3, EMPTY_CELL))
+
+
+if __name__ == '__main__':
+    unittest.main()
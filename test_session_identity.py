@@ -0,0 +1,75 @@
+import unittest
+from extensions import db
+from models import Employee
+from app import app
+from lookup_cache import LocalCacheBackend, invalidate_employees
+from query_stats import count_queries
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class SessionIdentityTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.client = app.test_client()
+
+        with app.app_context():
+            db.create_all()
+            admin = Employee(employee_id='20001', name='审核员', position='综合', is_admin=True)
+            admin.set_password('password')
+            db.session.add(admin)
+            db.session.commit()
+            self.admin_pk = admin.id
+            app.extensions['lookup_cache'] = LocalCacheBackend()
+
+        # 模拟已登录的会话
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.admin_pk)
+            sess['_fresh'] = True
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _update_admin(self, password=None, **changes):
+        with app.app_context():
+            admin = db.session.get(Employee, self.admin_pk)
+            for name, value in changes.items():
+                setattr(admin, name, value)
+            if password:
+                admin.set_password(password)
+            db.session.commit()
+            invalidate_employees()
+
+    def test_snapshot_skips_database_until_identity_changes(self):
+        # 第一个请求写入身份快照，第二个请求载入版本号缓存
+        for _ in range(2):
+            self.assertEqual(self.client.get('/admin/lookup-cache/stats').status_code, 200)
+        with count_queries() as stats:
+            self.assertEqual(self.client.get('/admin/lookup-cache/stats').status_code, 200)
+        self.assertEqual(stats.count, 0)
+
+        # 与身份无关的字段不改变版本号
+        self._update_admin(position_coefficient=1.5)
+        with app.app_context():
+            self.assertEqual(db.session.get(Employee, self.admin_pk).auth_version, 0)
+
+        # 取消管理员权限后立即生效
+        self._update_admin(is_admin=False)
+        self.assertEqual(self.client.get('/admin/lookup-cache/stats').status_code, 403)
+
+    def test_password_reset_ends_existing_session(self):
+        self.assertEqual(self.client.get('/').status_code, 200)
+        self._update_admin(password='changed')
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response.headers['Location'])
+
+
+if __name__ == '__main__':
+    unittest.main()
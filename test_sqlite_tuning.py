@@ -0,0 +1,49 @@
+import unittest
+from extensions import db
+from app import app
+from config import PRODUCTION_SQLITE_PRAGMAS, get_config
+from sqlite_tuning import sqlite_settings
+import tempfile
+
+test_db_path = tempfile.mkstemp()[1]
+
+
+class SqliteTuningTest(unittest.TestCase):
+    def setUp(self):
+        # 配置测试环境
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{test_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.pragmas = app.config['SQLITE_PRAGMAS']
+
+    def tearDown(self):
+        app.config['SQLITE_PRAGMAS'] = self.pragmas
+
+    def test_pragmas_applied_on_new_connection(self):
+        app.config['SQLITE_PRAGMAS'] = PRODUCTION_SQLITE_PRAGMAS
+        with app.app_context():
+            settings = sqlite_settings(db.session.connection())
+            db.session.remove()
+        self.assertEqual(settings['journal_mode'], 'wal')
+        self.assertEqual(settings['busy_timeout'], PRODUCTION_SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(settings['synchronous'], 1)  # NORMAL
+        self.assertEqual(settings['cache_size'], PRODUCTION_SQLITE_PRAGMAS['cache_size'])
+
+    def test_pragmas_bound_to_engine_outside_app_context(self):
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tempfile.mkstemp()[1]}'
+        app.config['SQLITE_PRAGMAS'] = {'busy_timeout': 4321}
+        with app.app_context():
+            engine = db.engine
+        # 例如后台线程或脚本在应用上下文之外新建连接
+        with engine.connect() as connection:
+            self.assertEqual(sqlite_settings(connection)['busy_timeout'], 4321)
+        engine.dispose()
+
+    def test_get_config_rejects_unknown_name(self):
+        self.assertNotIn('journal_mode', get_config('testing').SQLITE_PRAGMAS)
+        with self.assertRaises(ValueError):
+            get_config('staging')
+
+
+if __name__ == '__main__':
+    unittest.main()